@@ -0,0 +1,243 @@
+'use strict';
+
+// Canvas renderer of the phone graph, for graphs too big for an SVG
+// element per node and link (see canvas.html). The whole graph is drawn
+// on one canvas per animation frame: the links as a single path and the
+// nodes as one path per color. The force simulation runs in a Web Worker
+// (simulation_worker.js) that posts the positions after every tick, and a
+// quadtree of the positions finds the node under the mouse to hover and
+// drag it.
+//
+// The graph comes from the variable 'mega_phone_graph', scripted in the
+// html, or, with graph_binary.js loaded, from the binary export whose URL
+// the html sets as 'phone_graph_binary'. Nodes exported with x and y (see
+// src/layout.py) are drawn where they are and no simulation is run.
+
+var width = 960,
+    height = 500
+
+var canvas = d3.select("body").append("canvas")
+    .attr("width", width)
+    .attr("height", height)
+    .node();
+
+var context = canvas.getContext("2d");
+
+var color = d3.scaleOrdinal(d3.schemeCategory20);
+
+var graph = null,
+    quadtree = null,
+    worker = null,
+    hovered = -1,
+    scheduled = false;
+
+if (typeof mega_phone_graph !== 'undefined') {
+    start(fromDocument(mega_phone_graph));
+} else {
+    d3.request(phone_graph_binary)
+        .responseType("arraybuffer")
+        .get(function(error, request) {
+            if (error) throw error;
+            start(fromBinary(decodeGraph(request.response)));
+        });
+}
+
+// Returns the arrays drawn from a document in the schema of write_d3.
+function fromDocument(data) {
+    var index = {},
+        sources = [],
+        targets = [];
+    data.nodes.forEach(function(d, i) { index[d.id] = i; });
+    Object.keys(data.links).forEach(function(name) {
+        data.links[name].forEach(function(d) {
+            sources.push(index[d.source]);
+            targets.push(index[d.target]);
+        });
+    });
+    var preset = data.nodes.length > 0 && data.nodes.every(function(d) {
+        return d.x !== undefined && d.y !== undefined;
+    });
+    return {
+        names: data.nodes.map(function(d) { return d.id; }),
+        colors: data.nodes.map(function(d) { return d.color; }),
+        radius: Float32Array.from(data.nodes, function(d) {
+            return d.radius;
+        }),
+        x: Float32Array.from(data.nodes, function(d) { return d.x || 0; }),
+        y: Float32Array.from(data.nodes, function(d) { return d.y || 0; }),
+        preset: preset,
+        sources: Uint32Array.from(sources),
+        targets: Uint32Array.from(targets)
+    };
+}
+
+// Returns the arrays drawn from a graph read by decodeGraph.
+function fromBinary(decoded) {
+    var count = decoded.names.length;
+    return {
+        names: decoded.names,
+        colors: Array.from(decoded.nodeColors, function(index) {
+            return decoded.colors[index];
+        }),
+        radius: decoded.radius,
+        x: decoded.x ? decoded.x.slice() : new Float32Array(count),
+        y: decoded.y ? decoded.y.slice() : new Float32Array(count),
+        preset: decoded.x !== null && count > 0,
+        sources: decoded.sources,
+        targets: decoded.targets
+    };
+}
+
+function start(data) {
+    graph = data;
+    graph.groups = {};
+    graph.labeled = [];
+    graph.colors.forEach(function(name, i) {
+        (graph.groups[name] = graph.groups[name] || []).push(i);
+        if (colored({color: name, id: graph.names[i]})) graph.labeled.push(i);
+    });
+    graph.maxRadius = d3.max(graph.radius) || 0;
+
+    d3.select(canvas)
+        .on("mousemove", hover)
+        .call(d3.drag()
+            .container(canvas)
+            .subject(dragsubject)
+            .on("start", dragstarted)
+            .on("drag", dragged)
+            .on("end", dragended));
+
+    if (graph.preset) {
+        schedule();
+        return;
+    }
+    worker = new Worker("simulation_worker.js");
+    worker.onmessage = function(event) {
+        graph.x = event.data.x;
+        graph.y = event.data.y;
+        quadtree = null;
+        schedule();
+    };
+    worker.postMessage({type: "start",
+                        width: width,
+                        height: height,
+                        count: graph.names.length,
+                        sources: graph.sources,
+                        targets: graph.targets});
+}
+
+function colored(d){
+    if (d.color === "green" || d.color === "blue") {
+        return d.id;
+    };
+}
+
+function schedule() {
+    if (!scheduled) {
+        scheduled = true;
+        requestAnimationFrame(draw);
+    }
+}
+
+function draw() {
+    var x = graph.x,
+        y = graph.y,
+        radius = graph.radius,
+        i;
+    scheduled = false;
+    context.clearRect(0, 0, width, height);
+
+    context.beginPath();
+    for (i = 0; i < graph.sources.length; i++) {
+        context.moveTo(x[graph.sources[i]], y[graph.sources[i]]);
+        context.lineTo(x[graph.targets[i]], y[graph.targets[i]]);
+    }
+    context.strokeStyle = "grey";
+    context.lineWidth = .1;
+    context.stroke();
+
+    Object.keys(graph.groups).forEach(function(name) {
+        context.beginPath();
+        graph.groups[name].forEach(function(i) {
+            context.moveTo(x[i] + radius[i], y[i]);
+            context.arc(x[i], y[i], radius[i], 0, 2 * Math.PI);
+        });
+        context.fillStyle = color(name);
+        context.fill();
+    });
+
+    context.fillStyle = "#555";
+    context.font = "10px Arial";
+    context.textAlign = "start";
+    graph.labeled.forEach(function(i) {
+        context.fillText(graph.names[i], x[i], y[i]);
+    });
+
+    if (hovered >= 0) {
+        context.beginPath();
+        context.arc(x[hovered], y[hovered], radius[hovered] + 2, 0,
+                    2 * Math.PI);
+        context.strokeStyle = "#555";
+        context.lineWidth = 1;
+        context.stroke();
+        context.fillText(graph.names[hovered], x[hovered] + radius[hovered],
+                         y[hovered]);
+    }
+}
+
+// Returns the index of the node under (px, py), or -1. The quadtree is
+// rebuilt lazily, after the positions moved.
+function find(px, py) {
+    if (!graph) return -1;
+    if (!quadtree) {
+        quadtree = d3.quadtree()
+            .x(function(i) { return graph.x[i]; })
+            .y(function(i) { return graph.y[i]; })
+            .addAll(d3.range(graph.names.length));
+    }
+    var i = quadtree.find(px, py, graph.maxRadius + 2);
+    if (i === undefined) return -1;
+    var dx = graph.x[i] - px,
+        dy = graph.y[i] - py,
+        reach = graph.radius[i] + 2;
+    return dx * dx + dy * dy <= reach * reach ? i : -1;
+}
+
+function hover() {
+    var point = d3.mouse(canvas),
+        i = find(point[0], point[1]);
+    if (i !== hovered) {
+        hovered = i;
+        canvas.style.cursor = i >= 0 ? "pointer" : null;
+        schedule();
+    }
+}
+
+function dragsubject() {
+    var i = find(d3.event.x, d3.event.y);
+    if (i >= 0) return {index: i, x: graph.x[i], y: graph.y[i]};
+}
+
+function dragstarted() {
+  if (graph.preset) return;
+  worker.postMessage({type: "dragstart", index: d3.event.subject.index,
+                      active: d3.event.active});
+}
+
+function dragged() {
+  var i = d3.event.subject.index;
+  if (graph.preset) {
+    graph.x[i] = d3.event.x;
+    graph.y[i] = d3.event.y;
+    quadtree = null;
+    schedule();
+    return;
+  }
+  worker.postMessage({type: "drag", index: i, x: d3.event.x, y: d3.event.y});
+}
+
+function dragended() {
+  if (graph.preset) return;
+  worker.postMessage({type: "dragend", index: d3.event.subject.index,
+                      active: d3.event.active});
+}
\ No newline at end of file
@@ -0,0 +1,102 @@
+'use strict';
+
+// Reader of the binary graph export written by src/binary.py, whose
+// docstring describes the format. The sections are TypedArray views over
+// the downloaded buffer: nothing is parsed but the strings. TypedArrays
+// use the byte order of the machine, little-endian on every browser
+// platform, like the file.
+
+var GRAPH_MAGIC = 0x31424750,  // 'PGB1' as a little-endian uint32
+    GRAPH_VERSION = 1,
+    GRAPH_POSITIONS = 1;
+
+function decodeGraph(buffer) {
+    var view = new DataView(buffer),
+        header = [],
+        offset = 32,
+        i;
+    for (i = 0; i < 8; i++) {
+        header.push(view.getUint32(i * 4, true));
+    }
+    if (header[0] !== GRAPH_MAGIC || header[1] !== GRAPH_VERSION) {
+        throw new Error("Not a version " + GRAPH_VERSION + " graph export");
+    }
+    var nodes = header[2],
+        edges = header[3],
+        types = header[4],
+        colors = header[5],
+        columns = header[6],
+        flags = header[7];
+
+    function take(Type, length) {
+        var array = new Type(buffer, offset, length);
+        offset += array.byteLength + (4 - array.byteLength % 4) % 4;
+        return array;
+    }
+
+    var count = nodes + types + colors + columns,
+        offsets = take(Uint32Array, count + 1),
+        bytes = take(Uint8Array, offsets[count]),
+        decoder = new TextDecoder("utf-8"),
+        strings = [];
+    for (i = 0; i < count; i++) {
+        strings.push(decoder.decode(bytes.subarray(offsets[i],
+                                                   offsets[i + 1])));
+    }
+    var graph = {
+        names: strings.slice(0, nodes),
+        types: strings.slice(nodes, nodes + types),
+        colors: strings.slice(nodes + types, nodes + types + colors),
+        columns: strings.slice(nodes + types + colors),
+        nodeColors: take(Uint8Array, nodes),
+        radius: take(Float32Array, nodes),
+        x: null,
+        y: null,
+        values: {}
+    };
+    if (flags & GRAPH_POSITIONS) {
+        graph.x = take(Float32Array, nodes);
+        graph.y = take(Float32Array, nodes);
+    }
+    graph.sources = take(Uint32Array, edges);
+    graph.targets = take(Uint32Array, edges);
+    graph.edgeTypes = take(Uint8Array, edges);
+    graph.columns.forEach(function(column) {
+        graph.values[column] = take(Float32Array, edges);
+    });
+    return graph;
+}
+
+// Returns the document of a decoded graph in the schema of write_d3, as
+// drawn by phone_graph.js.
+function graphDocument(graph) {
+    var data = {nodes: [], links: {}},
+        i;
+    for (i = 0; i < graph.names.length; i++) {
+        var node = {id: graph.names[i],
+                    color: graph.colors[graph.nodeColors[i]],
+                    radius: graph.radius[i]};
+        if (graph.x) {
+            node.x = graph.x[i];
+            node.y = graph.y[i];
+        }
+        data.nodes.push(node);
+    }
+    graph.types.forEach(function(name) {
+        data.links[name] = [];
+    });
+    for (i = 0; i < graph.sources.length; i++) {
+        var name = graph.types[graph.edgeTypes[i]],
+            properties = {};
+        graph.columns.forEach(function(column) {
+            var value = graph.values[column][i];
+            if (!isNaN(value)) properties[column] = value;
+        });
+        data.links[name].push({name: name,
+                               source: graph.names[graph.sources[i]],
+                               target: graph.names[graph.targets[i]],
+                               value: 20,
+                               properties: properties});
+    }
+    return data;
+}
@@ -9,29 +9,37 @@ var svg = d3.select("body").append("svg")
 
 var color = d3.scaleOrdinal(d3.schemeCategory20);
 
-// the variable 'mega_phone_graph' is scripted in the html.
-// I may want Python to dynamically generate json, which will be passed
-// to this file.
+// The graph comes either from the variable 'mega_phone_graph', scripted
+// in the html, from a binary export written by src/binary.py, whose URL
+// the html sets as 'phone_graph_binary' (with graph_binary.js loaded),
+// from the levels of detail written by src/coarsen.py: then the html sets
+// 'phone_graph_levels' to their URLs, coarsest first, and each level
+// replaces the one before it as soon as it arrives, or from chunks
+// written by src/tiles.py: then the html sets 'phone_graph_index' to the
+// URL of their index, the hubs are drawn first and the neighborhood of a
+// hub is fetched when the hub is clicked.
+
+var graph = {nodes: [], links: []},
+    nodeById = {},
+    linkByKey = {},
+    waiting = [],
+    expanded = {};
+
+// Nodes exported with x and y (see src/layout.py) are already laid out:
+// they are drawn where they are and the simulation is never run.
+var preset = false;
 
 var link = svg.append("g")
     .attr("class", "links")
-    .selectAll("line")
-    .data(mega_phone_graph.links.Text.concat(mega_phone_graph.links.Talk))
-    .enter().append("line")
-        .attr("stroke", "grey")
-        .attr("stroke-width", .1);
+    .selectAll("line");
 
 var node = svg.append("g")
     .attr("class", "nodes")
-    .selectAll("circle")
-    .data(mega_phone_graph.nodes)
-    .enter().append("circle")
-    .attr("r", function(d){return d.radius;})
-    .attr("fill", function(d) {return color(d.color); })
-    .call(d3.drag()
-        .on("start", dragstarted)
-        .on("drag", dragged)
-        .on("end", dragended));
+    .selectAll("circle");
+
+var label = svg.append("g")
+    .attr("class", "names")
+    .selectAll("text");
 
 // var path = svg.append("svg:g")
 //               .selectAll("path")
@@ -42,18 +50,132 @@ var node = svg.append("g")
 
 var simulation = d3.forceSimulation()
     .force("link", d3.forceLink().id(function(d){return d.id;}))
+        // .distance(function(d){return d.value;})
     .force("collide", d3.forceCollide(4))
     .force("charge", d3.forceManyBody()
                             .distanceMax(110)
                             .distanceMin(50))
     .force("center", d3.forceCenter(width / 2, height / 2))
-    .velocityDecay(.6);
+    .velocityDecay(.6)
+    .on("tick", ticked);
 
+if (typeof mega_phone_graph !== 'undefined') {
+    addGraph(mega_phone_graph);
+    restart();
+} else if (typeof phone_graph_binary !== 'undefined') {
+    d3.request(phone_graph_binary)
+        .responseType("arraybuffer")
+        .get(function(error, request) {
+            if (error) throw error;
+            addGraph(graphDocument(decodeGraph(request.response)));
+            restart();
+        });
+} else if (typeof phone_graph_levels !== 'undefined') {
+    loadLevel(0);
+} else {
+    d3.json(phone_graph_index, function(error, index) {
+        if (error) throw error;
+        addGraph(index);
+        restart();
+    });
+}
 
-var label = svg.selectAll('.names')
-        .data(mega_phone_graph.nodes)
-        .enter()
-        .append("text")
+function linkKey(d) {
+    var source = d.source.id || d.source,
+        target = d.target.id || d.target;
+    return d.name + "|" + source + "|" + target;
+}
+
+// Adds the nodes and links of a document not already drawn. Links wait
+// until both of their nodes are there. New nodes without a position
+// start next to origin, the hub they were fetched for.
+function addGraph(data, origin) {
+    var first = !graph.nodes.length;
+    data.nodes.forEach(function(d) {
+        if (nodeById[d.id]) return;
+        if (origin && d.x === undefined) {
+            d.x = origin.x + Math.random() - .5;
+            d.y = origin.y + Math.random() - .5;
+        }
+        nodeById[d.id] = d;
+        graph.nodes.push(d);
+    });
+    if (first) {
+        preset = graph.nodes.length > 0 && graph.nodes.every(function(d) {
+            return d.x !== undefined && d.y !== undefined;
+        });
+    }
+    Object.keys(data.links).forEach(function(name) {
+        data.links[name].forEach(function(d) {
+            if (!linkByKey[linkKey(d)]) {
+                linkByKey[linkKey(d)] = d;
+                waiting.push(d);
+            }
+        });
+    });
+    waiting = waiting.filter(function(d) {
+        if (!nodeById[d.source] || !nodeById[d.target]) return true;
+        d.source = nodeById[d.source];
+        d.target = nodeById[d.target];
+        graph.links.push(d);
+        return false;
+    });
+}
+
+// Draws the level at index of phone_graph_levels instead of the one on
+// screen, then fetches the next one. Nodes in both levels stay where
+// they were unless the new level has a position for them.
+function loadLevel(index) {
+    d3.json(phone_graph_levels[index], function(error, data) {
+        if (error) throw error;
+        var previous = nodeById,
+            laidOut = data.nodes.every(function(d) {
+                return d.x !== undefined && d.y !== undefined;
+            });
+        data.nodes.forEach(function(d) {
+            var seen = previous[d.id];
+            if (seen && d.x === undefined) {
+                d.x = seen.x;
+                d.y = seen.y;
+            }
+        });
+        graph = {nodes: [], links: []};
+        nodeById = {};
+        linkByKey = {};
+        waiting = [];
+        addGraph(data);
+        preset = laidOut;
+        restart();
+        if (index + 1 < phone_graph_levels.length) loadLevel(index + 1);
+    });
+}
+
+function restart() {
+    link = link.data(graph.links, linkKey);
+    link.exit().remove();
+    link = link.enter().append("line")
+        .attr("stroke", "grey")
+        .attr("stroke-width", .1)
+        .merge(link);
+
+    node = node.data(graph.nodes, function(d) { return d.id; });
+    node.exit().remove();
+    node = node.enter().append("circle")
+        .attr("r", function(d){return d.radius;})
+        .attr("fill", function(d) {return color(d.color); })
+        .style("cursor", function(d) {
+            return d.chunks && d.chunks.length ? "pointer" : null;
+        })
+        .on("click", expand)
+        .call(d3.drag()
+            .on("start", dragstarted)
+            .on("drag", dragged)
+            .on("end", dragended))
+        .merge(node);
+
+    label = label.data(graph.nodes, function(d) { return d.id; });
+    label.exit().remove();
+    label = label.enter().append("text")
             .text(colored)
             .style("text-anchor", "start")
             .style("fill", "#555")
@@ -62,23 +184,38 @@ var label = svg.selectAll('.names')
         .call(d3.drag()
             .on("start", dragstarted)
             .on("drag", dragged)
-            .on("end", dragended));
+            .on("end", dragended))
+        .merge(label);
+
+    simulation.nodes(graph.nodes);
+    simulation.force("link").links(graph.links);
+    if (preset) {
+        simulation.stop();
+        ticked();
+    } else {
+        simulation.alpha(1).restart();
+    }
+}
 
+// Fetches the chunks of a hub's neighborhood, once.
+function expand(d) {
+    if (!d.chunks || expanded[d.id]) return;
+    expanded[d.id] = true;
+    var base = phone_graph_index.replace(/[^\/]*$/, "");
+    d.chunks.forEach(function(chunk) {
+        d3.json(base + chunk, function(error, data) {
+            if (error) throw error;
+            addGraph(data, d);
+            restart();
+        });
+    });
+}
 
 // node.append("title")
 //     .attr("dx", 10)
 //     .attr("dy", ".35em")
 //     .text(function(d) { return d.id; });
 
-
-simulation
-    .nodes(mega_phone_graph.nodes)
-    .on("tick", ticked);
-
-simulation.force("link")
-    .links(mega_phone_graph.links.Text.concat(mega_phone_graph.links.Talk))
-    // .distance(function(d){return d.value;});
-
 function colored(d){
     if (d.color === "green" || d.color === "blue") {
         return d.id;
@@ -109,17 +246,25 @@ function ticked() {
 }
 
 function dragstarted(d) {
+  if (preset) return;
   if (!d3.event.active) simulation.alphaTarget(0.5).restart();
   d.fx = d.x;
   d.fy = d.y;
 }
 
 function dragged(d) {
+  if (preset) {
+    d.x = d3.event.x;
+    d.y = d3.event.y;
+    ticked();
+    return;
+  }
   d.fx = d3.event.x;
   d.fy = d3.event.y;
 }
 
 function dragended(d) {
+  if (preset) return;
   if (!d3.event.active) simulation.alphaTarget(0.5);
   d.fx = null;
   d.fy = null;
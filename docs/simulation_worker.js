@@ -0,0 +1,56 @@
+'use strict';
+
+// Web Worker running the force simulation of canvas_graph.js off the main
+// thread, with the forces of phone_graph.js. Nodes and links are indexes;
+// the positions are posted back after every tick as two Float32Arrays
+// whose buffers are transferred, not copied.
+
+importScripts("https://d3js.org/d3.v4.min.js");
+
+var nodes = [],
+    simulation = null;
+
+onmessage = function(event) {
+    var message = event.data;
+    if (message.type === "start") {
+        start(message);
+    } else if (message.type === "dragstart") {
+        if (!message.active) simulation.alphaTarget(0.5).restart();
+        nodes[message.index].fx = nodes[message.index].x;
+        nodes[message.index].fy = nodes[message.index].y;
+    } else if (message.type === "drag") {
+        nodes[message.index].fx = message.x;
+        nodes[message.index].fy = message.y;
+    } else if (message.type === "dragend") {
+        if (!message.active) simulation.alphaTarget(0.5);
+        nodes[message.index].fx = null;
+        nodes[message.index].fy = null;
+    }
+};
+
+function start(message) {
+    nodes = d3.range(message.count).map(function() { return {}; });
+    var links = Array.from(message.sources, function(source, i) {
+        return {source: source, target: message.targets[i]};
+    });
+    simulation = d3.forceSimulation(nodes)
+        .force("link", d3.forceLink(links))
+        .force("collide", d3.forceCollide(4))
+        .force("charge", d3.forceManyBody()
+                                .distanceMax(110)
+                                .distanceMin(50))
+        .force("center", d3.forceCenter(message.width / 2,
+                                        message.height / 2))
+        .velocityDecay(.6)
+        .on("tick", ticked);
+}
+
+function ticked() {
+    var x = new Float32Array(nodes.length),
+        y = new Float32Array(nodes.length);
+    for (var i = 0; i < nodes.length; i++) {
+        x[i] = nodes[i].x;
+        y[i] = nodes[i].y;
+    }
+    postMessage({x: x, y: y}, [x.buffer, y.buffer]);
+}
\ No newline at end of file
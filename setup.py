@@ -15,6 +15,11 @@ setup(
     author='Kurt Maurer',
     author_email='kurtrm@gmail.com',
     license='MIT',
+    packages=['src'],
+    python_requires='>=3.5',
     install_requires=['PyPDF2', 'numpy', 'pandas', 'matplotlib'],
-    extras_require=extra_packages
+    extras_require=extra_packages,
+    entry_points={
+        'console_scripts': ['phone-graph = src.pipeline:main']
+    }
 )
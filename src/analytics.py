@@ -0,0 +1,132 @@
+"""
+Paths and centrality of a graph.
+
+The functions only use the read methods of LabeledPropertyGraph, so they
+work on a SubgraphView or a MappedGraph opened from a saved file too.
+direction is 'out' to follow relationships leaving each node, 'in' to
+follow relationships arriving at it, or 'both', as in subgraph.k_hop().
+Relationships are unweighted: a path is as long as its number of hops.
+"""
+from collections import deque
+import random
+
+
+DIRECTIONS = ('out', 'in', 'both')
+
+
+def neighbors(graph, node, direction='out'):
+    """Return the nodes one hop from node, each once."""
+    if direction == 'out':
+        return graph.get_neighbors(node)
+    if direction == 'in':
+        return graph.is_neighbor_to(node)
+    if direction == 'both':
+        found = graph.get_neighbors(node)
+        seen = set(found)
+        return found + [name for name in graph.is_neighbor_to(node)
+                        if name not in seen]
+    raise ValueError('direction must be one of {}'.format(DIRECTIONS))
+
+
+def neighborhood(graph, node, k=1, direction='both'):
+    """Return the nodes at most k hops from node, nearest first."""
+    graph[node]
+    found = [node]
+    seen = {node}
+    frontier = [node]
+    for _ in range(k):
+        reached = []
+        for name in frontier:
+            for neighbor in neighbors(graph, name, direction):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    reached.append(neighbor)
+        found.extend(reached)
+        frontier = reached
+    return found
+
+
+def shortest_path(graph, source, target, direction='out'):
+    """
+    Return the nodes of a shortest path from source to target.
+
+    Returns None if target cannot be reached, and raises KeyError if
+    either node is not in the graph.
+    """
+    graph[source], graph[target]
+    parents = {source: None}
+    frontier = deque([source])
+    while frontier:
+        node = frontier.popleft()
+        if node == target:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            return path[::-1]
+        for neighbor in neighbors(graph, node, direction):
+            if neighbor not in parents:
+                parents[neighbor] = node
+                frontier.append(neighbor)
+    return None
+
+
+def degree_centrality(graph, direction='both'):
+    """Return {node: share of the other nodes one hop away}."""
+    names = graph.nodes()
+    scale = 1. / (len(names) - 1) if len(names) > 1 else 0.
+    return {name: len(neighbors(graph, name, direction)) * scale
+            for name in names}
+
+
+def betweenness_centrality(graph, direction='out', sample=None, seed=0,
+                           normalized=True):
+    """
+    Return {node: share of the shortest paths going through the node}.
+
+    Uses Brandes' algorithm, from every node or, with sample, from sample
+    random nodes with the result scaled up, which is an estimate. With
+    direction 'both' every pair of nodes is counted once.
+    """
+    names = graph.nodes()
+    scores = dict.fromkeys(names, 0.)
+    sources = names
+    if sample is not None and sample < len(names):
+        sources = random.Random(seed).sample(names, sample)
+    for source in sources:
+        order = []
+        parents = {source: []}
+        paths = {source: 1}
+        distance = {source: 0}
+        frontier = deque([source])
+        while frontier:
+            node = frontier.popleft()
+            order.append(node)
+            for neighbor in neighbors(graph, node, direction):
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    paths[neighbor] = 0
+                    parents[neighbor] = []
+                    frontier.append(neighbor)
+                if distance[neighbor] == distance[node] + 1:
+                    paths[neighbor] += paths[node]
+                    parents[neighbor].append(node)
+        dependency = dict.fromkeys(order, 0.)
+        for node in reversed(order):
+            for parent in parents[node]:
+                dependency[parent] += paths[parent] / float(paths[node]) * \
+                    (1 + dependency[node])
+            if node != source:
+                scores[node] += dependency[node]
+    count = len(names)
+    scale = float(count) / len(sources) if sources else 0.
+    if normalized:
+        scale *= 1. / ((count - 1) * (count - 2)) if count > 2 else 0.
+    elif direction == 'both':
+        scale *= 0.5
+    return {name: score * scale for name, score in scores.items()}
+
+
+def top(scores, count=10):
+    """Return the count (node, score) pairs with the highest scores."""
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:count]
@@ -0,0 +1,238 @@
+"""
+Benchmarks of the graph operations across sizes and implementations.
+
+run() builds a synthetic phone network of every size with both
+LabeledPropertyGraph implementations, timing add_node and
+add_relationship over the whole network, then the neighbor reads and
+remove_node over a random sample of nodes. The memory held by the built
+graph is measured in a second, traced build so tracing does not skew the
+timings. Results can be saved as JSON and compared with an earlier run to
+catch regressions:
+
+    $ python -m src.benchmark --sizes 10000,100000 --output base.json
+    $ python -m src.benchmark --sizes 10000,100000 --baseline base.json
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from . import labeled_property_graph, lpg_refactor
+from .synthetic import RELATIONSHIPS, phone_network
+
+
+class _Labeled:
+    """Benchmark calls for labeled_property_graph."""
+
+    new = labeled_property_graph.LabeledPropertyGraph
+
+    @staticmethod
+    def add_relationship(graph, rel, node_a, node_b):
+        graph.add_relationship(rel, node_a, node_b)
+
+    @staticmethod
+    def neighbors(graph, node):
+        return graph.get_neighbors(node)
+
+    @staticmethod
+    def is_neighbor_to(graph, node):
+        return graph.is_neighbor_to(node)
+
+    @staticmethod
+    def remove_node(graph, node):
+        graph.remove_node(node)
+
+
+class _Refactor:
+    """Benchmark calls for lpg_refactor."""
+
+    new = lpg_refactor.LabeledPropertyGraph
+
+    @staticmethod
+    def add_relationship(graph, rel, node_a, node_b):
+        graph.add_relationship(node_a, node_b, rel)
+
+    @staticmethod
+    def neighbors(graph, node):
+        return graph.neighbors(node)
+
+    @staticmethod
+    def is_neighbor_to(graph, node):
+        return graph.predecessors(node)
+
+    @staticmethod
+    def remove_node(graph, node):
+        del graph[node]
+
+
+IMPLEMENTATIONS = {'labeled': _Labeled, 'refactor': _Refactor}
+OPERATIONS = ('add_node', 'add_relationship', 'neighbors', 'is_neighbor_to',
+              'remove_node')
+
+
+def _build(implementation, network):
+    """Return a graph of network and the seconds spent per operation."""
+    graph = implementation.new()
+    clock = time.perf_counter
+    start = clock()
+    for node in network.nodes:
+        graph.add_node(node)
+    seconds = {'add_node': clock() - start}
+    add_relationship = implementation.add_relationship
+    nodes = network.nodes
+    start = clock()
+    for source, target, rel in zip(network.sources.tolist(),
+                                   network.targets.tolist(),
+                                   network.types.tolist()):
+        add_relationship(graph, RELATIONSHIPS[rel], nodes[source],
+                         nodes[target])
+    seconds['add_relationship'] = clock() - start
+    return graph, seconds
+
+
+def measure(implementation, network, queries=1000, seed=0, memory=True):
+    """Return {operation: (count, seconds)} and the bytes of the graph."""
+    graph, seconds = _build(implementation, network)
+    counts = {'add_node': len(network.nodes),
+              'add_relationship': len(network.sources)}
+    sample = random.Random(seed).sample(network.nodes,
+                                        min(queries, len(network.nodes)))
+    clock = time.perf_counter
+    for operation in ('neighbors', 'is_neighbor_to', 'remove_node'):
+        call = getattr(implementation, operation)
+        start = clock()
+        for node in sample:
+            call(graph, node)
+        seconds[operation] = clock() - start
+        counts[operation] = len(sample)
+    del graph
+    size = None
+    if memory:
+        tracemalloc.start()
+        graph, _ = _build(implementation, network)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del graph
+    return {operation: (counts[operation], seconds[operation])
+            for operation in OPERATIONS}, size
+
+
+def run(sizes=(1000, 10000, 100000), implementations=None, queries=1000,
+        seed=0, memory=True):
+    """
+    Benchmark every implementation on a network of every size.
+
+    sizes are numbers of relationships. Returns a report dict with one
+    result per (implementation, size): its node and edge counts, the
+    operations per second of every operation and the bytes held.
+    """
+    implementations = IMPLEMENTATIONS if implementations is None else \
+        implementations
+    report = {'python': platform.python_version(),
+              'machine': platform.machine(),
+              'date': datetime.datetime.now().isoformat(),
+              'results': []}
+    for size in sizes:
+        network = phone_network(edges=size, seed=seed)
+        for name, implementation in sorted(implementations.items()):
+            timings, size_bytes = measure(implementation, network, queries,
+                                          seed, memory)
+            report['results'].append({
+                'implementation': name,
+                'size': size,
+                'nodes': len(network.nodes),
+                'edges': len(network.sources),
+                'ops_per_sec': {
+                    operation: count / seconds if seconds else float('inf')
+                    for operation, (count, seconds) in timings.items()},
+                'memory_bytes': size_bytes,
+                'bytes_per_edge': size_bytes / len(network.sources)
+                if size_bytes is not None and len(network.sources) else None,
+            })
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Return the regressions of report against an earlier baseline report.
+
+    An operation regresses when its operations per second drop by more
+    than tolerance, and memory when it grows by more than tolerance. Each
+    regression is (implementation, size, what, baseline value, value).
+    """
+    earlier = {(result['implementation'], result['size']): result
+               for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        key = (result['implementation'], result['size'])
+        if key not in earlier:
+            continue
+        before = earlier[key]
+        for operation, speed in result['ops_per_sec'].items():
+            old = before['ops_per_sec'].get(operation)
+            if old and speed < old * (1 - tolerance):
+                regressions.append(key + (operation, old, speed))
+        old = before.get('memory_bytes')
+        new = result.get('memory_bytes')
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(key + ('memory_bytes', old, new))
+    return regressions
+
+
+def format_report(report, regressions=()):
+    """Return the report, and any regressions, as a printable table."""
+    lines = ['{:<10} {:>9} {:>9} '.format('graph', 'edges', 'nodes') +
+             ' '.join('{:>16}'.format(operation) for operation in OPERATIONS) +
+             ' {:>10}'.format('bytes/edge')]
+    for result in report['results']:
+        per_edge = result['bytes_per_edge']
+        lines.append(
+            '{:<10} {:>9,} {:>9,} '.format(result['implementation'],
+                                           result['edges'], result['nodes']) +
+            ' '.join('{:>16,.0f}'.format(result['ops_per_sec'][operation])
+                     for operation in OPERATIONS) +
+            ' {:>10}'.format('-' if per_edge is None
+                             else '{:,.0f}'.format(per_edge)))
+    for implementation, size, what, old, new in regressions:
+        lines.append('REGRESSION {} at {:,} edges: {} {:,.0f} -> {:,.0f}'
+                     .format(implementation, size, what, old, new))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma separated numbers of relationships')
+    parser.add_argument('--implementation', action='append',
+                        choices=IMPLEMENTATIONS,
+                        help='implementation to run, may be repeated')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the traced build measuring memory')
+    parser.add_argument('--output', help='write the report as JSON here')
+    parser.add_argument('--baseline', help='JSON report to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    implementations = None if not args.implementation else \
+        {name: IMPLEMENTATIONS[name] for name in args.implementation}
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = run(sizes, implementations, args.queries, args.seed,
+                 args.memory)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    print(format_report(report, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
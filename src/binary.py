@@ -0,0 +1,176 @@
+"""
+Compact binary export of a graph for the viewer.
+
+The JSON documents of write_d3() repeat every key, and the full phone
+number of both ends of every link. write_binary() writes the same graph
+as typed arrays instead, which docs/graph_binary.js reads with a DataView
+and TypedArray views over the downloaded buffer, without parsing:
+
+    header      8 uint32: magic 'PGB1', version, nodes, edges, types,
+                colors, columns, flags (1: positions are present)
+    strings     uint32 offsets[strings + 1] into UTF-8 bytes: the node
+                names, then the relationship types, the colors and the
+                column names
+    colors      uint8[nodes], indexes into the colors
+    radius      float32[nodes]
+    x, y        float32[nodes] each, if flags has positions
+    sources     uint32[edges]
+    targets     uint32[edges]
+    types       uint8[edges], indexes into the relationship types
+    columns     float32[edges] for every column, NaN when missing
+
+Every section starts on a multiple of 4 bytes so it can be viewed in
+place, and numbers are little-endian. Colors and types are indexed by a
+byte, so a graph can have at most 256 of each. Columns hold a numeric
+relationship property, such as Count; list or series values, such as
+Duration, are written as their total.
+"""
+from array import array
+import struct
+
+import numpy as np
+
+from .export import node_color, node_radius, relationship_names
+from .series import NumericSeries
+
+
+MAGIC = b'PGB1'
+VERSION = 1
+POSITIONS = 1
+#  Number of colors or relationship types a uint8 index can tell apart.
+MAX_INDEXED = 256
+_HEADER = struct.Struct('<4s7I')
+
+
+def _pad(data):
+    """Return data padded with zeros to a multiple of 4 bytes."""
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _string_table(strings):
+    """Return the offsets and padded UTF-8 bytes of strings."""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets.tobytes() + _pad(b''.join(encoded))
+
+
+def _number(value):
+    """Return a property value as a float column entry."""
+    if isinstance(value, (list, tuple, NumericSeries)):
+        return float(sum(value))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def write_binary(graph, path, columns=('Count',), positions=None,
+                 color=node_color):
+    """
+    Write graph to path in the binary format.
+
+    columns are the relationship properties written, positions and color
+    those of write_d3(). Returns the number of nodes and edges written.
+    Raises ValueError, before writing anything, if the graph has more
+    than MAX_INDEXED relationship types or node colors.
+    """
+    names = graph.nodes()
+    index = {name: position for position, name in enumerate(names)}
+    types = relationship_names(graph)
+    if len(types) > MAX_INDEXED:
+        raise ValueError('The binary format holds at most {} relationship '
+                         'types, the graph has {}'.format(MAX_INDEXED,
+                                                          len(types)))
+    type_index = {name: position for position, name in enumerate(types)}
+    colors, color_index = [], {}
+    node_colors = array('B')
+    radius = np.empty(len(names), dtype='<f4')
+    for position, name in enumerate(names):
+        value = color(name)
+        if value not in color_index:
+            if len(colors) == MAX_INDEXED:
+                raise ValueError('The binary format holds at most {} node '
+                                 'colors'.format(MAX_INDEXED))
+            color_index[value] = len(colors)
+            colors.append(value)
+        node_colors.append(color_index[value])
+        radius[position] = node_radius(len(graph.get_neighbors(name)))
+    sources, targets, edge_types = array('I'), array('I'), array('B')
+    values = [array('f') for _ in columns]
+    for source in names:
+        for target in graph.get_neighbors(source):
+            for name in graph.get_relationships(source, target):
+                sources.append(index[source])
+                targets.append(index[target])
+                edge_types.append(type_index[name])
+                properties = graph.get_relationship_properties(
+                    name, source, target)
+                for column, key in zip(values, columns):
+                    column.append(_number(properties[key])
+                                  if key in properties else float('nan'))
+    flags = POSITIONS if positions is not None else 0
+    sections = [_string_table(names + types + colors + list(columns)),
+                _pad(node_colors.tobytes()), radius.tobytes()]
+    if positions is not None:
+        points = np.array([positions[name] for name in names],
+                          dtype='<f4').reshape(-1, 2)
+        sections += [points[:, 0].tobytes(), points[:, 1].tobytes()]
+    sections += [np.frombuffer(sources, dtype='u4').astype('<u4').tobytes(),
+                 np.frombuffer(targets, dtype='u4').astype('<u4').tobytes(),
+                 _pad(edge_types.tobytes())]
+    sections += [np.frombuffer(column, dtype='f4').astype('<f4').tobytes()
+                 for column in values]
+    with open(path, 'wb') as handle:
+        handle.write(_HEADER.pack(MAGIC, VERSION, len(names), len(sources),
+                                  len(types), len(colors), len(columns),
+                                  flags))
+        for section in sections:
+            handle.write(section)
+    return len(names), len(sources)
+
+
+def read_binary(path):
+    """
+    Return the contents of a binary export as a dict of lists and arrays.
+
+    The keys are nodes, types, colors and columns (names), node_colors,
+    radius, x and y (None without positions), sources, targets,
+    edge_types and values ({column: array}).
+    """
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    magic, version, nodes, edges, types, colors, columns, flags = \
+        _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('{} is not a version {} graph export'.format(
+            path, VERSION))
+    offset = _HEADER.size
+    offsets = np.frombuffer(data, '<u4', nodes + types + colors + columns + 1,
+                            offset)
+    offset += offsets.nbytes
+    strings = [data[offset + start:offset + end].decode('utf-8')
+               for start, end in zip(offsets[:-1].tolist(),
+                                     offsets[1:].tolist())]
+    offset += int(offsets[-1]) + (-int(offsets[-1]) % 4)
+
+    columns = strings[nodes + types + colors:]
+    layout = [('node_colors', 'u1', nodes), ('radius', '<f4', nodes)]
+    if flags & POSITIONS:
+        layout += [('x', '<f4', nodes), ('y', '<f4', nodes)]
+    layout += [('sources', '<u4', edges), ('targets', '<u4', edges),
+               ('edge_types', 'u1', edges)]
+    layout += [(('values', column), '<f4', edges) for column in columns]
+    arrays = {'x': None, 'y': None}
+    for key, dtype, length in layout:
+        arrays[key] = np.frombuffer(data, dtype, length, offset)
+        offset += arrays[key].nbytes + (-arrays[key].nbytes % 4)
+    contents = {key: value for key, value in arrays.items()
+                if not isinstance(key, tuple)}
+    contents.update(nodes=strings[:nodes],
+                    types=strings[nodes:nodes + types],
+                    colors=strings[nodes + types:nodes + types + colors],
+                    columns=columns,
+                    values={column: arrays['values', column]
+                            for column in columns})
+    return contents
@@ -0,0 +1,157 @@
+"""
+Memoization of graph reads, invalidated by graph mutations.
+
+The graph counts its mutations: _version goes up on every change and
+_node_versions[name] goes up on every change touching a node (adding or
+removing it, its relationships or its properties). A cached entry
+remembers the versions of the nodes it depends on when it was computed,
+and is recomputed on the next lookup if any of them moved. Entries that
+depend on the whole graph remember _version instead.
+
+So adding a relationship between Kurt and Mom only invalidates the cached
+neighbors, relationships and properties of Kurt and Mom, while nodes(),
+paths and other whole-graph results are invalidated by any mutation.
+
+Only changes made through the graph, or through the methods of its Node
+objects, are seen. Editing a dict returned by get_relationship_properties()
+in place does not bump any version. Cached values are shared between
+callers and should be treated as read-only.
+"""
+from collections import OrderedDict
+import functools
+
+
+class QueryCache:
+    """Bounded LRU cache over the read methods of a LabeledPropertyGraph."""
+
+    def __init__(self, graph, maxsize=1024):
+        """Initialize an empty cache for graph holding up to maxsize entries."""
+        self.graph = graph
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+    def _stamp(self, depends):
+        """Return the current versions of what an entry depends on."""
+        if depends is None:
+            return self.graph._version
+        versions = self.graph._node_versions
+        return tuple(versions.get(name, 0) for name in depends)
+
+    def get(self, key, compute, depends=None):
+        """
+        Return the cached value for key, calling compute() on a miss.
+
+        depends is a sequence of node names the value depends on, or None
+        if any mutation of the graph may change it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] == self._stamp(entry[2]):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = compute()
+        depends = None if depends is None else tuple(depends)
+        self._entries[key] = (value, self._stamp(depends), depends)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Return hit, miss and size counters."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def memoize(self, depends=None):
+        """
+        Decorate a function of the graph's nodes to cache its results.
+
+        depends is called with the function's arguments and returns the
+        node names the result depends on. Leave it out for functions that
+        depend on the whole graph, like paths or aggregates. Entries are
+        keyed on the function object, so functions sharing a name, such as
+        lambdas or methods of different classes, do not share results.
+
+            @cache.memoize()
+            def texts_sent(node): ...
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def memoized(*args):
+                return self.get(
+                    (function, args),
+                    lambda: function(*args),
+                    None if depends is None else depends(*args))
+            return memoized
+        return decorator
+
+    # --------------------- cached graph reads ---------------------
+
+    def nodes(self):
+        """Return a list of nodes in the graph."""
+        return self.get(('nodes',), self.graph.nodes)
+
+    def unique_relationships(self):
+        """Return list of unique relationships."""
+        return self.get(('unique_relationships',),
+                        self.graph.unique_relationships)
+
+    def nodes_with_relationship(self, name):
+        """Return all nodes with a given relationship."""
+        return self.get(('nodes_with_relationship', name),
+                        lambda: self.graph.nodes_with_relationship(name))
+
+    def get_neighbors(self, node):
+        """Return all nodes node has relationships with."""
+        return self.get(('get_neighbors', node),
+                        lambda: self.graph.get_neighbors(node), (node,))
+
+    def is_neighbor_to(self, node):
+        """Return node that node is a neighbor to, but not vice versa."""
+        return self.get(('is_neighbor_to', node),
+                        lambda: self.graph.is_neighbor_to(node), (node,))
+
+    def get_relationships(self, node_a, node_b):
+        """Return all relationships between two nodes."""
+        return self.get(('get_relationships', node_a, node_b),
+                        lambda: self.graph.get_relationships(node_a, node_b),
+                        (node_a, node_b))
+
+    def get_relationship_properties(self, name, node_a, node_b):
+        """Return properties of a relationship between two nodes."""
+        return self.get(('get_relationship_properties', name, node_a, node_b),
+                        lambda: self.graph.get_relationship_properties(
+                            name, node_a, node_b),
+                        (node_a, node_b))
+
+    def get_node_properties(self, name):
+        """Return properties of a node."""
+        return self.get(('get_node_properties', name),
+                        lambda: self.graph.get_node_properties(name), (name,))
+
+    def has_neighbor(self, node_a, node_b):
+        """Return boolean whether a node has a certain neighbor."""
+        return self.get(('has_neighbor', node_a, node_b),
+                        lambda: self.graph.has_neighbor(node_a, node_b),
+                        (node_a, node_b))
+
+    def has_relationship(self, node_a, node_b, relationship, both_ways=False):
+        """Return whether node_a has a given rel to node_b or vice_versa."""
+        return self.get(('has_relationship', node_a, node_b, relationship,
+                         both_ways),
+                        lambda: self.graph.has_relationship(
+                            node_a, node_b, relationship, both_ways),
+                        (node_a, node_b))
@@ -0,0 +1,92 @@
+"""
+Change feed of the mutations of a labeled property graph.
+
+A ChangeFeed attaches itself to a graph and is told about every mutation
+made through the graph, or through the methods of its Node objects, as a
+Change with a sequence number that goes up by one per change. The feed
+keeps the last maxlen changes in a ring buffer and passes every new one
+to its subscribers, so consumers can either react as changes happen or
+catch up later from the last sequence number they saw:
+
+    >>> feed = ChangeFeed(lpg)
+    >>> seen = feed.sequence
+    >>> lpg.add_node('Kurt')
+    >>> for change in feed.since(seen):
+    ...     seen = change.sequence
+
+Removing a node reports the removal of each of its relationships first.
+Editing a dict returned by get_relationship_properties() in place, or the
+properties of a Relationship directly, is not seen.
+"""
+from collections import deque, namedtuple
+from itertools import islice
+
+
+#  A graph mutation. kind is one of KINDS. node is the node changed, or the
+#  source of the relationship changed, other its target and name its
+#  relationship name. key is the property or label, value the new value.
+Change = namedtuple('Change', ('sequence', 'kind', 'node', 'other', 'name',
+                               'key', 'value'))
+
+KINDS = ('add_node', 'remove_node', 'add_node_label', 'remove_node_label',
+         'set_node_property', 'remove_node_property', 'add_relationship',
+         'remove_relationship', 'set_relationship_property',
+         'remove_relationship_property')
+
+
+class ChangeFeed:
+    """Bounded log of a graph's changes, with subscribers."""
+
+    def __init__(self, graph, maxlen=10000):
+        """Attach a feed keeping the last maxlen changes to graph."""
+        self.graph = graph
+        self.sequence = 0
+        self._changes = deque(maxlen=maxlen)
+        self._subscribers = []
+        graph._feeds.append(self)
+
+    def __len__(self):
+        """Return the number of changes still in the buffer."""
+        return len(self._changes)
+
+    @property
+    def oldest(self):
+        """Return the sequence number of the oldest buffered change."""
+        return self.sequence - len(self._changes) + 1
+
+    def subscribe(self, callback):
+        """Call callback with every new Change. Returns callback."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling callback."""
+        self._subscribers.remove(callback)
+
+    def since(self, sequence):
+        """
+        Return the changes made after the one numbered sequence.
+
+        Raises ValueError if some of them already left the buffer, in which
+        case the consumer has to start over from the graph itself.
+        """
+        if sequence < self.oldest - 1:
+            raise ValueError('Changes {} to {} were dropped from the feed'
+                             .format(sequence + 1, self.oldest - 1))
+        count = self.sequence - sequence
+        if count <= 0:
+            return []
+        return list(islice(reversed(self._changes), count))[::-1]
+
+    def close(self):
+        """Detach the feed from its graph."""
+        self.graph._feeds.remove(self)
+
+    def _record(self, kind, node, other=None, name=None, key=None,
+                value=None):
+        """Number a change, buffer it and pass it to the subscribers."""
+        self.sequence += 1
+        change = Change(self.sequence, kind, node, other, name, key, value)
+        self._changes.append(change)
+        for callback in self._subscribers:
+            callback(change)
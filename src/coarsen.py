@@ -0,0 +1,205 @@
+"""
+Coarsened copies of a graph for level-of-detail views.
+
+Most nodes of the phone graph are unnamed numbers hanging off a single
+subscriber. collapse() copies a graph with groups of nodes merged into
+one super-node each, labeled Group with a Members property counting the
+original nodes it stands for. Relationships between the same two nodes of
+the copy are merged as well: numeric properties, such as Count, are
+added up, lists or series, such as Duration, are added up into their
+total and EventLogs are merged into a new log holding every event. Other
+values are copied from the first relationship holding them.
+Relationships inside a group are dropped. A group cannot be named like a
+node of the graph it collapses: leaf_groups() and area_groups() number
+their groups apart, e.g. 'Kurt numbers 2' if a node is called 'Kurt
+numbers'.
+
+levels() builds the standard detail levels, coarsest first:
+
+    - 'area': numbers grouped by area code, after collapsing leaves.
+    - 'leaves': numbers whose only neighbor is one node, grouped per
+      neighbor, e.g. every number only Kurt talks to becomes 'Kurt
+      numbers'.
+    - 'full': the graph itself.
+
+and write_levels() exports each one for the viewer. Pointed at their
+URLs, coarsest first, docs/phone_graph.js draws the coarse level first
+and replaces it with each finer one as it arrives:
+
+    >>> write_levels(lpg, 'docs/phone_graph_{}.json',
+    ...              properties={'Count': None, 'Duration': summarize})
+
+    <script>var phone_graph_levels = ['phone_graph_area.json',
+        'phone_graph_leaves.json', 'phone_graph_full.json'];</script>
+"""
+import copy
+from numbers import Number
+
+from .export import write_d3
+from .labeled_property_graph import LabeledPropertyGraph
+from .layout import layout
+from .series import NumericSeries
+from .temporal import EventLog
+
+
+GROUP = 'Group'
+LEVELS = ('area', 'leaves', 'full')
+
+
+def is_number(name):
+    """Return whether a node is an unnamed phone number."""
+    return name.startswith('(')
+
+
+def _is_group(graph, name):
+    """Return whether a node is a super-node of an earlier collapse."""
+    return GROUP in graph[name].labels
+
+
+def leaf_groups(graph, candidate=is_number):
+    """
+    Return {node: group} for the candidate nodes with a single neighbor.
+
+    A leaf's group is named after that neighbor. Two leaves only linked
+    to each other are left alone.
+    """
+    hubs = {}
+    for name in graph.nodes():
+        if not candidate(name) or _is_group(graph, name):
+            continue
+        neighbors = set(graph.get_neighbors(name))
+        neighbors.update(graph.is_neighbor_to(name))
+        if len(neighbors) == 1:
+            hubs[name] = neighbors.pop()
+    return _name_apart(graph, {name: '{} numbers'.format(hub)
+                               for name, hub in hubs.items()
+                               if hub not in hubs})
+
+
+def area_groups(graph, candidate=is_number):
+    """Return {node: group} putting candidate nodes in their area code."""
+    return _name_apart(graph, {name: '{} numbers'.format(name[:5])
+                               for name in graph.nodes()
+                               if candidate(name) and
+                               not _is_group(graph, name)})
+
+
+def _name_apart(graph, groups):
+    """Return groups with any group named like a node of graph renamed.
+
+    The group gets the first free number, e.g. 'Kurt numbers 2'.
+    """
+    taken = set(graph.nodes())
+    names = {}
+    for group in dict.fromkeys(groups.values()):
+        name, number = group, 1
+        while name in taken:
+            number += 1
+            name = '{} {}'.format(group, number)
+        taken.add(name)
+        names[group] = name
+    return {node: names[group] for node, group in groups.items()}
+
+
+def _members(graph, name):
+    """Return the number of original nodes a node stands for."""
+    if _is_group(graph, name):
+        return graph.get_node_properties(name).get('Members', 1)
+    return 1
+
+
+def _merge(total, properties):
+    """Add a relationship's properties into the merged ones.
+
+    Merged values are new objects, so the coarse graph shares none of
+    them with graph.
+    """
+    for key, value in properties.items():
+        if isinstance(value, bool):
+            total.setdefault(key, value)
+        elif isinstance(value, Number):
+            total[key] = total.get(key, 0) + value
+        elif isinstance(value, (list, tuple, NumericSeries)):
+            total[key] = total.get(key, 0) + sum(value)
+        elif isinstance(value, EventLog):
+            if key in total:
+                total[key].extend(value.times, value.values)
+            else:
+                total[key] = EventLog(value.times, value.values)
+        elif key not in total:
+            total[key] = copy.deepcopy(value)
+
+
+def collapse(graph, groups):
+    """
+    Return a LabeledPropertyGraph of graph with groups merged.
+
+    groups maps node names to the name of their super-node; nodes not in
+    it are copied with their labels and properties. Raises ValueError if
+    a super-node would be named like a node copied.
+    """
+    names = set(graph.nodes())
+    for group in set(groups.values()):
+        if group in names and group not in groups:
+            raise ValueError('Group {!r} is named like a node of the graph'
+                             .format(group))
+    coarse = LabeledPropertyGraph()
+    members = {}
+    for name in graph.nodes():
+        group = groups.get(name)
+        if group is not None:
+            members[group] = members.get(group, 0) + _members(graph, name)
+            continue
+        coarse.add_node(name)
+        for label in graph[name].labels:
+            coarse[name].add_label(label)
+        properties = graph.get_node_properties(name)
+        if properties:
+            coarse.add_node_props(name, **properties)
+    for group, count in members.items():
+        coarse.add_node(group)
+        coarse[group].add_label(GROUP)
+        coarse.add_node_props(group, Members=count)
+    merged = {}
+    for source in graph.nodes():
+        coarse_source = groups.get(source, source)
+        for target in graph.get_neighbors(source):
+            coarse_target = groups.get(target, target)
+            if coarse_source == coarse_target:
+                continue
+            for name in graph.get_relationships(source, target):
+                _merge(merged.setdefault(
+                    (name, coarse_source, coarse_target), {}),
+                    graph.get_relationship_properties(name, source, target))
+    for (name, source, target), properties in merged.items():
+        coarse.add_relationship(name, source, target)
+        if properties:
+            coarse.add_rel_props(name, source, target, **properties)
+    return coarse
+
+
+def levels(graph, candidate=is_number):
+    """Return {level: graph} of the LEVELS of detail of graph."""
+    leaves = collapse(graph, leaf_groups(graph, candidate))
+    return {'area': collapse(leaves, area_groups(leaves, candidate)),
+            'leaves': leaves,
+            'full': graph}
+
+
+def write_levels(graph, path_format, properties=None, js_variable=None,
+                 positions=False):
+    """
+    Export every level of graph, coarsest first, with write_d3().
+
+    path_format and js_variable, if given, are formatted with the level
+    name. With positions each level is laid out first. Returns
+    {level: path}.
+    """
+    paths = {}
+    for level, coarse in levels(graph).items():
+        path = path_format.format(level)
+        write_d3(coarse, path, properties,
+                 js_variable.format(level) if js_variable else None,
+                 positions=layout(coarse) if positions else None)
+        paths[level] = path
+    return paths
@@ -0,0 +1,169 @@
+"""
+Streaming export of a graph to the JSON read by docs/phone_graph.js.
+
+The notebook builds the whole document in memory before dumping it. Here
+write_d3() walks the graph and writes one node or link at a time, so the
+memory used stays flat however big the graph is. The schema is the one
+the viewer reads:
+
+    {"nodes": [{"id": ..., "color": ..., "radius": ...}, ...],
+     "links": {"Text": [{"name": "Text", "source": ..., "target": ...,
+                         "value": 20, "properties": {...}}, ...],
+               "Talk": [...]}}
+
+properties projects the relationship properties written with each link:
+None writes them all, a sequence of keys keeps only those, and a dict maps
+each key kept to a function of its value, or None to write it as is:
+
+    >>> write_d3(lpg, 'docs/mega_phone_graph.json',
+    ...          properties={'Count': None, 'Duration': summarize},
+    ...          js_variable='mega_phone_graph')
+
+Any graph with the read methods of LabeledPropertyGraph can be exported,
+including a MappedGraph opened from a saved file.
+"""
+import json
+import math
+import os
+
+from .series import NumericSeries, json_default
+
+
+#  Relationship types the viewer reads; always written, even when empty.
+RELATIONSHIPS = ('Text', 'Talk')
+LINK_DISTANCE = 20
+
+
+def node_color(name, owner='Kurt'):
+    """Return the viewer color of a node: the owner, contacts or numbers."""
+    if name.startswith('('):
+        return 'grey'
+    if name == owner:
+        return 'blue'
+    return 'green'
+
+
+def node_radius(neighbors):
+    """Return the viewer radius of a node with neighbors neighbors."""
+    return max(math.log2(max(neighbors, 1)) * 2, 2)
+
+
+def summarize(values):
+    """Return the count, sum, min, max and mean of a list or series."""
+    if isinstance(values, NumericSeries):
+        return values.summary()
+    values = list(values)
+    if not values:
+        return {'count': 0, 'sum': 0, 'min': None, 'max': None,
+                'mean': None}
+    total = sum(values)
+    return {'count': len(values), 'sum': total, 'min': min(values),
+            'max': max(values), 'mean': float(total) / len(values)}
+
+
+def project(properties, keep=None):
+    """Return the properties kept by keep, as described in the module."""
+    if keep is None:
+        return properties
+    if isinstance(keep, dict):
+        return {key: value if keep[key] is None else keep[key](value)
+                for key, value in properties.items() if key in keep}
+    return {key: value for key, value in properties.items() if key in keep}
+
+
+def node_dict(graph, name, color=node_color, positions=None):
+    """
+    Return the viewer dict of a node.
+
+    positions maps node names to precomputed (x, y), as returned by
+    layout.layout(), which are written rounded to a tenth of a pixel.
+    """
+    node = {'id': name, 'color': color(name),
+            'radius': node_radius(len(graph.get_neighbors(name)))}
+    if positions is not None and name in positions:
+        x, y = positions[name]
+        node['x'], node['y'] = round(x, 1), round(y, 1)
+    return node
+
+
+def link_dict(graph, name, source, target, properties=None):
+    """Return the viewer dict of a relationship."""
+    return {'name': name, 'source': source, 'target': target,
+            'value': LINK_DISTANCE,
+            'properties': project(graph.get_relationship_properties(
+                name, source, target), properties)}
+
+
+def iter_nodes(graph, color=node_color, positions=None):
+    """Generate the viewer dict of every node of graph."""
+    for name in graph.nodes():
+        yield node_dict(graph, name, color, positions)
+
+
+def iter_links(graph, name, properties=None):
+    """Generate the viewer dict of every relationship called name."""
+    if name not in graph.unique_relationships():
+        return
+    for source in graph.nodes_with_relationship(name):
+        for target in graph.get_neighbors(source):
+            if name in graph.get_relationships(source, target):
+                yield link_dict(graph, name, source, target, properties)
+
+
+def relationship_names(graph):
+    """Return the viewer's relationship types, then any others of graph."""
+    return list(RELATIONSHIPS) + sorted(
+        name for name in graph.unique_relationships()
+        if name not in RELATIONSHIPS)
+
+
+def _write_array(handle, items, dumps):
+    """Write items as a JSON array, one at a time; return their number."""
+    handle.write('[')
+    count = 0
+    for item in items:
+        if count:
+            handle.write(', ')
+        handle.write(dumps(item))
+        count += 1
+    handle.write(']')
+    return count
+
+
+def write_d3(graph, path, properties=None, js_variable=None,
+             color=node_color, positions=None):
+    """
+    Write graph to path in the viewer's JSON schema.
+
+    js_variable prefixes the document with an assignment so it can be
+    loaded with a script tag, as docs/index.html does. NumericSeries
+    values are written as lists unless projected. With positions the
+    nodes get x and y and the viewer skips its simulation. The document is
+    written to path + '.partial' and renamed to path once complete, so a
+    failed export never leaves a truncated file at path. Returns the
+    number of nodes and links written.
+    """
+    encoder = json.JSONEncoder(default=json_default(summaries=False))
+    dumps = encoder.encode
+    partial = path + '.partial'
+    try:
+        with open(partial, 'w') as handle:
+            if js_variable:
+                handle.write('{} = '.format(js_variable))
+            handle.write('{"nodes": ')
+            nodes = _write_array(handle, iter_nodes(graph, color, positions),
+                                 dumps)
+            handle.write(', "links": {')
+            links = 0
+            for index, name in enumerate(relationship_names(graph)):
+                if index:
+                    handle.write(', ')
+                handle.write('{}: '.format(dumps(name)))
+                links += _write_array(
+                    handle, iter_links(graph, name, properties), dumps)
+            handle.write('}}\n')
+    except BaseException:
+        os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return nodes, links
@@ -0,0 +1,187 @@
+"""
+Parity and performance harness for the graph storage backends.
+
+run() builds a reproducible mix of operations (adding numbers and their
+Text/Talk relationships, setting properties, reading neighbors and
+relationships, removing relationships and nodes), plays it against a
+StoredGraph over every backend and compares what each one returned with
+what LabeledPropertyGraph returns for the same mix. The
+report gives, per backend, the operations per second overall and per kind
+of operation, and the memory allocated while the mix ran. Memory is
+measured in a second, traced run so tracing does not skew the timings.
+
+    $ python -m src.harness --nodes 5000 --ops 50000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from .labeled_property_graph import LabeledPropertyGraph
+from .storage import ArrayStore, DictStore, StoredGraph
+from .synthetic import phone_number
+
+
+BACKENDS = {'dict': DictStore, 'array': ArrayStore}
+RELATIONSHIPS = ('Text', 'Talk')
+
+#  Relative frequency of each kind of operation in the mix.
+MIX = (('add_relationship', 30), ('add_rel_props', 10),
+       ('get_neighbors', 15), ('is_neighbor_to', 10),
+       ('get_relationships', 10), ('has_relationship', 10),
+       ('get_relationship_properties', 5), ('nodes_with_relationship', 1),
+       ('unique_relationships', 1), ('remove_relationship', 5),
+       ('remove_node', 1), ('add_node', 3))
+
+
+def operations(nodes=1000, ops=10000, seed=0):
+    """Return a reproducible list of (method, args) operations.
+
+    The first nodes operations add the nodes; the rest are drawn from MIX.
+    Some of them fail on purpose, e.g. relationships that already exist.
+    """
+    rng = random.Random(seed)
+    names = [phone_number(index) for index in range(nodes)]
+    kinds = [kind for kind, weight in MIX for _ in range(weight)]
+    mix = [('add_node', (name,)) for name in names]
+    for _ in range(ops):
+        kind = rng.choice(kinds)
+        node_a, node_b = rng.choice(names), rng.choice(names)
+        rel = rng.choice(RELATIONSHIPS)
+        if kind == 'add_node':
+            name = phone_number(len(names))
+            names.append(name)
+            mix.append((kind, (name,)))
+        elif kind in ('get_neighbors', 'is_neighbor_to', 'remove_node'):
+            mix.append((kind, (node_a,)))
+        elif kind == 'nodes_with_relationship':
+            mix.append((kind, (rel,)))
+        elif kind == 'unique_relationships':
+            mix.append((kind, ()))
+        elif kind == 'get_relationships':
+            mix.append((kind, (node_a, node_b)))
+        elif kind == 'has_relationship':
+            mix.append((kind, (node_a, node_b, rel)))
+        elif kind == 'add_rel_props':
+            mix.append(('add_rel_props', (rel, node_a, node_b,
+                                          {'Count': rng.randint(1, 100)})))
+        else:
+            mix.append((kind, (rel, node_a, node_b)))
+    return mix
+
+
+def _normalize(result):
+    """Make results comparable across backends."""
+    if isinstance(result, list):
+        return sorted(result, key=repr)
+    return result
+
+
+def play(graph, mix):
+    """Run a mix against a graph.
+
+    Returns the normalized outcome of every operation and the seconds
+    spent per kind of operation.
+    """
+    outcomes = []
+    seconds = {}
+    clock = time.perf_counter
+    for method, args in mix:
+        function = getattr(graph, method)
+        start = clock()
+        try:
+            if method == 'add_rel_props':
+                result = function(*args[:3], **args[3])
+            else:
+                result = function(*args)
+        except (KeyError, ValueError) as error:
+            result = type(error).__name__
+        seconds[method] = seconds.get(method, 0.0) + clock() - start
+        outcomes.append(_normalize(result))
+    return outcomes, seconds
+
+
+def run(backends=None, nodes=1000, ops=10000, seed=0):
+    """
+    Play the same mix against every backend.
+
+    backends maps a name to a GraphStore class, BACKENDS by default.
+    Returns a report dict with the per-backend numbers and whether every
+    backend produced the outcomes of LabeledPropertyGraph; mismatches
+    lists the operations whose outcomes differ from those.
+    """
+    backends = BACKENDS if backends is None else backends
+    mix = operations(nodes, ops, seed)
+    counts = {}
+    for method, _ in mix:
+        counts[method] = counts.get(method, 0) + 1
+    report = {'operations': len(mix), 'backends': {}, 'mismatches': []}
+    reference, _ = play(LabeledPropertyGraph(), mix)
+    for name, store in backends.items():
+        start = time.perf_counter()
+        outcomes, seconds = play(StoredGraph(store()), mix)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        graph = StoredGraph(store())
+        play(graph, mix)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del graph
+        report['backends'][name] = {
+            'seconds': elapsed,
+            'ops_per_sec': len(mix) / elapsed if elapsed else float('inf'),
+            'memory_bytes': current,
+            'peak_memory_bytes': peak,
+            'ops_per_sec_by_kind': {
+                method: counts[method] / spent if spent else float('inf')
+                for method, spent in seconds.items()},
+        }
+        report['mismatches'].extend(
+            (name, index, mix[index]) for index, (expected, got)
+            in enumerate(zip(reference, outcomes)) if expected != got)
+    report['matches'] = not report['mismatches']
+    return report
+
+
+def format_report(report):
+    """Return the report as a printable table."""
+    names = list(report['backends'])
+    kinds = sorted(set(kind for numbers in report['backends'].values()
+                       for kind in numbers['ops_per_sec_by_kind']))
+    width = max(len(kind) for kind in kinds + ['memory (KiB)'])
+    lines = ['{} operations, backends {}'.format(
+        report['operations'], 'agree' if report['matches'] else 'DISAGREE')]
+    lines.append(' '.join(['{:<{}}'.format('', width)] +
+                          ['{:>14}'.format(name) for name in names]))
+    rows = [('ops/sec', lambda numbers: numbers['ops_per_sec']),
+            ('memory (KiB)', lambda numbers: numbers['memory_bytes'] / 1024.),
+            ('peak (KiB)',
+             lambda numbers: numbers['peak_memory_bytes'] / 1024.)]
+    rows += [(kind, lambda numbers, kind=kind:
+              numbers['ops_per_sec_by_kind'].get(kind, 0)) for kind in kinds]
+    for label, value in rows:
+        lines.append(' '.join(
+            ['{:<{}}'.format(label, width)] +
+            ['{:>14,.0f}'.format(value(report['backends'][name]))
+             for name in names]))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--ops', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', action='append', choices=BACKENDS,
+                        help='backend to run, may be repeated (default: all)')
+    args = parser.parse_args(argv)
+    backends = BACKENDS if not args.backend else \
+        {name: BACKENDS[name] for name in args.backend}
+    report = run(backends, args.nodes, args.ops, args.seed)
+    print(format_report(report))
+    return 0 if report['matches'] else 1
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+"""
+Batched ingestion of parsed bill records into the labeled property graph.
+
+parse_bill() returns, for every line on the bill, a dict of sections
+('Talk', 'Text', 'Data') holding the columns of the section as lists. The
+notebook turns those into DataFrames, then namedtuples, and calls
+add_relationship() once per call or text. An Ingestor takes the columns as
+they are instead, buffers them and, once batch_size records are waiting
+or on flush(), groups them by (source, target, relationship) with numpy.
+Each distinct edge then gets a single upsert: the relationship is added
+if needed, its Count goes up by the number of records, and the values of
+the records (the minutes of the calls) are appended to its Duration.
+Series are grown with extend_rel_prop(), so a JournaledGraph journals
+only the values added and change feeds see them.
+
+    >>> ingestor = Ingestor(lpg, normalize=lambda number:
+    ...                     contacts.get(number, number))
+    >>> for line, bill in zip(['Dad', 'Mom'], parse_bill(path)):
+    ...     ingestor.add(line, bill)
+    >>> ingestor.flush()
+
+Records whose direction is 'Incoming' go from the number to the line, the
+others from the line to the number.
+"""
+import datetime
+
+import numpy as np
+
+from .series import NumericSeries
+from .temporal import EVENTS, EventLog
+
+
+COUNT = 'Count'
+DURATION = 'Duration'
+INCOMING = 'Incoming'
+
+#  Section of a bill -> (direction column, value column or None).
+SECTIONS = {'Talk': ('Description', 'Min'), 'Text': ('Direction', None)}
+TIME_COLUMN = 'Date and time'
+NUMBER_COLUMN = 'Number'
+
+
+def _encode(values):
+    """Return the distinct values, in order of appearance, and their codes.
+
+    Hashing into a dict is much faster than the sort np.unique would do on
+    an array of strings.
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index))
+                         for value in values), dtype='i8', count=len(values))
+    return np.array(list(index), dtype=object), codes
+
+
+class Ingestor:
+    """Buffer call and text records and write them to a graph in batches."""
+
+    def __init__(self, graph, batch_size=10000, normalize=None,
+                 time_format=None):
+        """
+        Initialize an ingestor writing to graph.
+
+        normalize, if given, is called once per distinct number and returns
+        the node name to use for it, or None to skip its records.
+        time_format, if given, is the strptime format of the 'Date and
+        time' column; the records are then also kept as events in an
+        EventLog on each relationship.
+        """
+        self.graph = graph
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.time_format = time_format
+        self.records = 0
+        self.writes = 0
+        self._pending = []
+        self._size = 0
+
+    def add(self, line, bill):
+        """Queue the Talk and Text sections of one line's bill dict."""
+        for section, (direction, value) in SECTIONS.items():
+            columns = bill.get(section)
+            if not columns:
+                continue
+            times = None
+            if self.time_format is not None:
+                times = [datetime.datetime.strptime(time, self.time_format)
+                         for time in columns[TIME_COLUMN]]
+            self.add_records(line, section, columns[NUMBER_COLUMN],
+                             columns[direction],
+                             columns[value] if value else None, times)
+
+    def add_records(self, line, rel, numbers, directions, values=None,
+                    times=None):
+        """Queue records of relationship rel between line and numbers.
+
+        numbers and directions, and values and times if given, are
+        sequences with one item per record.
+        """
+        numbers = np.asarray(numbers, dtype=object)
+        incoming = np.asarray(directions, dtype=object) == INCOMING
+        if len(incoming) != len(numbers):
+            raise ValueError('Expected one direction per number, got {} and {}'
+                             .format(len(incoming), len(numbers)))
+        if values is not None:
+            values = np.asarray(values, dtype='f8')
+        if times is not None:
+            times = np.asarray(times, dtype='datetime64[s]')
+        self._pending.append((line, rel, numbers, incoming, values, times))
+        self._size += len(numbers)
+        if self._size >= self.batch_size:
+            self.flush()
+
+    def _names(self, numbers):
+        """Return the node names of numbers and a mask of those kept."""
+        if self.normalize is None:
+            return numbers, np.ones(len(numbers), dtype=bool)
+        distinct, inverse = _encode(numbers)
+        names = np.array([self.normalize(number) for number in distinct],
+                         dtype=object)
+        kept = np.array([name is not None for name in names], dtype=bool)
+        return names[inverse], kept[inverse]
+
+    def flush(self):
+        """Write the queued records to the graph.
+
+        Returns the number of distinct edges written.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending, self._size = self._pending, [], 0
+        rels = np.concatenate([np.full(len(batch[2]), batch[1], dtype=object)
+                               for batch in pending])
+        lines = np.concatenate([np.full(len(batch[2]), batch[0], dtype=object)
+                                for batch in pending])
+        numbers, keep = self._names(
+            np.concatenate([batch[2] for batch in pending]))
+        incoming = np.concatenate([batch[3] for batch in pending])
+        values = np.concatenate([
+            batch[4] if batch[4] is not None
+            else np.full(len(batch[2]), np.nan) for batch in pending])
+        times = np.concatenate([
+            batch[5] if batch[5] is not None
+            else np.full(len(batch[2]), 'NaT', dtype='datetime64[s]')
+            for batch in pending])
+        sources = np.where(incoming, numbers, lines)[keep]
+        targets = np.where(incoming, lines, numbers)[keep]
+        rels, values, times = rels[keep], values[keep], times[keep]
+        self.records += len(sources)
+        if not len(sources):
+            return 0
+
+        #  Number the distinct nodes and relationship names, then group the
+        #  records on a single integer key per (source, target, rel).
+        nodes, codes = _encode(np.concatenate([sources, targets]))
+        names, rel_codes = _encode(rels)
+        source_codes, target_codes = codes[:len(sources)], codes[len(sources):]
+        keys = (source_codes * len(nodes) + target_codes) * len(names) + \
+            rel_codes
+        order = np.argsort(keys, kind='stable')
+        edges, starts, counts = np.unique(keys[order], return_index=True,
+                                          return_counts=True)
+
+        for node in nodes:
+            try:
+                self.graph[node]
+            except KeyError:
+                self.graph.add_node(node)
+        for key, start, count in zip(edges, starts, counts):
+            rows = order[start:start + count]
+            pair, rel = divmod(int(key), len(names))
+            source, target = divmod(pair, len(nodes))
+            self._upsert(names[rel], nodes[source], nodes[target], count,
+                         values[rows], times[rows])
+        self.writes += len(edges)
+        return len(edges)
+
+    def _upsert(self, rel, node_a, node_b, count, values, times):
+        """Add count records to a relationship, adding it if needed."""
+        durations = values[~np.isnan(values)].tolist()
+        timed = ~np.isnat(times)
+        events = (times[timed], np.nan_to_num(values[timed])) \
+            if timed.any() else None
+        try:
+            properties = self.graph.get_relationship_properties(
+                rel, node_a, node_b)
+        except KeyError:
+            self.graph.add_relationship(rel, node_a, node_b)
+            properties = {}
+        new = {}
+        if COUNT not in properties:
+            new[COUNT] = int(count)
+        else:
+            self.graph.change_rel_prop(rel, node_a, node_b, COUNT,
+                                       properties[COUNT] + int(count))
+        if durations:
+            if DURATION in properties:
+                self.graph.extend_rel_prop(rel, node_a, node_b, DURATION,
+                                           durations)
+            else:
+                new[DURATION] = NumericSeries(durations)
+        if events is not None:
+            if EVENTS in properties:
+                self.graph.extend_rel_prop(rel, node_a, node_b, EVENTS,
+                                           *events)
+            else:
+                new[EVENTS] = EventLog(*events)
+        if new:
+            self.graph.add_rel_props(rel, node_a, node_b, **new)
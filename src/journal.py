@@ -0,0 +1,280 @@
+"""
+Append-only mutation journal for a persisted labeled property graph.
+
+A JournaledGraph is a LabeledPropertyGraph tied to a snapshot file written
+by persistence.save(). Every successful mutation is appended to a journal
+next to the snapshot (path + '.journal'), so a monthly ingest only costs
+as much disk IO as the changes it makes.
+
+Each journal line is a CRC32 checksum followed by a JSON record:
+
+    0badc0de ["add_relationship", ["Text", "Kurt", "Mom"], {}]
+
+The first record of a journal names the snapshot generation it applies
+to. Compaction writes a new snapshot with the next generation before it
+starts a fresh journal, so a crash between the two steps leaves behind a
+journal that is recognized as stale and ignored on open.
+
+Records are buffered and written in batches. A batch is written and
+fsync'd once batch_size records are pending, or on flush() and close().
+A torn final line left by a crash is dropped when the journal is replayed.
+
+Only mutations that go through the graph methods are journaled. The
+label and property methods of a Node call them, so graph[name].add_label()
+is journaled as add_node_label(). Changing a property dict returned by get_relationship_properties() in place is
+not, and neither is appending to a NumericSeries or an EventLog held in
+a property directly. Append with extend_rel_prop() instead, as Ingestor
+and temporal.record() do: only the values added are journaled, so a
+record costs the size of the change rather than that of the whole
+history. Names and values must be JSON serializable, NumericSeries,
+written as {"__series__": typecode, "values": [...]}, EventLogs, written
+as {"__events__": [ISO 8601 times], "values": [...]}, or numpy arrays,
+written as {"__array__": dtype, "values": [...]}; all are read back as
+what they were. A record is encoded before the graph is changed, so a
+value that cannot be journaled raises TypeError and leaves the graph
+untouched. A record is only written once its mutation succeeds, and the
+graph methods check their arguments before changing anything, so a
+failed call leaves nothing behind to journal. A graph method called by
+another one, such as add_node_prop() by add_node_props(), is not
+journaled again.
+
+A record that cannot be applied on open raises ValueError naming its
+line in the journal.
+"""
+import json
+import os
+import zlib
+
+import numpy as np
+
+from .labeled_property_graph import LabeledPropertyGraph
+from .persistence import load, save
+from .series import NumericSeries
+from .temporal import EventLog
+
+
+JOURNALED_METHODS = ('add_node', 'add_relationship', 'remove_relationship',
+                     'remove_node', 'add_node_prop', 'change_node_prop',
+                     'change_rel_prop', 'remove_node_prop', 'remove_rel_prop',
+                     'add_node_props', 'add_rel_props', 'extend_rel_prop',
+                     'add_node_label', 'remove_node_label')
+
+
+def _default(value):
+    """Return the JSON form of a property value json cannot write."""
+    if isinstance(value, NumericSeries):
+        return {'__series__': value.typecode, 'values': value.tolist()}
+    if isinstance(value, EventLog):
+        return {'__events__': [str(time) for time in value.times],
+                'values': value.values.tolist()}
+    if isinstance(value, np.ndarray):
+        return {'__array__': value.dtype.str,
+                'values': value.astype(str).tolist()
+                if value.dtype.kind == 'M' else value.tolist()}
+    raise TypeError('{!r} cannot be journaled'.format(value))
+
+
+def _object_hook(obj):
+    """Return the value of an object written by _default."""
+    if '__series__' in obj:
+        return NumericSeries(obj['values'], obj['__series__'])
+    if '__events__' in obj:
+        return EventLog(obj['__events__'], obj['values'])
+    if '__array__' in obj:
+        return np.array(obj['values'], dtype=obj['__array__'])
+    return obj
+
+
+def _encode_record(record):
+    """Return the journal line for a record."""
+    payload = json.dumps(record, default=_default).encode('utf-8')
+    return '{:08x} '.format(zlib.crc32(payload) & 0xffffffff).encode(
+        'ascii') + payload + b'\n'
+
+
+def _decode_record(line):
+    """Return the record in a journal line, or None if it is damaged."""
+    if not line.endswith(b'\n') or len(line) < 10:
+        return None
+    checksum, payload = line[:8], line[9:-1]
+    try:
+        if int(checksum, 16) != zlib.crc32(payload) & 0xffffffff:
+            return None
+        return json.loads(payload.decode('utf-8'),
+                          object_hook=_object_hook)
+    except ValueError:
+        return None
+
+
+def _fsync_directory(path):
+    """Persist a rename by syncing the directory that holds path."""
+    try:
+        descriptor = os.open(os.path.dirname(os.path.abspath(path)),
+                             os.O_RDONLY)
+    except OSError:  # pragma: no cover
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:  # pragma: no cover
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class JournaledGraph(LabeledPropertyGraph):
+    """LabeledPropertyGraph whose mutations are durable through a journal."""
+
+    def __init__(self, path, batch_size=64, compact_every=10000):
+        """
+        Open (or create) the graph stored at path.
+
+        The snapshot at path is loaded if it exists and the journal is
+        replayed on top of it. compact_every is the number of journal
+        records after which the journal is folded into a new snapshot;
+        pass None to only compact when compact() is called.
+        """
+        LabeledPropertyGraph.__init__(self)
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+        self._pending = []
+        self._recording = False
+        self._journal = None
+        self.generation = 0
+        if os.path.exists(path):
+            snapshot = load(path)
+            self.generation = snapshot.metadata.get('generation', 0)
+            snapshot.to_graph(self)
+            snapshot.close()
+        self.journal_records = self._replay()
+        if self.journal_records is None:
+            self._start_journal()
+        else:
+            self._journal = open(self.journal_path, 'ab')
+        self._recording = True
+
+    def _replay(self):
+        """
+        Apply the journal to the graph.
+
+        Returns the number of records applied, or None if there is no
+        journal for the current snapshot generation.
+        """
+        if not os.path.exists(self.journal_path):
+            return None
+        with open(self.journal_path, 'rb') as handle:
+            lines = handle.readlines()
+        if not lines or _decode_record(lines[0]) != ['generation',
+                                                     self.generation]:
+            return None
+        good = len(lines[0])
+        applied = 0
+        for number, line in enumerate(lines[1:], 2):
+            record = _decode_record(line)
+            if record is None:
+                break
+            try:
+                method, args, kwargs = record
+                getattr(LabeledPropertyGraph, method)(self, *args, **kwargs)
+            except Exception as error:
+                raise ValueError('Cannot apply line {} of {}, {}: {!r}'
+                                 .format(number, self.journal_path,
+                                         line[9:-1].decode('utf-8'), error))
+            good += len(line)
+            applied += 1
+        if good < sum(len(line) for line in lines):
+            with open(self.journal_path, 'r+b') as handle:
+                handle.truncate(good)
+        return applied
+
+    def _start_journal(self):
+        """Replace the journal with an empty one for this generation."""
+        if self._journal is not None:
+            self._journal.close()
+        temp = self.journal_path + '.tmp'
+        with open(temp, 'wb') as handle:
+            handle.write(_encode_record(['generation', self.generation]))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, self.journal_path)
+        _fsync_directory(self.journal_path)
+        self._journal = open(self.journal_path, 'ab')
+        self.journal_records = 0
+
+    def _record(self, line):
+        """Queue the journal line of a mutation."""
+        self._pending.append(line)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write and fsync every pending record."""
+        if not self._pending:
+            return
+        self._journal.write(b''.join(self._pending))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.journal_records += len(self._pending)
+        self._pending = []
+        if self.compact_every is not None \
+                and self.journal_records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and start a fresh journal."""
+        self._pending = []
+        generation = self.generation + 1
+        temp = self.path + '.tmp'
+        save(self, temp, metadata={'generation': generation})
+        with open(temp, 'rb') as handle:
+            os.fsync(handle.fileno())
+        os.replace(temp, self.path)
+        _fsync_directory(self.path)
+        self.generation = generation
+        self._start_journal()
+
+    def close(self):
+        """Flush pending records and close the journal."""
+        if self._journal is None:
+            return
+        self.flush()
+        self._journal.close()
+        self._journal = None
+        self._recording = False
+
+    def __enter__(self):
+        """Support use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the journal when leaving the with block."""
+        self.close()
+
+
+def _journaled(method):
+    """Build a JournaledGraph override that records a successful call.
+
+    Recording is paused during the call, so the graph methods it calls
+    in turn are not journaled on top of it.
+    """
+    original = getattr(LabeledPropertyGraph, method)
+
+    def journaled(self, *args, **kwargs):
+        if not self._recording:
+            return original(self, *args, **kwargs)
+        line = _encode_record([method, list(args), kwargs])
+        self._recording = False
+        try:
+            result = original(self, *args, **kwargs)
+        finally:
+            self._recording = True
+        self._record(line)
+        return result
+    journaled.__name__ = method
+    journaled.__doc__ = original.__doc__
+    return journaled
+
+
+for _method in JOURNALED_METHODS:
+    setattr(JournaledGraph, _method, _journaled(_method))
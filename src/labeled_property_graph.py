@@ -16,15 +16,29 @@ Implementation of a labeled property graph.
 
 # ===================================
 
+import sys
+
+from .profiling import Profiler
+from .stats import GraphStats, sample_nodes
+
+_MISSING = object()
+
 
 class Node:
     """Node object that will have a relationship to other nodes."""
 
-    def __init__(self, name):
-        """Initialized nodes contain properties and methods to view them."""
+    def __init__(self, name, owner=None):
+        """
+        Initialized nodes contain properties and methods to view them.
+
+        owner is the graph holding the node. Label and property changes
+        made through the node's methods go through the graph's methods,
+        so its indexes, change feeds and journal see them.
+        """
         self.name = name
         self.properties = {}
         self.labels = []
+        self._owner = owner
 
     def __getitem__(self, key):
         """Get node properties."""
@@ -32,6 +46,8 @@ class Node:
 
     def add_property(self, property_, value):
         """Method to add a property to a node."""
+        if self._owner is not None:
+            return self._owner.add_node_prop(self.name, property_, value)
         if property_ in self.properties:
             raise KeyError("Property already exists, use change_property()"
                            "to alter property value")
@@ -39,6 +55,8 @@ class Node:
 
     def change_property(self, property_, value):
         """Method to alter a value on a property."""
+        if self._owner is not None:
+            return self._owner.change_node_prop(self.name, property_, value)
         if property_ not in self.properties:
             raise AttributeError("Property does not exist, use add_property()"
                                  "to add a property")
@@ -46,18 +64,24 @@ class Node:
 
     def remove_property(self, property_):
         """Method to remove a property from a node."""
+        if self._owner is not None:
+            return self._owner.remove_node_prop(self.name, property_)
         if property_ not in self.properties:
             raise AttributeError("Node does not contain that property")
         del self.properties[property_]
 
     def add_label(self, label):
         """Adds a label to the node."""
+        if self._owner is not None:
+            return self._owner.add_node_label(self.name, label)
         if label in self.labels:
             raise ValueError('Label already set on node.')
         self.labels.append(label)
 
     def remove_label(self, label):
         """Removes a label from a node."""
+        if self._owner is not None:
+            return self._owner.remove_node_label(self.name, label)
         self.labels.remove(label)
 
     def __repr__(self):
@@ -119,10 +143,38 @@ class LabeledPropertyGraph:
     """Define a labeled property graph as dictionary composition."""
 
     def __init__(self):
-        """Initialize the graph as a dictionary."""
+        """
+        Initialize the graph as a dictionary.
+
+        _incoming mirrors _graph with the keys swapped, so
+        _incoming[b][a] is the same list object as _graph[a][b].
+
+        _labels maps each node label to the set of nodes carrying it, and
+        _indexes maps each indexed node property to {value: set of nodes}.
+
+        _version counts every mutation of the graph and _node_versions
+        counts the mutations touching each node, so cached reads can tell
+        whether they are stale.
+
+        _ids gives every node a dense integer id and _names maps ids back
+        to names (None once a node is removed). The name stored in the
+        table is the node's canonical name: every dict key naming the node
+        is that one string object, however many copies callers pass in.
+
+        _feeds holds the ChangeFeeds attached to the graph, which are told
+        about every change through _emit.
+        """
+        self._ids = {}
+        self._names = []
         self._graph = {}
+        self._incoming = {}
         self._nodes = {}
         self._relationships = {}
+        self._labels = {}
+        self._indexes = {}
+        self._version = 0
+        self._node_versions = {}
+        self._feeds = []
 
     def __getitem__(self, key):
         """Return _graphat key."""
@@ -140,26 +192,65 @@ class LabeledPropertyGraph:
 
     def add_node(self, name):
         """Add a node and pass the name to the node.name."""
-        if name in self.nodes():
+        if name in self._nodes:
             raise KeyError('Node already exists in graph')
-        node = Node(name)
+        node = Node(name, owner=self)
+        self._ids[name] = len(self._names)
+        self._names.append(name)
         self._graph[name] = {}
+        self._incoming[name] = {}
         self._nodes[name] = node
+        self._touch(name)
+        self._emit('add_node', name)
+
+    def node_id(self, name):
+        """Return the integer id of a node."""
+        return self._ids[name]
+
+    def node_name(self, node_id):
+        """Return the name of the node with a given integer id."""
+        name = self._names[node_id]
+        if name is None:
+            raise KeyError(node_id)
+        return name
+
+    def _intern(self, name):
+        """Return the canonical name object of a node."""
+        return self._names[self._ids[name]]
+
+    def _link(self, node_a, node_b):
+        """Return the list of relationships from node_a to node_b.
+
+        The list is created, and shared with _incoming, if the nodes were
+        not linked yet.
+        """
+        try:
+            return self._graph[node_a][node_b]
+        except KeyError:
+            rels = self._graph[node_a][node_b] = []
+            self._incoming[node_b][node_a] = rels
+            return rels
 
     def add_relationship(self, name, node_a, node_b, both_ways=False):
         """Refactored add_relationship for EAFP."""
         if node_a == node_b:
             raise ValueError("Node should not have a relationship with itself.")
-        nodes = self.nodes()
-        if node_a not in nodes or node_b not in nodes:
+        if node_a not in self._nodes or node_b not in self._nodes:
             raise KeyError('A node is not present in this graph')
+        node_a, node_b = self._intern(node_a), self._intern(node_b)
+
+        pairs = [(node_a, node_b)]
+        if both_ways:
+            pairs.append((node_b, node_a))
+        #  Check every direction first, so a failure adds nothing.
+        for a, b in pairs:
+            if b in self._relationships.get(name, {}).get(a, ()):
+                raise ValueError('{} -> {} relationship'
+                                 'already exists'.format(a, b))
 
         def add(rel, a, b):
             """Local function to perform operation."""
             try:
-                if self._relationships[rel][a].get(b):
-                    raise ValueError('{} -> {} relationship'
-                                     'already exists'.format(a, b))
                 self._relationships[rel][a][b] = Relationship(rel)
             except KeyError as key_errors:
                 key = key_errors.args[0]
@@ -169,38 +260,57 @@ class LabeledPropertyGraph:
                 elif key == a:
                     self._relationships[rel][a] = {
                         b: Relationship(rel)}
-            try:
-                self._graph[a][b].append(rel)
-            except KeyError:
-                self._graph[a][b] = [rel]
+            self._link(a, b).append(rel)
+            self._emit('add_relationship', a, b, rel)
 
-        add(name, node_a, node_b)
-        if both_ways:
-            add(name, node_b, node_a)
+        for a, b in pairs:
+            add(name, a, b)
+        self._touch(node_a, node_b)
 
     def remove_relationship(self, name, node_a, node_b):
-        """Remove a relationship between two nodes."""
-        del self._relationships[name][node_a][node_b]
+        """Remove a relationship between two nodes.
+
+        The nodes stay neighbors, with no relationship between them.
+        """
+        targets = self._relationships[name][node_a]
+        del targets[node_b]
+        if not targets:
+            del self._relationships[name][node_a]
         self._graph[node_a][node_b].remove(name)
+        self._touch(node_a, node_b)
+        self._emit('remove_relationship', node_a, node_b, name)
 
     def remove_node(self, name):
         """Remove a node and all of its relationships."""
-        for relationship in self._relationships:
-            for node in self._relationships[relationship]:
-                try:
-                    del self._relationships[relationship][node][name]
-                except KeyError:
-                    continue
-            try:
-                del self._relationships[relationship][name]
-            except KeyError:
-                continue
-        del self._graph[name]
-        for node in self._graph:
-            try:
-                del self._graph[node][name]
-            except KeyError:
-                continue
+        node = self._nodes.pop(name)
+        self._names[self._ids.pop(name)] = None
+        sources = self._incoming.pop(name)
+        targets = self._graph.pop(name)
+        for source, rels in sources.items():
+            for rel in rels:
+                linked = self._relationships[rel][source]
+                del linked[name]
+                if not linked:
+                    del self._relationships[rel][source]
+            del self._graph[source][name]
+        for target in targets:
+            del self._incoming[target][name]
+        for relationship in self._relationships.values():
+            relationship.pop(name, None)
+        node._owner = None
+        for label in node.labels:
+            self._labels[label].discard(name)
+        for key, value in node.properties.items():
+            self._property_changed(name, key, old=value)
+        self._touch(name, *set(sources).union(targets))
+        if self._feeds:
+            for target, rels in targets.items():
+                for rel in rels:
+                    self._emit('remove_relationship', name, target, rel)
+            for source, rels in sources.items():
+                for rel in rels:
+                    self._emit('remove_relationship', source, name, rel)
+        self._emit('remove_node', name)
 
     def get_relationships(self, node_a, node_b):
         """Return all relationships between two nodes."""
@@ -216,8 +326,7 @@ class LabeledPropertyGraph:
 
     def is_neighbor_to(self, node):
         """Return node that node is a neighbor to, but not vice versa."""
-        return [vertex for vertex, rels in self._graph.items()
-                if node in rels]
+        return list(self._incoming[node].keys())
 
     def get_relationship_properties(self, name, node_a, node_b):
         """Return properties of a relationship between two nodes."""
@@ -241,28 +350,244 @@ class LabeledPropertyGraph:
                 and relationship in self._graph[node_b][node_a]
         return relationship in self._graph[node_a][node_b]
 
+    def add_node_prop(self, node, property_, value):
+        """Add a property to a node."""
+        node = self._nodes[node]
+        if property_ in node.properties:
+            raise KeyError("Property already exists, use change_property()"
+                           "to alter property value")
+        self._check_indexable(property_, value)
+        node.properties[property_] = value
+        self._property_changed(node.name, property_, value=value)
+
     def change_node_prop(self, node, property_, value):
         """Change the property of a node."""
-        self._nodes[node].change_property(property_, value)
+        node = self._nodes[node]
+        if property_ not in node.properties:
+            raise AttributeError("Property does not exist, use add_property()"
+                                 "to add a property")
+        self._check_indexable(property_, value)
+        old = node.properties[property_]
+        node.properties[property_] = value
+        self._property_changed(node.name, property_, old, value)
 
     def change_rel_prop(self, rel, node_a, node_b, prop, val):
         """Change the property of a relationship."""
         self._relationships[rel][node_a][node_b].change_property(prop, val)
+        self._touch(node_a, node_b)
+        self._emit('set_relationship_property', node_a, node_b, rel, prop,
+                   val)
+
+    def extend_rel_prop(self, rel, node_a, node_b, prop, *values):
+        """Append to a list, NumericSeries or EventLog rel property.
+
+        values are passed to the property's extend(): a sequence of values,
+        or times and values for an EventLog. Unlike growing the value and
+        setting it again, only the values added are journaled.
+        """
+        value = self._relationships[rel][node_a][node_b].properties[prop]
+        value.extend(*values)
+        self._touch(node_a, node_b)
+        self._emit('set_relationship_property', node_a, node_b, rel, prop,
+                   value)
 
     def remove_node_prop(self, node, property_):
         """Remove node property."""
-        self._nodes[node].remove_property(property_)
+        node = self._nodes[node]
+        if property_ not in node.properties:
+            raise AttributeError("Node does not contain that property")
+        old = node.properties.pop(property_)
+        self._property_changed(node.name, property_, old=old)
 
     def remove_rel_prop(self, rel, node_a, node_b, prop):
         """Remove rel property."""
         self._relationships[rel][node_a][node_b].remove_property(prop)
+        self._touch(node_a, node_b)
+        self._emit('remove_relationship_property', node_a, node_b, rel, prop)
 
     def add_node_props(self, node, **kwargs):
-        """Add properties to a node with values."""
+        """Add properties to a node with values.
+
+        Every property is checked first, so a failure adds none of them.
+        """
+        properties = self._nodes[node].properties
         for key, value in kwargs.items():
-            self._nodes[node].add_property(key, value)
+            if key in properties:
+                raise KeyError("Property already exists, use "
+                               "change_property() to alter property value")
+            self._check_indexable(key, value)
+        for key, value in kwargs.items():
+            self.add_node_prop(node, key, value)
 
     def add_rel_props(self, rel, node_a, node_b, **kwargs):
-        """Add relationship props with values."""
+        """Add relationship props with values.
+
+        Every property is checked first, so a failure adds none of them.
+        """
+        relationship = self._relationships[rel][node_a][node_b]
+        for key in kwargs:
+            if key in relationship.properties:
+                raise KeyError("Property already exists, use "
+                               "change_property() to alter property value")
         for key, value in kwargs.items():
-            self._relationships[rel][node_a][node_b].add_property(key, value)
+            relationship.add_property(key, value)
+            self._emit('set_relationship_property', node_a, node_b, rel,
+                       key, value)
+        self._touch(node_a, node_b)
+
+    def add_node_label(self, node, label):
+        """Add a label to a node."""
+        node = self._nodes[node]
+        if label in node.labels:
+            raise ValueError('Label already set on node.')
+        node.labels.append(label)
+        self._label_changed(node.name, label, added=True)
+
+    def remove_node_label(self, node, label):
+        """Remove a label from a node."""
+        node = self._nodes[node]
+        node.labels.remove(label)
+        self._label_changed(node.name, label, added=False)
+
+    def nodes_with_label(self, label):
+        """Return all nodes carrying a label."""
+        return list(self._labels.get(label, ()))
+
+    def create_index(self, property_):
+        """Index the nodes by the value of a node property.
+
+        Raises TypeError, leaving the property unindexed, if a node holds
+        an unhashable value for it.
+        """
+        index = {}
+        for name, node in self._nodes.items():
+            if property_ in node.properties:
+                index.setdefault(node.properties[property_], set()).add(name)
+        self._indexes[property_] = index
+
+    def drop_index(self, property_):
+        """Stop indexing a node property."""
+        del self._indexes[property_]
+
+    def nodes_with_property(self, property_, value):
+        """Return all nodes whose property equals value.
+
+        Uses the property index when there is one, otherwise scans the
+        nodes.
+        """
+        if property_ in self._indexes:
+            return list(self._indexes[property_].get(value, ()))
+        return [name for name, node in self._nodes.items()
+                if property_ in node.properties
+                and node.properties[property_] == value]
+
+    def stats(self, sample=None, seed=0):
+        """
+        Return counts, degrees, property cardinalities and memory use.
+
+        Walks the graph once, or only sample random nodes of it if given.
+        See src/stats.py for what the report holds.
+        """
+        names = sample_nodes(self._nodes, sample, seed)
+        stats = GraphStats(len(self._nodes), len(names))
+        for structure in ('_graph', '_incoming', '_nodes', '_relationships',
+                          '_ids', '_names', '_node_versions', '_labels',
+                          '_indexes'):
+            stats.add_fixed_memory(structure,
+                                   sys.getsizeof(getattr(self, structure)))
+        for sources in self._relationships.values():
+            stats.add_fixed_memory('_relationships', sys.getsizeof(sources))
+        for nodes in self._labels.values():
+            stats.add_fixed_memory('_labels', sys.getsizeof(nodes))
+        for name in names:
+            node = self._nodes[name]
+            targets = self._graph[name]
+            sources = self._incoming[name]
+            stats.node(sum(len(rels) for rels in targets.values()),
+                       sum(len(rels) for rels in sources.values()),
+                       node.labels, node.properties)
+            stats.add_memory('_graph', sys.getsizeof(targets) + sum(
+                sys.getsizeof(rels) for rels in targets.values()))
+            stats.add_memory('_incoming', sys.getsizeof(sources))
+            stats.add_memory('_nodes', sys.getsizeof(node) +
+                             sys.getsizeof(vars(node)) + sys.getsizeof(name) +
+                             sys.getsizeof(node.labels))
+            for rel in set(rel for rels in targets.values() for rel in rels):
+                stats.add_memory('_relationships',
+                                 sys.getsizeof(self._relationships[rel][name]))
+            for target, rels in targets.items():
+                for rel in rels:
+                    relationship = self._relationships[rel][name][target]
+                    stats.edge(rel, relationship.properties)
+                    stats.add_memory('_relationships',
+                                     sys.getsizeof(relationship) +
+                                     sys.getsizeof(vars(relationship)) +
+                                     sys.getsizeof(relationship.labels))
+        return stats.report()
+
+    def profile(self, methods=None):
+        """
+        Start counting calls to methods, or all public methods.
+
+        Returns the enabled Profiler; see src/profiling.py.
+        """
+        return Profiler(self, methods).enable()
+
+    def _touch(self, *names):
+        """Record a mutation of the graph involving the given nodes."""
+        self._version += 1
+        for name in names:
+            self._node_versions[name] = self._node_versions.get(name, 0) + 1
+
+    def _emit(self, kind, node, other=None, name=None, key=None,
+              value=None):
+        """Report a change to the attached change feeds."""
+        for feed in self._feeds:
+            feed._record(kind, node, other, name, key, value)
+
+    def _label_changed(self, name, label, added):
+        """Update the label index after a node label change."""
+        if added:
+            self._labels.setdefault(label, set()).add(name)
+        else:
+            self._labels[label].discard(name)
+        self._touch(name)
+        self._emit('add_node_label' if added else 'remove_node_label', name,
+                   key=label)
+
+    def _check_indexable(self, property_, value):
+        """Raise TypeError if value cannot be put in property_'s index."""
+        if property_ in self._indexes:
+            try:
+                hash(value)
+            except TypeError:
+                raise TypeError('Indexed property {} needs a hashable value, '
+                                'got {!r}'.format(property_, value))
+
+    def _property_changed(self, name, property_, old=_MISSING,
+                          value=_MISSING):
+        """Update indexes and versions after a node property change.
+
+        Moves the node between the buckets of the property's index, if the
+        property is indexed. Changes to a node that was removed from the
+        graph, such as the cleanup done by remove_node, are not reported to
+        the change feeds.
+        """
+        self._touch(name)
+        if name in self._nodes:
+            if value is _MISSING:
+                self._emit('remove_node_property', name, key=property_)
+            else:
+                self._emit('set_node_property', name, key=property_,
+                           value=value)
+        index = self._indexes.get(property_)
+        if index is None:
+            return
+        if old is not _MISSING:
+            bucket = index.get(old)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del index[old]
+        if value is not _MISSING:
+            index.setdefault(value, set()).add(name)
@@ -0,0 +1,154 @@
+"""
+Force-directed layout computed ahead of time with numpy.
+
+docs/phone_graph.js used to run a d3 force simulation over every node on
+each page load, which jitters and gets slow on the mega graph. layout()
+runs a Fruchterman-Reingold style simulation here instead and returns
+final positions, which write_d3(positions=...) stores as x and y on the
+nodes; the viewer then draws them as they are:
+
+    >>> positions = layout(lpg)
+    >>> write_d3(lpg, 'docs/mega_phone_graph.json', positions=positions,
+    ...          js_variable='mega_phone_graph')
+
+Every step pulls the ends of each relationship together with a force of
+d ** 2 / k and pushes every pair of nodes apart with k ** 2 / d, where k
+is the ideal edge length. The repulsion between all pairs is approximated
+on a grid, particle-mesh style: the nodes are spread over the grid points
+around them (cloud in cell), the density is convolved with the k ** 2 / d
+kernel by FFT and the resulting force is read back at every node the same
+way. A step costs O(nodes + edges + grid ** 2 log grid) instead of
+O(nodes ** 2); grid sets how finely close nodes are told apart.
+"""
+import numpy as np
+
+
+def edge_index(graph):
+    """
+    Return the node names of graph and its edges as index arrays.
+
+    Every pair of neighbors gives one edge, whatever the number or the
+    direction of the relationships between them.
+    """
+    names = graph.nodes()
+    index = {name: position for position, name in enumerate(names)}
+    sources, targets = [], []
+    for name in names:
+        source = index[name]
+        for neighbor in graph.get_neighbors(name):
+            sources.append(source)
+            targets.append(index[neighbor])
+    sources = np.array(sources, dtype='i8')
+    targets = np.array(targets, dtype='i8')
+    pairs = np.unique(np.minimum(sources, targets) * len(names) +
+                      np.maximum(sources, targets))
+    return (names,) + np.divmod(pairs, max(len(names), 1))
+
+
+def _unit_kernel(grid):
+    """Return the FFTs of the x and y repulsion kernels, one cell apart."""
+    size = 2 * grid
+    offsets = np.fft.fftfreq(size, 1. / size)
+    x, y = np.meshgrid(offsets, offsets, indexing='ij')
+    square = x ** 2 + y ** 2
+    square[0, 0] = np.inf
+    return np.fft.rfft2(x / square), np.fft.rfft2(y / square)
+
+
+def _cloud_in_cell(positions, grid):
+    """Return the cells, weights and cell size spreading nodes on a grid."""
+    low = positions.min(axis=0)
+    cell = max((positions.max(axis=0) - low).max() / (grid - 1), 1e-9)
+    scaled = (positions - low) / cell
+    base = np.clip(np.floor(scaled).astype('i8'), 0, grid - 2)
+    fraction = scaled - base
+    corners = []
+    for dx in (0, 1):
+        for dy in (0, 1):
+            weight = (fraction[:, 0] if dx else 1 - fraction[:, 0]) * \
+                (fraction[:, 1] if dy else 1 - fraction[:, 1])
+            corners.append(((base[:, 0] + dx) * grid + base[:, 1] + dy,
+                            weight))
+    return corners, cell
+
+
+def repulsion(positions, k, grid=64, kernel=None):
+    """Return the approximate repulsion on every node, by particle mesh."""
+    kernel_x, kernel_y = _unit_kernel(grid) if kernel is None else kernel
+    corners, cell = _cloud_in_cell(positions, grid)
+    density = np.zeros((2 * grid, 2 * grid))
+    mass = np.zeros(grid * grid)
+    for cells, weight in corners:
+        mass += np.bincount(cells, weight, grid * grid)
+    density[:grid, :grid] = mass.reshape(grid, grid)
+    spectrum = np.fft.rfft2(density)
+    scale = k * k / cell
+    fields = [np.fft.irfft2(spectrum * kernel_part, density.shape)[
+        :grid, :grid].ravel() * scale for kernel_part in (kernel_x, kernel_y)]
+    force = np.zeros_like(positions)
+    for cells, weight in corners:
+        force[:, 0] += fields[0][cells] * weight
+        force[:, 1] += fields[1][cells] * weight
+    return force
+
+
+def attraction(positions, sources, targets, k):
+    """Return the pull of the edges on every node."""
+    delta = positions[targets] - positions[sources]
+    pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+    force = np.zeros_like(positions)
+    count = len(positions)
+    for axis in (0, 1):
+        force[:, axis] = np.bincount(sources, pull[:, axis], count) - \
+            np.bincount(targets, pull[:, axis], count)
+    return force
+
+
+def force_layout(count, sources, targets, iterations=100, grid=64,
+                 gravity=0.05, seed=0, positions=None):
+    """
+    Return an array of the (x, y) positions of count nodes.
+
+    Nodes start at positions, or at random in the unit square, and every
+    iteration moves each one along its net force by at most a temperature
+    cooling from 0.1 to 0. gravity pulls every node towards the center so
+    unconnected parts of the graph stay in sight.
+    """
+    if positions is None:
+        positions = np.random.RandomState(seed).random_sample((count, 2))
+    else:
+        positions = np.array(positions, dtype='f8')
+    if count < 2:
+        return positions
+    k = 1. / np.sqrt(count)
+    kernel = _unit_kernel(grid)
+    for temperature in np.linspace(0.1, 0., iterations, endpoint=False):
+        center = positions.mean(axis=0)
+        force = repulsion(positions, k, grid, kernel) + \
+            attraction(positions, sources, targets, k) + \
+            gravity * (center - positions) * np.sqrt(count)
+        length = np.maximum(np.hypot(force[:, 0], force[:, 1]), 1e-12)
+        positions += force * (np.minimum(length, temperature) /
+                              length)[:, None]
+    return positions
+
+
+def fit(positions, width, height, margin=20):
+    """Return positions scaled and centered into a width x height box."""
+    if not len(positions):
+        return positions
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    span = np.maximum(high - low, 1e-9)
+    scale = min((width - 2 * margin) / span[0],
+                (height - 2 * margin) / span[1])
+    offset = (np.array([width, height]) - span * scale) / 2
+    return (positions - low) * scale + offset
+
+
+def layout(graph, width=960, height=500, iterations=100, grid=64, seed=0):
+    """Return {node: (x, y)} laying graph out in a width x height box."""
+    names, sources, targets = edge_index(graph)
+    positions = fit(force_layout(len(names), sources, targets, iterations,
+                                 grid, seed=seed), width, height)
+    return {name: (float(x), float(y))
+            for name, (x, y) in zip(names, positions.tolist())}
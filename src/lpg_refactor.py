@@ -19,6 +19,11 @@ for simplicity. Particularly:
         - Make it so that nodes can be added from iterables
         - Make it so relationships can be added from iterables
 """
+import sys
+
+from .profiling import Profiler
+from .stats import GraphStats, sample_nodes
+
 #  TODO: Just realized I forgot that the tuple keys will have to return a list
 #  of relationships. This is a major issue affecting this refactor.
 
@@ -142,21 +147,103 @@ Properties (key: value)
                                                                     len(self.properties))
 
 
+#  Node ids are packed two to an int64 key: the source id in the high 32 bits
+#  and the target id in the low 32 bits.
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class Relationships(dict):
+    """The relationships between one pair of nodes, keyed by name.
+
+    Adding or deleting a relationship through any of the dict's mutating
+    methods keeps the owning graph's relationship type index current.
+    """
+
+    __slots__ = ('_graph', '_key')
+
+    def __init__(self, graph, key):
+        """Initialize an empty dict for the packed pair key in graph."""
+        dict.__init__(self)
+        self._graph = graph
+        self._key = key
+
+    def __setitem__(self, key, item):
+        """Add or replace a relationship."""
+        dict.__setitem__(self, key, item)
+        self._graph._types.setdefault(key, {})[self._key] = None
+
+    def __delitem__(self, key):
+        """Remove a relationship."""
+        dict.__delitem__(self, key)
+        self._graph._unindex_type(key, self._key)
+
+    def pop(self, key, *default):
+        """Remove a relationship and return it."""
+        if key in self:
+            self._graph._unindex_type(key, self._key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        """Remove the last relationship added and return (key, item)."""
+        key, item = dict.popitem(self)
+        self._graph._unindex_type(key, self._key)
+        return key, item
+
+    def clear(self):
+        """Remove every relationship between the pair."""
+        for key in self:
+            self._graph._unindex_type(key, self._key)
+        dict.clear(self)
+
+    def setdefault(self, key, default=None):
+        """Return a relationship, adding default first if it is missing."""
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        """Add or replace several relationships."""
+        for key, item in dict(*args, **kwargs).items():
+            self[key] = item
+
+    def __ior__(self, other):
+        """Add or replace the relationships of other, as update does."""
+        self.update(other)
+        return self
+
+
 class LabeledPropertyGraph:
     """Define a labeled property graph as dictionary composition."""
 
     def __init__(self):
         """
         Initialize the graph as a dictionary (well, several).
-        Right now, _graph maps the nodes and relationships. It does not
-        contain node objects.
 
-        _nodes contains the actual node objects.
+        Names are only used at the edges of the API. add_node gives every
+        node a dense integer id: _ids maps names to ids and _names maps ids
+        back to names (None once a node is deleted).
+
+        _nodes contains the actual node objects, keyed by name.
+
+        _relationships contains the actual relationship objects, keyed by
+        the (node_a, node_b) id pair packed into a single int.
 
-        _relationships contains the actual relationship objects.
+        _outgoing and _incoming are indexed by node id and hold the ids of
+        the nodes it has relationships to and from. They are dicts with
+        None values, used as insertion ordered sets.
+
+        _types maps each relationship name to the packed pairs holding such
+        a relationship, again as an insertion ordered set. Names with no
+        relationships left are dropped.
         """
+        self._ids = {}
+        self._names = []
         self._nodes = {}
         self._relationships = {}
+        self._outgoing = []
+        self._incoming = []
+        self._types = {}
 
     def __getitem__(self, key):
         """
@@ -167,7 +254,7 @@ class LabeledPropertyGraph:
         set of subscripts.
         """
         if isinstance(key, tuple):
-            return self._relationships[key]
+            return self._links(*key)
         return self._nodes[key]
 
     # def __setitem__(self, key, item):
@@ -187,91 +274,221 @@ class LabeledPropertyGraph:
 
     def __delitem__(self, key):
         """Delete node or relationship from graph."""
+        #  Look everything up first, so a missing key changes nothing.
         try:
             if isinstance(key, tuple):
-                del self._relationships[key]
+                pair = self._links(*key)._key
             else:
-                del self._nodes[key]
-                for keys in list(self._relationships.keys()):
-                    if key in keys:
-                        del self._relationships[keys]
+                node_id = self._ids[key]
         except KeyError as error:
             err = "Relationship" if isinstance(error.args[0], tuple) else "Node"
             raise KeyError("{} {} not in graph".format(err, error.args[0]))
+        if isinstance(key, tuple):
+            self._drop_pair(pair)
+            return
+        for target in list(self._outgoing[node_id]):
+            self._drop_pair(node_id << _ID_BITS | target)
+        for source in list(self._incoming[node_id]):
+            self._drop_pair(source << _ID_BITS | node_id)
+        del self._nodes[key]
+        del self._ids[key]
+        self._outgoing[node_id] = self._incoming[node_id] = None
+        self._names[node_id] = None
 
     @property
     def nodes(self):
         """Return a list of nodes in the graph."""
         return [node for node in self._nodes.keys()]
 
+    def node_id(self, name):
+        """Return the integer id of a node."""
+        return self._ids[name]
+
+    def node_name(self, node_id):
+        """Return the name of the node with a given integer id."""
+        name = self._names[node_id]
+        if name is None:
+            raise KeyError(node_id)
+        return name
+
+    def _pair_key(self, node_a, node_b):
+        """Return the packed int key of the pair of node names."""
+        try:
+            return self._ids[node_a] << _ID_BITS | self._ids[node_b]
+        except KeyError:
+            raise KeyError((node_a, node_b))
+
+    def _pair_names(self, key):
+        """Return the (node_a, node_b) names of a packed pair key."""
+        return self._names[key >> _ID_BITS], self._names[key & _ID_MASK]
+
+    def _links(self, node_a, node_b):
+        """Return the relationships from node_a to node_b."""
+        try:
+            return self._relationships[self._pair_key(node_a, node_b)]
+        except KeyError:
+            raise KeyError((node_a, node_b))
+
+    def _drop_pair(self, key):
+        """Delete every relationship of a packed pair key."""
+        links = self._relationships.pop(key)
+        for rel in links:
+            self._unindex_type(rel, key)
+        del self._outgoing[key >> _ID_BITS][key & _ID_MASK]
+        del self._incoming[key & _ID_MASK][key >> _ID_BITS]
+
+    def _unindex_type(self, name, key):
+        """Remove a pair from the relationship type index."""
+        pairs = self._types[name]
+        del pairs[key]
+        if not pairs:
+            del self._types[name]
+
     @property
     def relationships(self):
         """Return list of unique relationships."""
-        edges = []
-        for edge in self._relationships.values():
-            for key in edge.keys():
-                if key not in edges:
-                    edges.append(key)
-        return edges
+        return list(self._types)
 
     def unique_relationships(self):
         """Return a list of unique relationship names."""
-        return set([key for link in self._relationships.values() for key in link.keys()])
+        return set(self._types)
+
+    def relationship_count(self, name):
+        """Return the number of relationships with a given name."""
+        return len(self._types.get(name, ()))
+
+    def edges_of_type(self, name):
+        """Generate (node_a, node_b, relationship) for a relationship name."""
+        for key in list(self._types.get(name, ())):
+            node_a, node_b = self._pair_names(key)
+            yield node_a, node_b, self._relationships[key][name]
 
     def add_node(self, name):
         """Add a node and pass the name to the node.name."""
-        if name in self.nodes:
+        if name in self._nodes:
             raise KeyError('Node already exists in graph')
         node = Node(name)
         self._nodes[name] = node
+        self._ids[name] = len(self._names)
+        self._names.append(name)
+        self._outgoing.append({})
+        self._incoming.append({})
 
     def add_relationship(self, node_a, node_b, name, both_ways=False):
         """Refactored add_relationship for EAFP."""
         if node_a == node_b:
             raise ValueError("Node should not have a relationship with itself.")
-        nodes = self.nodes
-        if node_a not in nodes or node_b not in nodes:
+        if node_a not in self._nodes or node_b not in self._nodes:
             raise KeyError('A node is not present in this graph')
 
         def add(a, b, rel):
             """Local function to perform operation."""
+            key = a << _ID_BITS | b
             try:
-                if self._relationships[a, b].get((rel)):
+                if self._relationships[key].get((rel)):
                     raise ValueError('{} -> {} relationship'
-                                     'already exists'.format(a, b))
+                                     'already exists'.format(
+                                         *self._pair_names(key)))
                 else:
-                    self._relationships[a, b][rel] = Relationship(rel)
+                    self._relationships[key][rel] = Relationship(rel)
             except KeyError:
-                self._relationships[a, b] = {rel: Relationship(rel)}
-        add(node_a, node_b, name)
+                self._relationships[key] = Relationships(self, key)
+                self._relationships[key][rel] = Relationship(rel)
+                self._outgoing[a][b] = None
+                self._incoming[b][a] = None
+        id_a, id_b = self._ids[node_a], self._ids[node_b]
+        add(id_a, id_b, name)
         if both_ways:
-            add(node_b, node_a, name)
+            add(id_b, id_a, name)
 
     def get_relationships(self, node_a, node_b):
         """Return all relationships between two nodes."""
-        return list(self._relationships[node_a, node_b].keys())
+        return list(self._links(node_a, node_b).keys())
 
     def nodes_with_relationship(self, name):
         """Return a list of nodes with a given relationship."""
-        nodes = set()
-        for key, value in self._relationships.items():
-            if name in value:
-                nodes.add(key[0])
-                nodes.add(key[1])
-        return list(nodes)
+        ids = set()
+        for key in self._types.get(name, ()):
+            ids.add(key >> _ID_BITS)
+            ids.add(key & _ID_MASK)
+        return [self._names[node_id] for node_id in ids]
 
     def neighbors(self, node):
         """Return all nodes node has relationship with."""
-        return [key[1] for key in self._relationships.keys() if node == key[0]]
+        if node not in self._ids:
+            return []
+        return [self._names[target]
+                for target in self._outgoing[self._ids[node]]]
+
+    def predecessors(self, node):
+        """Return all nodes that have a relationship with node."""
+        if node not in self._ids:
+            return []
+        return [self._names[source]
+                for source in self._incoming[self._ids[node]]]
 
     def adjacent(self, node_a, node_b):
         """Return whether a node has a certain neighbor."""
-        return (node_a, node_b) in self._relationships.keys()
+        try:
+            return self._pair_key(node_a, node_b) in self._relationships
+        except KeyError:
+            return False
 
     def has_relationship(self, node_a, node_b, relationship, both_ways=False):
         """Returns boolean if nodes have a particular relationship."""
         if both_ways:
-            return relationship in self._relationships[node_a, node_b] \
-                and relationship in self._relationships[node_b, node_a]
+            return relationship in self._links(node_a, node_b) \
+                and relationship in self._links(node_b, node_a)
         else:
-            return relationship in self._relationships[node_a,  node_b]
+            return relationship in self._links(node_a,  node_b)
+
+    def stats(self, sample=None, seed=0):
+        """
+        Return counts, degrees, property cardinalities and memory use.
+
+        Walks the graph once, or only sample random nodes of it if given.
+        See src/stats.py for what the report holds.
+        """
+        names = sample_nodes(self._nodes, sample, seed)
+        stats = GraphStats(len(self._nodes), len(names))
+        for structure in ('_nodes', '_relationships', '_outgoing',
+                          '_incoming', '_types', '_ids', '_names'):
+            stats.add_fixed_memory(structure,
+                                   sys.getsizeof(getattr(self, structure)))
+        for pairs in self._types.values():
+            stats.add_fixed_memory('_types', sys.getsizeof(pairs))
+        for name in names:
+            node_id = self._ids[name]
+            node = self._nodes[name]
+            targets = self._outgoing[node_id]
+            sources = self._incoming[node_id]
+            links = [self._relationships[node_id << _ID_BITS | target]
+                     for target in targets]
+            stats.node(sum(len(rels) for rels in links),
+                       sum(len(self._relationships[source << _ID_BITS |
+                                                   node_id])
+                           for source in sources),
+                       node.labels, node._properties)
+            stats.add_memory('_outgoing', sys.getsizeof(targets))
+            stats.add_memory('_incoming', sys.getsizeof(sources))
+            stats.add_memory('_nodes', sys.getsizeof(node) +
+                             sys.getsizeof(vars(node)) + sys.getsizeof(name) +
+                             sys.getsizeof(node.labels))
+            for rels in links:
+                stats.add_memory('_relationships', sys.getsizeof(rels) +
+                                 sys.getsizeof(rels._key))
+                for rel, relationship in rels.items():
+                    stats.edge(rel, relationship._properties)
+                    stats.add_memory('_relationships',
+                                     sys.getsizeof(relationship) +
+                                     sys.getsizeof(vars(relationship)) +
+                                     sys.getsizeof(relationship.labels))
+        return stats.report()
+
+    def profile(self, methods=None):
+        """
+        Start counting calls to methods, or all public methods.
+
+        Returns the enabled Profiler; see src/profiling.py.
+        """
+        return Profiler(self, methods).enable()
@@ -0,0 +1,115 @@
+"""
+Cleaning of parsed bills and contacts, as done in the notebook.
+
+parse_bill() returns, for every line on a bill, a dict of sections
+('Talk', 'Text', 'Data') holding the columns of the section as lists.
+normalize_bill() keeps the Talk and Text sections, drops the records
+whose number is not a phone number (or, for texts, whose destination is
+not a place), writes the numbers as (205) 263-1951 and the minutes of
+the calls as floats. join_contacts() then replaces the numbers of known
+contacts with their names, read from a vCard file by read_vcard():
+
+    >>> contacts = read_vcard('Contacts.vcf')
+    >>> bills = [join_contacts(normalize_bill(bill), contacts)
+    ...          for bill in parse_bill(path)]
+
+The results are still bill dicts, ready for Ingestor.add().
+"""
+import re
+
+
+#  Area codes never begin with 1, so a leading 1 is the country code.
+PHONE = re.compile(r'1?(-|\s|\.)?(\d{3}|\(\d{3}\))(-|\s|\.)?\d{3}'
+                   r'(-|\s|\.)?\d{4}')
+DESTINATION = re.compile(r'([\w\s]+), (\w+)')
+DIGITS = re.compile(r'\d{10,11}')
+
+#  Section -> column that must match its pattern for a record to be kept.
+FILTERS = {'Talk': {'Number': PHONE},
+           'Text': {'Number': PHONE, 'Destination': DESTINATION}}
+MINUTES = 'Min'
+
+
+def format_phone(digits):
+    """Return 10 digits, or 11 with a leading 1, as (205) 263-1951."""
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    return '({}) {}-{}'.format(digits[:3], digits[3:6], digits[6:])
+
+
+def normalize_number(number):
+    """Return number with any run of 10 or 11 digits formatted."""
+    return DIGITS.sub(lambda match: format_phone(match.group()), number)
+
+
+def normalize_bill(bill):
+    """Return the cleaned Talk and Text sections of a line's bill dict."""
+    cleaned = {}
+    for section, patterns in FILTERS.items():
+        columns = bill.get(section)
+        if not columns:
+            continue
+        length = len(columns['Number'])
+        rows = [row for row in range(length)
+                if all(pattern.match(columns[name][row])
+                       for name, pattern in patterns.items())]
+        kept = {name: [values[row] for row in rows]
+                for name, values in columns.items() if len(values) == length}
+        kept['Number'] = [normalize_number(number)
+                          for number in kept['Number']]
+        if MINUTES in kept:
+            kept[MINUTES] = [float(value) for value in kept[MINUTES]]
+        cleaned[section] = kept
+    return cleaned
+
+
+def join_contacts(bill, contacts):
+    """Return bill with the numbers of contacts replaced by their names."""
+    joined = {}
+    for section, columns in bill.items():
+        joined[section] = dict(columns)
+        joined[section]['Number'] = [contacts.get(number, number)
+                                     for number in columns['Number']]
+    return joined
+
+
+def _card_name(field):
+    """Return 'First Last' of the structured N field 'Last;First;...'."""
+    parts = field.split(';')
+    return ' '.join(part for part in parts[1::-1] if part).strip()
+
+
+def parse_vcard(text):
+    """
+    Return {number: name} of the cell numbers of the cards in text.
+
+    Names come from the N field, or FN without one. Numbers that are not
+    10 digits, or 11 with a leading 1, are skipped.
+    """
+    contacts = {}
+    text = re.sub(r'\r?\n[ \t]', '', text)
+    for card in text.split('END:VCARD'):
+        fields = {}
+        numbers = []
+        for line in card.splitlines():
+            key, _, value = line.partition(':')
+            params = key.upper().split(';')
+            name = params[0].split('.')[-1]
+            if name == 'TEL' and 'CELL' in key.upper():
+                digits = re.sub(r'\D', '', value)
+                if len(digits) == 10 or \
+                        (len(digits) == 11 and digits[0] == '1'):
+                    numbers.append(format_phone(digits))
+            elif name in ('N', 'FN'):
+                fields[name] = value
+        name = _card_name(fields.get('N', '')) or fields.get('FN', '').strip()
+        if name:
+            for number in numbers:
+                contacts[number] = name
+    return contacts
+
+
+def read_vcard(path):
+    """Return {number: name} of the cell numbers in a vCard file."""
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        return parse_vcard(handle.read())
@@ -0,0 +1,570 @@
+"""
+Binary persistence for the labeled property graph.
+
+A saved graph is a single file laid out as:
+
+    [8 byte magic][8 byte header length][JSON header][padding][sections...]
+
+The header describes every section (dtype, byte offset and length) along
+with the small symbol tables: labels, relationship names and property
+keys. Everything large lives in 8-byte aligned NumPy arrays:
+
+    Nodes:
+        - node_names / node_name_offsets: interned string table holding the
+          JSON encoding of every node name. Node ids are assigned in sorted
+          order of these encodings, so name -> id is a binary search.
+        - node_label_offsets / node_labels: CSR list of label ids per node.
+
+    Adjacency:
+        - out_offsets: CSR offsets into the pair arrays for every source id.
+        - pair_sources / pair_targets: one row per (node_a, node_b) pair that
+          appears in _graph, sorted by source then target.
+        - pair_edge_offsets: CSR offsets into the edge arrays for every pair.
+        - edge_types: relationship name id of every edge.
+        - in_offsets / in_pairs: pair indices grouped by target id, which
+          makes is_neighbor_to O(degree).
+
+    Properties are stored column by column, one column per property key,
+    for nodes and edges separately. Integer and float columns are plain
+    arrays, lists of numbers, NumericSeries and EventLogs are ragged arrays
+    and anything else falls back to JSON encoded values.
+
+load() memory-maps the file. Nothing is decoded until it is asked for, so
+opening a large graph is close to instant and only the touched pages are
+read from disk.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+from .labeled_property_graph import LabeledPropertyGraph, Node
+from .series import NumericSeries, json_default
+from .temporal import TIME_UNIT, EventLog
+
+
+MAGIC = b'LPGRAPH\x01'
+VERSION = 1
+_HEADER = struct.Struct('<8sQ')
+_ALIGN = 8
+_default = json_default(summaries=False)
+
+
+def _encode(value):
+    """Return the canonical bytes used to intern a name or value.
+
+    A NumericSeries in a mixed column is encoded as a list of its values,
+    an EventLog as a list of [ISO 8601 time, value] pairs.
+    """
+    return json.dumps(value, default=_default).encode('utf-8')
+
+
+def _decode(raw):
+    """Inverse of _encode."""
+    return json.loads(raw.decode('utf-8'))
+
+
+def _check_json(value):
+    """Raise ValueError if json would read value back as something else.
+
+    json writes tuples as lists and dict keys as strings, so such values
+    would come back changed. Series and event logs are written as lists
+    on purpose and are not checked.
+    """
+    if isinstance(value, tuple):
+        raise ValueError('Property value {!r} does not survive '
+                         'serialization'.format(value))
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise ValueError('Property key {!r} does not survive '
+                                 'serialization'.format(key))
+            _check_json(item)
+    elif isinstance(value, list):
+        for item in value:
+            _check_json(item)
+
+
+def _is_int(value):
+    """Return whether value is a plain integer (bools excluded)."""
+    return isinstance(value, (int, np.integer)) \
+        and not isinstance(value, (bool, np.bool_))
+
+
+def _is_float(value):
+    """Return whether value is a float."""
+    return isinstance(value, (float, np.floating))
+
+
+def _string_table(values):
+    """Pack a sequence of byte strings into offsets and a uint8 blob."""
+    offsets = np.zeros(len(values) + 1, dtype='<i8')
+    if values:
+        offsets[1:] = np.cumsum([len(value) for value in values])
+    data = np.frombuffer(b''.join(values), dtype=np.uint8)
+    return offsets, data
+
+
+def _column_kind(values):
+    """Pick the narrowest storage kind able to round trip every value."""
+    if all(_is_int(value) for value in values):
+        return 'int'
+    if all(_is_float(value) for value in values):
+        return 'float'
+    if all(isinstance(value, list) for value in values):
+        items = [item for value in values for item in value]
+        if all(_is_int(item) for item in items):
+            return 'int_list'
+        if all(_is_float(item) for item in items):
+            return 'float_list'
+    if all(isinstance(value, NumericSeries) for value in values):
+        return 'series'
+    if all(isinstance(value, EventLog) for value in values):
+        return 'events'
+    return 'json'
+
+
+def _build_column(rows, values):
+    """Return (kind, {suffix: array}) for one property column."""
+    kind = _column_kind(values)
+    arrays = {'rows': np.asarray(rows, dtype='<i8')}
+    if kind == 'int':
+        arrays['values'] = np.asarray(values, dtype='<i8')
+    elif kind == 'float':
+        arrays['values'] = np.asarray(values, dtype='<f8')
+    elif kind in ('int_list', 'float_list'):
+        dtype = '<i8' if kind == 'int_list' else '<f8'
+        offsets = np.zeros(len(values) + 1, dtype='<i8')
+        offsets[1:] = np.cumsum([len(value) for value in values])
+        arrays['offsets'] = offsets
+        arrays['values'] = np.asarray([item for value in values
+                                       for item in value], dtype=dtype)
+    elif kind == 'series':
+        dtype = '<f4' if all(value.typecode == 'f' for value in values) \
+            else '<f8'
+        offsets = np.zeros(len(values) + 1, dtype='<i8')
+        offsets[1:] = np.cumsum([len(value) for value in values])
+        arrays['offsets'] = offsets
+        arrays['values'] = np.concatenate(
+            [np.asarray(value.tolist(), dtype=dtype) for value in values])
+    elif kind == 'events':
+        offsets = np.zeros(len(values) + 1, dtype='<i8')
+        offsets[1:] = np.cumsum([len(value) for value in values])
+        arrays['offsets'] = offsets
+        arrays['times'] = np.concatenate(
+            [value.times.astype('<i8') for value in values])
+        arrays['values'] = np.concatenate(
+            [value.values.astype('<f8') for value in values])
+    else:
+        for value in values:
+            _check_json(value)
+        offsets, data = _string_table([_encode(value) for value in values])
+        arrays['offsets'] = offsets
+        arrays['values'] = data
+    return kind, arrays
+
+
+def _collect_columns(property_dicts):
+    """Group a sequence of property dicts into columns keyed by property."""
+    columns = {}
+    for row, properties in enumerate(property_dicts):
+        for key, value in properties.items():
+            rows, values = columns.setdefault(key, ([], []))
+            rows.append(row)
+            values.append(value)
+    return columns
+
+
+def save(graph, path, metadata=None):
+    """Write graph to path in the memory-mappable binary format.
+
+    metadata is an optional JSON serializable dict kept in the header and
+    exposed as MappedGraph.metadata. The file is written next to path and
+    renamed over it once complete, so a failed save leaves path as it was.
+    Names and property values that would not read back as they are, such
+    as tuples or dicts with keys that are not strings, raise ValueError.
+    """
+    encoded = {}
+    for name in graph._nodes:
+        raw = _encode(name)
+        if _decode(raw) != name:
+            raise ValueError('Node name {!r} does not survive '
+                             'serialization'.format(name))
+        encoded[name] = raw
+    names = sorted(graph._nodes, key=encoded.__getitem__)
+    ids = {name: index for index, name in enumerate(names)}
+
+    labels = {}
+    types = {}
+    node_label_ids = [[labels.setdefault(label, len(labels))
+                       for label in graph._nodes[name].labels]
+                      for name in names]
+
+    out_offsets = [0]
+    pair_sources, pair_targets = [], []
+    pair_edge_offsets = [0]
+    edge_types, edge_label_ids, edge_properties = [], [], []
+    for source, name in enumerate(names):
+        for target_name in sorted(graph._graph[name], key=ids.__getitem__):
+            pair_sources.append(source)
+            pair_targets.append(ids[target_name])
+            for rel in graph._graph[name][target_name]:
+                relationship = graph._relationships[rel][name][target_name]
+                edge_types.append(types.setdefault(rel, len(types)))
+                edge_label_ids.append([labels.setdefault(label, len(labels))
+                                       for label in relationship.labels])
+                edge_properties.append(relationship.properties)
+            pair_edge_offsets.append(len(edge_types))
+        out_offsets.append(len(pair_targets))
+
+    pair_targets = np.asarray(pair_targets, dtype='<i8')
+    in_pairs = np.argsort(pair_targets, kind='stable').astype('<i8')
+    in_offsets = np.zeros(len(names) + 1, dtype='<i8')
+    in_offsets[1:] = np.cumsum(np.bincount(pair_targets,
+                                           minlength=len(names)))
+
+    def ragged(lists):
+        offsets = np.zeros(len(lists) + 1, dtype='<i8')
+        offsets[1:] = np.cumsum([len(item) for item in lists])
+        return offsets, np.asarray([i for item in lists for i in item],
+                                   dtype='<i8')
+
+    name_offsets, name_data = _string_table([encoded[name]
+                                             for name in names])
+    node_label_offsets, node_labels = ragged(node_label_ids)
+    edge_label_offsets, edge_labels = ragged(edge_label_ids)
+    sections = {
+        'node_name_offsets': name_offsets,
+        'node_names': name_data,
+        'node_label_offsets': node_label_offsets,
+        'node_labels': node_labels,
+        'out_offsets': np.asarray(out_offsets, dtype='<i8'),
+        'pair_sources': np.asarray(pair_sources, dtype='<i8'),
+        'pair_targets': pair_targets,
+        'pair_edge_offsets': np.asarray(pair_edge_offsets, dtype='<i8'),
+        'edge_types': np.asarray(edge_types, dtype='<i8'),
+        'edge_label_offsets': edge_label_offsets,
+        'edge_labels': edge_labels,
+        'in_offsets': in_offsets,
+        'in_pairs': in_pairs,
+    }
+
+    columns = {}
+    for domain, dicts in (('node', [graph._nodes[name].properties
+                                    for name in names]),
+                          ('edge', edge_properties)):
+        columns[domain] = []
+        for key, (rows, values) in _collect_columns(dicts).items():
+            kind, arrays = _build_column(rows, values)
+            index = len(columns[domain])
+            columns[domain].append({'key': key, 'kind': kind})
+            for suffix, array in arrays.items():
+                sections['{}_col{}_{}'.format(domain, index, suffix)] = array
+
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = {'dtype': array.dtype.str, 'offset': offset,
+                        'count': int(array.size)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        'version': VERSION,
+        'metadata': metadata or {},
+        'node_count': len(names),
+        'pair_count': len(pair_sources),
+        'edge_count': len(edge_types),
+        'labels': sorted(labels, key=labels.__getitem__),
+        'types': sorted(types, key=types.__getitem__),
+        'columns': columns,
+        'sections': layout,
+    }).encode('utf-8')
+    data_start = -(-(_HEADER.size + len(header)) // _ALIGN) * _ALIGN
+
+    temp = path + '.tmp'
+    try:
+        with open(temp, 'wb') as handle:
+            handle.write(_HEADER.pack(MAGIC, len(header)))
+            handle.write(header)
+            handle.write(b'\0' * (data_start - _HEADER.size - len(header)))
+            for name, array in sections.items():
+                raw = array.tobytes()
+                handle.write(raw)
+                handle.write(b'\0' * (-len(raw) % _ALIGN))
+    except BaseException:
+        os.remove(temp)
+        raise
+    os.replace(temp, path)
+
+
+def load(path):
+    """Memory-map a graph saved with save()."""
+    return MappedGraph(path)
+
+
+class _Column:
+    """A single memory-mapped property column."""
+
+    def __init__(self, key, kind, arrays):
+        """Keep references to the column's section arrays."""
+        self.key = key
+        self.kind = kind
+        self.rows = arrays['rows']
+        self.values = arrays['values']
+        self.offsets = arrays.get('offsets')
+        self.times = arrays.get('times')
+
+    def get(self, row):
+        """Return (found, value) for an entity row."""
+        index = int(np.searchsorted(self.rows, row))
+        if index == len(self.rows) or self.rows[index] != row:
+            return False, None
+        if self.kind in ('int', 'float'):
+            return True, self.values[index].item()
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if self.kind == 'json':
+            return True, _decode(self.values[start:end].tobytes())
+        if self.kind == 'series':
+            typecode = 'f' if self.values.dtype.itemsize == 4 else 'd'
+            return True, NumericSeries(self.values[start:end].tolist(),
+                                       typecode)
+        if self.kind == 'events':
+            return True, EventLog(self.times[start:end].astype(TIME_UNIT),
+                                  self.values[start:end])
+        return True, self.values[start:end].tolist()
+
+
+class MappedGraph:
+    """Read-only graph backed by a memory-mapped file.
+
+    Exposes the read half of the LabeledPropertyGraph API. Names, labels
+    and properties are decoded from the mapped arrays on demand, and the
+    Node objects returned by __getitem__ are built per call, so mutating
+    them does not write through to the file. Use to_graph() to get a
+    regular, mutable LabeledPropertyGraph.
+    """
+
+    def __init__(self, path):
+        """Map the file and slice the section arrays out of it."""
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, header_length = _HEADER.unpack(
+            self._map[:_HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError('{} is not a saved graph'.format(path))
+        header_end = _HEADER.size + header_length
+        header = _decode(self._map[_HEADER.size:header_end].tobytes())
+        if header['version'] != VERSION:
+            raise ValueError('Unsupported graph file version '
+                             '{}'.format(header['version']))
+        data_start = -(-header_end // _ALIGN) * _ALIGN
+        self._header = header
+        self.metadata = header['metadata']
+        self._labels = header['labels']
+        self._types = header['types']
+        self._type_ids = {name: index
+                          for index, name in enumerate(self._types)}
+        self._sections = {}
+        for name, spec in header['sections'].items():
+            dtype = np.dtype(spec['dtype'])
+            start = data_start + spec['offset']
+            end = start + spec['count'] * dtype.itemsize
+            self._sections[name] = self._map[start:end].view(dtype)
+        self._columns = {}
+        for domain, specs in header['columns'].items():
+            self._columns[domain] = []
+            for index, spec in enumerate(specs):
+                prefix = '{}_col{}_'.format(domain, index)
+                arrays = {name[len(prefix):]: array
+                          for name, array in self._sections.items()
+                          if name.startswith(prefix)}
+                self._columns[domain].append(
+                    _Column(spec['key'], spec['kind'], arrays))
+
+    def __getattr__(self, name):
+        """Expose section arrays as attributes, e.g. self.pair_targets."""
+        try:
+            return self.__dict__['_sections'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def close(self):
+        """Drop the references keeping the file mapped."""
+        self._sections = {}
+        self._columns = {}
+        self._map = None
+
+    def __len__(self):
+        """Return the number of nodes in the graph."""
+        return self._header['node_count']
+
+    # ------------------------- ids and names -------------------------
+
+    def _name_bytes(self, node_id):
+        """Return the raw encoded name of a node id."""
+        start = self.node_name_offsets[node_id]
+        end = self.node_name_offsets[node_id + 1]
+        return self.node_names[start:end].tobytes()
+
+    def _name(self, node_id):
+        """Decode the name of a node id."""
+        return _decode(self._name_bytes(node_id))
+
+    def _id(self, name):
+        """Binary search the sorted name table for a node name."""
+        target = _encode(name)
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self) or self._name_bytes(low) != target:
+            raise KeyError(name)
+        return low
+
+    def _pair(self, source, target):
+        """Return the pair index for source -> target, or -1."""
+        start = self.out_offsets[source]
+        end = self.out_offsets[source + 1]
+        index = start + int(np.searchsorted(self.pair_targets[start:end],
+                                            target))
+        if index < end and self.pair_targets[index] == target:
+            return index
+        return -1
+
+    def _edge(self, name, node_a, node_b):
+        """Return the edge row of a named relationship."""
+        pair = self._pair(self._id(node_a), self._id(node_b))
+        type_id = self._type_ids.get(name, -1)
+        if pair >= 0:
+            for edge in range(self.pair_edge_offsets[pair],
+                              self.pair_edge_offsets[pair + 1]):
+                if self.edge_types[edge] == type_id:
+                    return edge
+        raise KeyError(name)
+
+    def _properties(self, domain, row):
+        """Assemble the property dict of a node or edge row."""
+        properties = {}
+        for column in self._columns[domain]:
+            found, value = column.get(row)
+            if found:
+                properties[column.key] = value
+        return properties
+
+    def _node_labels(self, node_id):
+        """Return the labels of a node id."""
+        start = self.node_label_offsets[node_id]
+        end = self.node_label_offsets[node_id + 1]
+        return [self._labels[label] for label in self.node_labels[start:end]]
+
+    # ---------------------------- read API ----------------------------
+
+    def __getitem__(self, key):
+        """Return a Node built from the mapped data."""
+        node_id = self._id(key)
+        node = Node(key)
+        node.properties = self._properties('node', node_id)
+        node.labels = self._node_labels(node_id)
+        return node
+
+    def nodes(self):
+        """Return a list of nodes in the graph."""
+        return [self._name(node_id) for node_id in range(len(self))]
+
+    def unique_relationships(self):
+        """Return list of unique relationships."""
+        return list(self._types)
+
+    def get_relationships(self, node_a, node_b):
+        """Return all relationships between two nodes."""
+        pair = self._pair(self._id(node_a), self._id(node_b))
+        if pair < 0:
+            raise KeyError(node_b)
+        edges = self.edge_types[self.pair_edge_offsets[pair]:
+                                self.pair_edge_offsets[pair + 1]]
+        return [self._types[edge] for edge in edges]
+
+    def nodes_with_relationship(self, name):
+        """Return all nodes with a given relationship."""
+        type_id = self._type_ids[name]
+        edges = np.flatnonzero(np.asarray(self.edge_types) == type_id)
+        pairs = np.searchsorted(self.pair_edge_offsets, edges,
+                                side='right') - 1
+        sources = np.unique(np.asarray(self.pair_sources)[pairs])
+        return [self._name(node_id) for node_id in sources]
+
+    def get_neighbors(self, node):
+        """Return all nodes node has relationships with."""
+        node_id = self._id(node)
+        targets = self.pair_targets[self.out_offsets[node_id]:
+                                    self.out_offsets[node_id + 1]]
+        return [self._name(target) for target in targets]
+
+    def is_neighbor_to(self, node):
+        """Return node that node is a neighbor to, but not vice versa."""
+        node_id = self._id(node)
+        pairs = self.in_pairs[self.in_offsets[node_id]:
+                              self.in_offsets[node_id + 1]]
+        return [self._name(self.pair_sources[pair]) for pair in pairs]
+
+    def get_relationship_properties(self, name, node_a, node_b):
+        """Return properties of a relationship between two nodes."""
+        return self._properties('edge', self._edge(name, node_a, node_b))
+
+    def get_node_properties(self, name):
+        """Return properties of a node."""
+        return self._properties('node', self._id(name))
+
+    def has_neighbor(self, node_a, node_b):
+        """Return boolean whether a node has a certain neighbor."""
+        try:
+            source = self._id(node_a)
+        except KeyError:
+            raise KeyError('{} not in graph'.format(node_a))
+        try:
+            return self._pair(source, self._id(node_b)) >= 0
+        except KeyError:
+            return False
+
+    def has_relationship(self, node_a, node_b, relationship, both_ways=False):
+        """Return whether node_a has a given rel to node_b or vice_versa."""
+        if both_ways:
+            return relationship in self.get_relationships(node_a, node_b) \
+                and relationship in self.get_relationships(node_b, node_a)
+        return relationship in self.get_relationships(node_a, node_b)
+
+    def to_graph(self, graph=None):
+        """Materialize the mapped data into a LabeledPropertyGraph.
+
+        If graph is given, nodes and relationships are added to it instead
+        of a new, empty graph.
+        """
+        if graph is None:
+            graph = LabeledPropertyGraph()
+        names = self.nodes()
+        for node_id, name in enumerate(names):
+            graph.add_node(name)
+            node = graph[name]
+            for key, value in self._properties('node', node_id).items():
+                node.add_property(key, value)
+            for label in self._node_labels(node_id):
+                node.add_label(label)
+        for pair in range(self._header['pair_count']):
+            node_a = names[self.pair_sources[pair]]
+            node_b = names[self.pair_targets[pair]]
+            graph._link(node_a, node_b)
+            for edge in range(self.pair_edge_offsets[pair],
+                              self.pair_edge_offsets[pair + 1]):
+                rel = self._types[self.edge_types[edge]]
+                graph.add_relationship(rel, node_a, node_b)
+                relationship = graph._relationships[rel][node_a][node_b]
+                relationship.properties.update(
+                    self._properties('edge', edge))
+                start = self.edge_label_offsets[edge]
+                end = self.edge_label_offsets[edge + 1]
+                relationship.labels.extend(
+                    self._labels[label] for label in self.edge_labels[start:end])
+        return graph
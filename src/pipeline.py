@@ -0,0 +1,334 @@
+"""
+Cached pipeline from the bills to the viewer's JSON.
+
+    $ phone-graph --account ../bills/Kurt Kurt \\
+                  --account ../bills/Mom_and_Dad Dad Mom \\
+                  --contacts Contacts.vcf --contact '(334) 524-9020=Kurt' \\
+                  --output docs/mega_phone_graph.json
+
+does what notebooks/network_generator.ipynb does, as a DAG of stages:
+
+    parse -> normalize -> join -> graph -> export
+               contacts --^
+
+with one parse, normalize and join stage per bill, each account's bills
+being the PDFs of its directory with the names of the lines on them in
+order. Every stage's output is saved in the cache directory under a key
+hashing the stage's name, version and parameters, the paths and contents
+of the files it reads and the keys of the stages it depends on. A stage
+whose key is cached is not run, and its output is only read if a stage
+depending on it has to run. So changing a bill reparses, normalizes and
+joins only that bill before rebuilding the graph, changing the contacts
+reruns the joins but no parse, and changing only the export options
+reruns only the export.
+
+The code of a stage is not part of its key: bump VERSION after changing
+what a stage computes, or clear the cache.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from .export import write_d3
+from .ingest import Ingestor
+from .labeled_property_graph import LabeledPropertyGraph
+from .normalize import join_contacts, normalize_bill, read_vcard
+from . import persistence
+
+
+VERSION = 1
+CACHE = '.phone_graph_cache'
+EXTENSIONS = {'json': '.json', 'graph': '.lpg', 'file': '.out'}
+
+#  Name of a cached output, or of one left half written by a crash.
+CACHED = re.compile(r'[\w.-]+-[0-9a-f]{{24}}({})(\.partial)?$'.format(
+    '|'.join(re.escape(extension) for extension in EXTENSIONS.values())))
+
+
+def _save_json(value, path):
+    """Write value to path as JSON."""
+    with open(path, 'w') as handle:
+        json.dump(value, handle)
+
+
+def _load_json(path):
+    """Return the JSON value saved at path."""
+    with open(path) as handle:
+        return json.load(handle)
+
+
+#  Kind of output -> (save(value, path), load(path)).
+FORMATS = {'json': (_save_json, _load_json),
+           'graph': (persistence.save, persistence.load),
+           'file': (None, lambda path: path)}
+
+
+def file_digest(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Stage:
+    """A step of the pipeline, computed from files and other stages."""
+
+    def __init__(self, name, function, inputs=(), files=(), params=None,
+                 kind='json', version=VERSION):
+        """
+        Initialize a stage computed by function.
+
+        function is called with the paths of files, then the outputs of
+        the inputs stages, then params as keywords, which must be JSON
+        serializable. kind is how the output is cached: 'json', 'graph'
+        for a graph saved with persistence.save(), or 'file', for which
+        function is first passed the path to write its output to.
+        """
+        if kind not in FORMATS:
+            raise ValueError('kind must be one of {}'.format(sorted(FORMATS)))
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        self.files = list(files)
+        self.params = params or {}
+        self.kind = kind
+        self.version = version
+
+    def __repr__(self):
+        """Return the stage's name."""
+        return 'Stage({!r})'.format(self.name)
+
+
+class Pipeline:
+    """Runner of stages caching their outputs in a directory."""
+
+    def __init__(self, directory=CACHE):
+        """Initialize a runner caching in directory, made if needed."""
+        self.directory = directory
+        self.ran = []
+        self.cached = []
+        self._keys = {}
+        self._digests = {}
+        self._done = set()
+        self._outputs = {}
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _digest(self, path):
+        """Return the digest of a file, read once per run."""
+        if path not in self._digests:
+            self._digests[path] = file_digest(path)
+        return self._digests[path]
+
+    def key(self, stage):
+        """Return the hash of everything the output of stage depends on."""
+        if stage not in self._keys:
+            described = json.dumps({
+                'name': stage.name, 'version': stage.version,
+                'function': '{}.{}'.format(stage.function.__module__,
+                                           stage.function.__name__),
+                'params': stage.params,
+                'files': [[path, self._digest(path)] for path in stage.files],
+                'inputs': [self.key(upstream) for upstream in stage.inputs]},
+                sort_keys=True)
+            self._keys[stage] = hashlib.sha256(
+                described.encode('utf-8')).hexdigest()
+        return self._keys[stage]
+
+    def path(self, stage):
+        """Return the path of the cached output of stage."""
+        return os.path.join(self.directory, '{}-{}{}'.format(
+            re.sub(r'[^\w.-]+', '_', stage.name), self.key(stage)[:24],
+            EXTENSIONS[stage.kind]))
+
+    def run(self, stage):
+        """Compute stage unless cached; return the path of its output."""
+        path = self.path(stage)
+        if stage in self._done:
+            return path
+        if os.path.exists(path):
+            self.cached.append(stage.name)
+        else:
+            values = [self.output(upstream) for upstream in stage.inputs]
+            partial = path + '.partial'
+            save = FORMATS[stage.kind][0]
+            if save is None:
+                stage.function(partial, *(stage.files + values),
+                               **stage.params)
+            else:
+                save(stage.function(*(stage.files + values), **stage.params),
+                     partial)
+            os.replace(partial, path)
+            self.ran.append(stage.name)
+        self._done.add(stage)
+        return path
+
+    def output(self, stage):
+        """Return the output of stage, computing it if needed."""
+        if stage not in self._outputs:
+            self._outputs[stage] = FORMATS[stage.kind][1](self.run(stage))
+        return self._outputs[stage]
+
+    def prune(self, stage):
+        """Delete the cached outputs of stages stage does not depend on.
+
+        Only files named like a cached output, or a partial one, are
+        deleted, so other files in the directory are left alone. Returns
+        the names of the files deleted.
+        """
+        used = set()
+        waiting = [stage]
+        while waiting:
+            current = waiting.pop()
+            used.add(os.path.basename(self.path(current)))
+            waiting.extend(current.inputs)
+        removed = sorted(
+            name for name in os.listdir(self.directory)
+            if name not in used and CACHED.match(name)
+            and os.path.isfile(os.path.join(self.directory, name)))
+        for name in removed:
+            os.remove(os.path.join(self.directory, name))
+        return removed
+
+
+# ----------------------------- stages -----------------------------
+
+
+def parse_pdf(path):
+    """Return the records of every line of a bill PDF."""
+    #  PyPDF2 is only needed when a bill has to be parsed again.
+    from .tmobile_bill_parser import parse_bill
+    return parse_bill(path)
+
+
+def read_contacts(*paths, overrides=None):
+    """Return {number: name} of vCard files, updated with overrides.
+
+    An override with an empty name drops the number from the contacts.
+    """
+    contacts = {}
+    for path in paths:
+        contacts.update(read_vcard(path))
+    for number, name in (overrides or {}).items():
+        if name:
+            contacts[number] = name
+        else:
+            contacts.pop(number, None)
+    return contacts
+
+
+def normalize_lines(bills, lines):
+    """Return [line, cleaned bill] of the lines named on a parsed bill.
+
+    Lines of the bill past the names given are skipped.
+    """
+    return [[line, normalize_bill(bill)] for line, bill in zip(lines, bills)]
+
+
+def join_lines(bills, contacts):
+    """Return [line, bill] of normalized bills with contact names."""
+    return [[line, join_contacts(bill, contacts)] for line, bill in bills]
+
+
+def build_graph(*accounts):
+    """Return the graph of the joined bills of every account."""
+    graph = LabeledPropertyGraph()
+    ingestor = Ingestor(graph)
+    for bills in accounts:
+        for line, bill in bills:
+            ingestor.add(line, bill)
+    ingestor.flush()
+    return graph
+
+
+def export(path, graph, properties=None, js_variable=None):
+    """Write the viewer's JSON of graph to path."""
+    write_d3(graph, path, properties=properties, js_variable=js_variable)
+
+
+def bill_paths(directory):
+    """Return the paths of the bill PDFs in directory, sorted."""
+    return [os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.lower().endswith('.pdf')]
+
+
+def build(accounts, contacts=(), overrides=None, properties=None,
+          js_variable=None, parse=None):
+    """
+    Return the export stage of the DAG described in the module.
+
+    accounts is a list of (directory, line names); contacts the paths of
+    vCard files; parse is called with the path of each bill, parse_pdf()
+    by default.
+    """
+    parse = parse or parse_pdf
+    contacts_stage = Stage('contacts', read_contacts, files=contacts,
+                           params={'overrides': overrides or {}})
+    joined = []
+    for directory, lines in accounts:
+        account = os.path.basename(os.path.normpath(directory))
+        for path in bill_paths(directory):
+            label = '{}/{}'.format(account, os.path.basename(path))
+            parsed = Stage('parse ' + label, parse, files=[path])
+            cleaned = Stage('normalize ' + label, normalize_lines, [parsed],
+                            params={'lines': list(lines)})
+            joined.append(Stage('join ' + label, join_lines,
+                                [cleaned, contacts_stage]))
+    graph = Stage('graph', build_graph, joined, kind='graph')
+    return Stage('export', export, [graph], kind='file',
+                 params={'properties': properties,
+                         'js_variable': js_variable})
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--account', nargs='+', action='append',
+                        required=True, metavar=('DIRECTORY', 'LINE'),
+                        help='directory of bills and the names of its lines '
+                             'in order, may be repeated')
+    parser.add_argument('--contacts', action='append', default=[],
+                        help='vCard file of contacts, may be repeated')
+    parser.add_argument('--contact', action='append', default=[],
+                        metavar='NUMBER=NAME',
+                        help='name of a number, or NUMBER= to drop a '
+                             'contact, may be repeated')
+    parser.add_argument('--properties',
+                        help='comma separated relationship properties to '
+                             'export, all by default')
+    parser.add_argument('--js-variable',
+                        help='assign the JSON to this variable, to load it '
+                             'with a script tag')
+    parser.add_argument('--output', default='mega_phone_graph.json')
+    parser.add_argument('--cache', default=CACHE)
+    parser.add_argument('--prune', action='store_true',
+                        help='delete cached outputs this run did not use')
+    args = parser.parse_args(argv)
+    for account in args.account:
+        if len(account) < 2:
+            parser.error('--account needs a directory and at least one line')
+    if any('=' not in contact for contact in args.contact):
+        parser.error('--contact takes NUMBER=NAME')
+    overrides = dict(contact.split('=', 1) for contact in args.contact)
+    properties = args.properties.split(',') if args.properties else None
+    stage = build([(account[0], account[1:]) for account in args.account],
+                  args.contacts, overrides, properties, args.js_variable)
+    pipeline = Pipeline(args.cache)
+    shutil.copyfile(pipeline.run(stage), args.output)
+    for name in pipeline.ran:
+        print('ran {}'.format(name))
+    print('{} stages ran, {} reused; wrote {}'.format(
+        len(pipeline.ran), len(pipeline.cached), args.output))
+    if args.prune:
+        print('pruned {} cached outputs'.format(len(pipeline.prune(stage))))
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
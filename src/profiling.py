@@ -0,0 +1,100 @@
+"""
+Opt-in call counters for the methods of a labeled property graph.
+
+A Profiler counts the calls to the public methods of one graph and adds
+up the wall time spent in them. Enabling it sets a timing wrapper as an
+instance attribute over each method, shadowing the class's; disabling it
+deletes the wrappers again, so a graph that is not being profiled runs
+exactly the code it always did:
+
+    >>> profiler = lpg.profile()
+    >>> ingest(lpg)
+    >>> profiler.disable()
+    >>> print(profiler.report())
+
+Times are inclusive: a method calling another public method of the graph
+counts that call's time too, and the nested call is counted on its own.
+Only calls going through attribute lookup on the graph are seen, so
+operators such as lpg[key] are not counted.
+"""
+import time
+
+
+def public_methods(graph):
+    """Return the names of the public methods of graph's class."""
+    return sorted(name for name in dir(type(graph))
+                  if not name.startswith('_') and name != 'profile'
+                  and callable(getattr(type(graph), name)))
+
+
+class Profiler:
+    """Per-method call counts and wall time of a graph."""
+
+    def __init__(self, graph, methods=None):
+        """Initialize a disabled profiler of methods, or all public ones."""
+        self.graph = graph
+        self.methods = public_methods(graph) if methods is None else \
+            list(methods)
+        self.enabled = False
+        self._counters = {}
+
+    def _wrap(self, name):
+        """Return a wrapper counting the calls to the graph's method."""
+        method = getattr(self.graph, name)
+        counter = self._counters.setdefault(name, [0, 0.])
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += clock() - start
+        timed.__name__ = name
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def enable(self):
+        """Start counting calls, returning the profiler."""
+        if not self.enabled:
+            for name in self.methods:
+                setattr(self.graph, name, self._wrap(name))
+            self.enabled = True
+        return self
+
+    def disable(self):
+        """Stop counting calls, keeping the counters."""
+        if self.enabled:
+            for name in self.methods:
+                del self.graph.__dict__[name]
+            self.enabled = False
+
+    def __enter__(self):
+        """Enable the profiler for the with block."""
+        return self.enable()
+
+    def __exit__(self, *exc_info):
+        """Disable the profiler at the end of the with block."""
+        self.disable()
+
+    def reset(self):
+        """Set every counter back to zero."""
+        for counter in self._counters.values():
+            counter[:] = [0, 0.]
+
+    def counters(self):
+        """Return {method: (calls, seconds)} of the methods called."""
+        return {name: (calls, seconds)
+                for name, (calls, seconds) in self._counters.items() if calls}
+
+    def report(self):
+        """Return the counters as a table, most time spent first."""
+        rows = sorted(self.counters().items(),
+                      key=lambda item: (-item[1][1], item[0]))
+        lines = ['{:<28} {:>10} {:>12} {:>12}'.format(
+            'method', 'calls', 'seconds', 'us/call')]
+        for name, (calls, seconds) in rows:
+            lines.append('{:<28} {:>10,} {:>12.6f} {:>12.3f}'.format(
+                name, calls, seconds, seconds / calls * 1e6))
+        return '\n'.join(lines)
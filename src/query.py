@@ -0,0 +1,313 @@
+"""
+Declarative pattern queries over the labeled property graph.
+
+Patterns are a small subset of Cypher's MATCH syntax:
+
+    (a:Subscriber)-[:Text {Count > 10}]->(b)
+    (a {color = 'blue'})<-[t:Talk|Text]-(b)-->(c:Subscriber)
+
+    Nodes:
+        - (var:Label:Other {key op value, ...}), every part optional.
+
+    Relationships:
+        - -[var:Type|Other {key op value, ...}]-> for a -> b,
+          <-[...]- for a <- b and -[...]- for either direction.
+        - -->, <-- and -- when nothing needs to be said about the edge.
+
+    Conditions compare a property with a literal using =, ==, !=, <, <=,
+    > or >=. Literals are numbers, quoted strings, true, false or null.
+    A missing property, or one that cannot be compared with the literal,
+    fails the condition.
+
+match() plans the query before running it. Every node of the pattern is a
+possible starting point; its candidates come from the graph's label index,
+its node property indexes (equality conditions only) or a relationship
+type's source nodes, falling back to every node in the graph. When the
+candidate set is small enough, the degrees of the candidates in the
+direction of the first hop are summed to estimate the work of starting
+there. The cheapest start is expanded outward to both ends of the pattern.
+
+Results are generated lazily, one binding dict per match, mapping node
+variables to node names and relationship variables to Relationship
+objects. Unnamed parts of the pattern are matched but not bound.
+"""
+from collections import namedtuple
+import json
+import operator
+import re
+
+
+NodePattern = namedtuple('NodePattern', ('var', 'labels', 'conditions'))
+RelPattern = namedtuple('RelPattern', ('var', 'types', 'conditions',
+                                       'direction'))
+Pattern = namedtuple('Pattern', ('nodes', 'rels'))
+Plan = namedtuple('Plan', ('start', 'estimates'))
+
+#  Candidate sets up to this size get their degrees summed by the planner.
+DEGREE_SAMPLE = 1000
+
+_OPERATORS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+_NODE_RE = re.compile(r'''\(\s*(?P<var>\w+)?\s*
+                          (?P<labels>(?::\s*\w+\s*)*)
+                          (?P<props>\{[^}]*\})?\s*\)''', re.VERBOSE)
+_REL_RE = re.compile(r'''(?P<left><)?-\[\s*(?P<var>\w+)?\s*
+                         (?::\s*(?P<types>\w+(?:\s*\|\s*\w+)*))?\s*
+                         (?P<props>\{[^}]*\})?\s*\]-(?P<right>>)?
+                         |(?P<bare_left><)?--(?P<bare_right>>)?''',
+                     re.VERBOSE)
+_CONDITION_RE = re.compile(r'''\s*(?P<key>\w+)\s*(?P<op>==|!=|>=|<=|=|>|<)\s*
+                               (?P<value>'(?:[^'\\]|\\.)*'
+                                         |"(?:[^"\\]|\\.)*"
+                                         |[^,}]+?)\s*(?:,|$)''', re.VERBOSE)
+
+
+def _literal(text):
+    """Turn the text of a literal into its value."""
+    if text[0] in '\'"':
+        return text[1:-1].replace('\\' + text[0], text[0])
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _conditions(text):
+    """Parse '{key op value, ...}' into (key, op, value) tuples."""
+    if not text:
+        return ()
+    body = text[1:-1].strip()
+    conditions = []
+    position = 0
+    while position < len(body):
+        found = _CONDITION_RE.match(body, position)
+        if found is None:
+            raise ValueError('Bad condition: {}'.format(body[position:]))
+        conditions.append((found.group('key'), found.group('op'),
+                           _literal(found.group('value').strip())))
+        position = found.end()
+    return tuple(conditions)
+
+
+def parse(text):
+    """Parse a pattern string into a Pattern."""
+    nodes, rels = [], []
+    position = 0
+    text = text.strip()
+    while True:
+        found = _NODE_RE.match(text, position)
+        if found is None:
+            raise ValueError('Expected a node at: {}'.format(text[position:]))
+        labels = tuple(label.strip() for label in
+                       found.group('labels').split(':')[1:])
+        nodes.append(NodePattern(found.group('var'), labels,
+                                 _conditions(found.group('props'))))
+        position = found.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position == len(text):
+            return Pattern(tuple(nodes), tuple(rels))
+        found = _REL_RE.match(text, position)
+        if found is None:
+            raise ValueError('Expected a relationship at: '
+                             '{}'.format(text[position:]))
+        left = found.group('left') or found.group('bare_left')
+        right = found.group('right') or found.group('bare_right')
+        if left and right:
+            raise ValueError('A relationship cannot point both ways.')
+        types = found.group('types')
+        rels.append(RelPattern(
+            found.group('var'),
+            tuple(name.strip() for name in types.split('|')) if types else (),
+            _conditions(found.group('props')),
+            'in' if left else 'out' if right else 'both'))
+        position = found.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+
+
+def _satisfies(properties, conditions):
+    """Return whether a property dict passes every condition."""
+    for key, op, value in conditions:
+        if key not in properties:
+            return False
+        try:
+            if not _OPERATORS[op](properties[key], value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def _node_matches(graph, name, node_pattern):
+    """Return whether a node satisfies a node pattern."""
+    node = graph._nodes[name]
+    return all(label in node.labels for label in node_pattern.labels) \
+        and _satisfies(node.properties, node_pattern.conditions)
+
+
+def _flip(direction):
+    """Return the direction of a relationship walked backwards."""
+    return {'out': 'in', 'in': 'out', 'both': 'both'}[direction]
+
+
+def _steps(graph, name, rel_pattern, direction):
+    """Yield (neighbor, Relationship) for every edge matching rel_pattern.
+
+    direction is relative to name: 'out' follows edges leaving name, 'in'
+    follows edges arriving at name.
+    """
+    sides = ('out', 'in') if direction == 'both' else (direction,)
+    for side in sides:
+        adjacency = graph._graph if side == 'out' else graph._incoming
+        for neighbor, rels in list(adjacency[name].items()):
+            source, target = (name, neighbor) if side == 'out' \
+                else (neighbor, name)
+            for rel in rels:
+                if rel_pattern.types and rel not in rel_pattern.types:
+                    continue
+                relationship = graph._relationships[rel][source][target]
+                if _satisfies(relationship.properties,
+                              rel_pattern.conditions):
+                    yield neighbor, relationship
+
+
+def _degree(graph, name, direction):
+    """Return the number of neighbors of name in a direction."""
+    if direction == 'out':
+        return len(graph._graph[name])
+    if direction == 'in':
+        return len(graph._incoming[name])
+    return len(graph._graph[name]) + len(graph._incoming[name])
+
+
+def _candidates(graph, pattern, position):
+    """Return the smallest known candidate set for a pattern node.
+
+    Returns None when only a full scan of the nodes would do.
+    """
+    node_pattern = pattern.nodes[position]
+    options = [graph._labels.get(label, set())
+               for label in node_pattern.labels]
+    for key, op, value in node_pattern.conditions:
+        if op in ('=', '==') and key in graph._indexes:
+            try:
+                options.append(graph._indexes[key].get(value, set()))
+            except TypeError:
+                options.append(set())
+    outgoing = []
+    if position < len(pattern.rels) \
+            and pattern.rels[position].direction == 'out':
+        outgoing.append(pattern.rels[position])
+    if position > 0 and pattern.rels[position - 1].direction == 'in':
+        outgoing.append(pattern.rels[position - 1])
+    for rel_pattern in outgoing:
+        if rel_pattern.types:
+            sources = set()
+            for rel in rel_pattern.types:
+                sources.update(graph._relationships.get(rel, ()))
+            options.append(sources)
+    if not options:
+        return None
+    return min(options, key=len)
+
+
+def plan(graph, pattern):
+    """Pick the pattern node to start matching from.
+
+    Returns a Plan naming the start position and the estimated cost of
+    starting at every position.
+    """
+    estimates = []
+    for position in range(len(pattern.nodes)):
+        candidates = _candidates(graph, pattern, position)
+        if candidates is None:
+            estimates.append(len(graph._nodes) * 2)
+            continue
+        directions = []
+        if position < len(pattern.rels):
+            directions.append(pattern.rels[position].direction)
+        if position > 0:
+            directions.append(_flip(pattern.rels[position - 1].direction))
+        if not directions or len(candidates) > DEGREE_SAMPLE:
+            estimates.append(len(candidates))
+            continue
+        estimates.append(len(candidates) + sum(
+            _degree(graph, name, direction)
+            for name in candidates for direction in directions))
+    start = min(range(len(estimates)), key=estimates.__getitem__)
+    return Plan(start, tuple(estimates))
+
+
+def explain(graph, text):
+    """Return the plan match() would use for a pattern string."""
+    return plan(graph, parse(text))
+
+
+def _bind(binding, var, value):
+    """Return a binding extended with var, or None on a conflict."""
+    if var is None:
+        return binding
+    if var in binding:
+        return binding if binding[var] is value or binding[var] == value \
+            else None
+    extended = dict(binding)
+    extended[var] = value
+    return extended
+
+
+def _expand(graph, pattern, binding, names, position, stop, step):
+    """Extend a partial match one hop at a time from position to stop."""
+    if position == stop:
+        yield binding, names
+        return
+    if step > 0:
+        rel_pattern = pattern.rels[position]
+        direction = rel_pattern.direction
+    else:
+        rel_pattern = pattern.rels[position - 1]
+        direction = _flip(rel_pattern.direction)
+    following = position + step
+    node_pattern = pattern.nodes[following]
+    for neighbor, relationship in _steps(graph, names[position],
+                                         rel_pattern, direction):
+        if not _node_matches(graph, neighbor, node_pattern):
+            continue
+        extended = _bind(binding, rel_pattern.var, relationship)
+        if extended is None:
+            continue
+        extended = _bind(extended, node_pattern.var, neighbor)
+        if extended is None:
+            continue
+        walked = dict(names)
+        walked[following] = neighbor
+        for result in _expand(graph, pattern, extended, walked,
+                              following, stop, step):
+            yield result
+
+
+def match(graph, text):
+    """Lazily yield a binding dict for every match of a pattern string."""
+    pattern = parse(text) if not isinstance(text, Pattern) else text
+    start = plan(graph, pattern).start
+    candidates = _candidates(graph, pattern, start)
+    if candidates is None:
+        candidates = graph._nodes
+    start_pattern = pattern.nodes[start]
+    for name in list(candidates):
+        if name not in graph._nodes \
+                or not _node_matches(graph, name, start_pattern):
+            continue
+        binding = _bind({}, start_pattern.var, name)
+        for right, names in _expand(graph, pattern, binding, {start: name},
+                                    start, len(pattern.nodes) - 1, 1):
+            for result, _ in _expand(graph, pattern, right, names,
+                                     start, 0, -1):
+                yield result
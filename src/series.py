@@ -0,0 +1,145 @@
+"""
+Compact numeric series for relationship properties.
+
+The notebook keeps the duration of every call in a Python list on the
+Talk relationship, which costs a boxed float (24 bytes) plus a list slot
+per call. A NumericSeries packs the values in an array('f'), 4 bytes each,
+and keeps their running count, sum, min and max, so aggregate reads are
+O(1) whatever the length of the series. It appends like a list, so it can
+stand in for the Duration list:
+
+    >>> lpg.add_rel_props('Talk', 'Kurt', 'Mom', Count=1,
+    ...                   Duration=NumericSeries([12.]))
+    >>> lpg.get_relationship_properties('Talk', 'Kurt', 'Mom')[
+    ...     'Duration'].append(3.)
+
+json_default() gives a default= hook for json.dump that writes series as
+their summary, or as plain lists with summaries=False. It writes the
+EventLogs of temporal.py the same way, as a summary or as a list of
+[ISO 8601 time, value] pairs.
+"""
+from array import array
+
+from .temporal import EventLog
+
+
+class NumericSeries:
+    """Append-only series of numbers with running aggregates."""
+
+    def __init__(self, values=(), typecode='f'):
+        """
+        Initialize the series with values.
+
+        typecode is the array module type code of the stored values, 'f'
+        (4 byte float) by default or 'd' for full precision. The running
+        sum adds the values as stored, in full precision, so it agrees
+        with the stored values.
+        """
+        self._values = array(typecode)
+        self.sum = 0.
+        self.min = None
+        self.max = None
+        self.extend(values)
+
+    def __len__(self):
+        """Return the number of values."""
+        return len(self._values)
+
+    def __iter__(self):
+        """Iterate over the values."""
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        """Return a value, or a list of values for a slice."""
+        if isinstance(index, slice):
+            return self._values[index].tolist()
+        return self._values[index]
+
+    def __eq__(self, other):
+        """Compare the values with another series or a list."""
+        if isinstance(other, NumericSeries):
+            other = other._values
+        return list(self._values) == list(other)
+
+    def __ne__(self, other):
+        """Inverse of __eq__."""
+        return not self == other
+
+    def __repr__(self):
+        """Show the summary of the series."""
+        return 'NumericSeries({})'.format(self.summary())
+
+    @property
+    def typecode(self):
+        """Return the array type code of the stored values."""
+        return self._values.typecode
+
+    @property
+    def count(self):
+        """Return the number of values."""
+        return len(self._values)
+
+    @property
+    def mean(self):
+        """Return the mean of the values, None if there are none."""
+        if not self._values:
+            return None
+        return self.sum / len(self._values)
+
+    def append(self, value):
+        """Add a value."""
+        self._values.append(value)
+        stored = self._values[-1]
+        self.sum += stored
+        if self.min is None or stored < self.min:
+            self.min = stored
+        if self.max is None or stored > self.max:
+            self.max = stored
+
+    def extend(self, values):
+        """Add several values."""
+        values = list(values)
+        added = array(self.typecode, values)
+        if not added:
+            return
+        self._values.extend(added)
+        self.sum += sum(added)
+        low, high = min(added), max(added)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def tolist(self):
+        """Return the values as a list of floats."""
+        return self._values.tolist()
+
+    def summary(self):
+        """Return the count, sum, min, max and mean of the values."""
+        return {'count': self.count, 'sum': self.sum, 'min': self.min,
+                'max': self.max, 'mean': self.mean}
+
+
+def json_default(summaries=True):
+    """
+    Return a default= hook for json.dump that can write series.
+
+    Series are written as their summary, or as lists of their values if
+    summaries is False. EventLogs are written as their count, total, first
+    and last times, or as lists of [time, value] pairs. Anything else
+    raises TypeError as usual.
+    """
+    def default(value):
+        """Return a JSON friendly version of value."""
+        if isinstance(value, NumericSeries):
+            return value.summary() if summaries else value.tolist()
+        if isinstance(value, EventLog):
+            if not summaries:
+                return [[str(time), float(amount)]
+                        for time, amount in zip(value.times, value.values)]
+            times = value.times
+            return {'count': len(value), 'total': value.total(),
+                    'first': str(times[0]) if len(times) else None,
+                    'last': str(times[-1]) if len(times) else None}
+        raise TypeError('{!r} is not JSON serializable'.format(value))
+    return default
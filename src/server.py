@@ -0,0 +1,301 @@
+"""
+Local HTTP/JSON server answering queries about a saved graph.
+
+    $ python -m src.server graph.lpg --port 8000
+    $ curl 'http://127.0.0.1:8000/path?source=Kurt&target=Mom'
+
+The graph file, written by persistence.save(), is read once at start-up
+and every request is answered from memory. Routes, all GET, with their
+parameters in the query string:
+
+    /neighbors?node=N&direction=out     {"node": N, "neighbors": [...]}
+    /path?source=A&target=B&direction=out
+                                        {"path": [A, ..., B]} or null
+    /centrality?measure=degree&top=10&direction=both&sample=
+                                        {"measure": ..., "top": [[N, score]]}
+    /ego?node=N&k=1&direction=both      the viewer document of export.py
+
+direction is 'out', 'in' or 'both', as in analytics.py; measure is
+'degree' or 'betweenness', whose sample estimates the scores from that
+many nodes. Centrality scores are kept once computed, since the graph
+does not change, and concurrent requests for scores being computed wait
+for that computation instead of starting their own.
+
+Requests are served concurrently on one event loop. Paths, centrality
+and ego networks are computed in an executor, a thread pool unless
+another is given, so one slow query does not hold up the others. Lists
+of neighbors and ego networks are streamed with chunked transfer
+encoding, about chunk_size bytes at a time, each chunk encoded in the
+executor; other responses are sent whole. An error while streaming
+drops the connection without the last chunk, so the client can tell
+the body is incomplete. Errors are sent as {"error": message}: 400 for
+a missing or invalid parameter, 404 for an unknown node or route and 405
+for any method but GET.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from . import analytics
+from .export import link_dict, node_dict, relationship_names
+from .persistence import load
+from .series import json_default
+
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+          405: 'Method Not Allowed'}
+MEASURES = ('degree', 'betweenness')
+
+
+class _Required:
+    """Marker of a query parameter without a default."""
+
+
+def _parameter(params, name, default=_Required, kind=str):
+    """Return a query parameter converted by kind; ValueError if missing."""
+    if name not in params:
+        if default is _Required:
+            raise ValueError('missing parameter {}'.format(name))
+        return default
+    try:
+        return kind(params[name][-1])
+    except ValueError:
+        raise ValueError('invalid parameter {}'.format(name))
+
+
+def _pieces(prefix, items, suffix, dumps):
+    """Generate a JSON document around an array of items, item by item."""
+    yield prefix + '['
+    for index, item in enumerate(items):
+        yield (', ' if index else '') + dumps(item)
+    yield ']' + suffix
+
+
+def _take(pieces, size):
+    """Return the next size or so bytes of pieces, b'' when exhausted."""
+    chunk = []
+    length = 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        chunk.append(data)
+        length += len(data)
+        if length >= size:
+            break
+    return b''.join(chunk)
+
+
+class GraphServer:
+    """Asyncio HTTP server of analytics queries about a graph."""
+
+    def __init__(self, graph, host='127.0.0.1', port=0, executor=None,
+                 chunk_size=65536):
+        """Serve graph on host and port, 0 picking a free port."""
+        self.graph = graph
+        self.host = host
+        self.port = port
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self._dumps = json.JSONEncoder(
+            default=json_default(summaries=False)).encode
+        self._centrality = {}
+        self._server = None
+        self._routes = {'/neighbors': self._neighbors, '/path': self._path,
+                        '/centrality': self._centrality_route,
+                        '/ego': self._ego}
+
+    @property
+    def address(self):
+        """Return the (host, port) the server listens on."""
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        """Start listening; return the server."""
+        self._server = await asyncio.start_server(self._handle, self.host,
+                                                  self.port)
+        return self
+
+    async def close(self):
+        """Stop listening and wait for the server to close."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _run(self, function, *args):
+        """Return a future of function(*args) computed in the executor."""
+        return asyncio.get_event_loop().run_in_executor(self.executor,
+                                                        function, *args)
+
+    # ----------------------------- routes -----------------------------
+
+    async def _neighbors(self, params):
+        """Return the neighbors of a node, streamed."""
+        node = _parameter(params, 'node')
+        direction = _parameter(params, 'direction', 'out')
+        found = analytics.neighbors(self.graph, node, direction)
+        return _pieces('{{"node": {}, "neighbors": '.format(self._dumps(node)),
+                       found, '}', self._dumps)
+
+    async def _path(self, params):
+        """Return a shortest path between two nodes."""
+        source = _parameter(params, 'source')
+        target = _parameter(params, 'target')
+        direction = _parameter(params, 'direction', 'out')
+        path = await self._run(analytics.shortest_path, self.graph, source,
+                               target, direction)
+        return {'source': source, 'target': target, 'path': path}
+
+    async def _centrality_route(self, params):
+        """Return the nodes with the highest centrality."""
+        measure = _parameter(params, 'measure', 'degree')
+        count = _parameter(params, 'top', 10, int)
+        direction = _parameter(params, 'direction', 'both')
+        sample = _parameter(params, 'sample', None, int)
+        if measure not in MEASURES:
+            raise ValueError('measure must be one of {}'.format(MEASURES))
+        if count < 0:
+            raise ValueError('top must not be negative')
+        key = (measure, direction, sample)
+        scores = self._centrality.get(key)
+        if scores is None:
+            if measure == 'degree':
+                scores = self._run(analytics.degree_centrality, self.graph,
+                                   direction)
+            else:
+                scores = self._run(analytics.betweenness_centrality,
+                                   self.graph, direction, sample)
+            self._centrality[key] = scores
+        try:
+            #  Shielded, so a request going away does not cancel the
+            #  computation the others wait for.
+            result = await asyncio.shield(scores)
+        except Exception:
+            if self._centrality.get(key) is scores:
+                del self._centrality[key]
+            raise
+        return {'measure': measure, 'direction': direction,
+                'top': analytics.top(result, count)}
+
+    async def _ego(self, params):
+        """Return the k-hop neighborhood of a node, streamed."""
+        node = _parameter(params, 'node')
+        k = _parameter(params, 'k', 1, int)
+        direction = _parameter(params, 'direction', 'both')
+        if k < 0:
+            raise ValueError('k must not be negative')
+        members = await self._run(analytics.neighborhood, self.graph, node,
+                                  k, direction)
+        return self._document(members)
+
+    def _document(self, members):
+        """Generate the viewer document of the graph between members."""
+        graph, dumps = self.graph, self._dumps
+        inside = set(members)
+        yield '{"nodes": '
+        for piece in _pieces('', (node_dict(graph, name) for name in members),
+                             '', dumps):
+            yield piece
+        yield ', "links": {'
+        for index, name in enumerate(relationship_names(graph)):
+            links = (link_dict(graph, name, source, target)
+                     for source in members
+                     for target in graph.get_neighbors(source)
+                     if target in inside and
+                     name in graph.get_relationships(source, target))
+            prefix = '{}{}: '.format(', ' if index else '', dumps(name))
+            for piece in _pieces(prefix, links, '', dumps):
+                yield piece
+        yield '}}'
+
+    # ------------------------------ http ------------------------------
+
+    async def _handle(self, reader, writer):
+        """Answer one request on a connection, then close it."""
+        try:
+            request = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()).strip():
+                pass
+            if len(request) != 3:
+                await self._send(writer, 400, {'error': 'malformed request'})
+                return
+            method, target = request[:2]
+            url = urlsplit(target)
+            if method != 'GET':
+                await self._send(writer, 405, {'error': 'only GET is served'})
+                return
+            route = self._routes.get(url.path)
+            if route is None:
+                await self._send(writer, 404, {
+                    'error': 'unknown route {}'.format(url.path)})
+                return
+            try:
+                body = await route(parse_qs(url.query))
+            except KeyError as error:
+                await self._send(writer, 404, {
+                    'error': 'unknown node {}'.format(error.args[0])})
+            except ValueError as error:
+                await self._send(writer, 400, {'error': str(error)})
+            else:
+                await self._send(writer, 200, body)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, body):
+        """Send a dict whole, or a generator of JSON text chunked."""
+        head = 'HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n' \
+               'Connection: close\r\n'.format(status, STATUS[status])
+        if isinstance(body, dict):
+            data = self._dumps(body).encode('utf-8')
+            writer.write('{}Content-Length: {}\r\n\r\n'.format(
+                head, len(data)).encode('latin-1') + data)
+            await writer.drain()
+            return
+        writer.write('{}Transfer-Encoding: chunked\r\n\r\n'.format(
+            head).encode('latin-1'))
+        try:
+            while True:
+                chunk = await self._run(_take, body, self.chunk_size)
+                if not chunk:
+                    break
+                writer.write('{:x}\r\n'.format(len(chunk)).encode(
+                    'latin-1') + chunk + b'\r\n')
+                await writer.drain()
+        except Exception:
+            #  The status is already sent: end the body without its last
+            #  chunk.
+            writer.transport.abort()
+            return
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('path', help='graph file written by persistence.save')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--mapped', action='store_true',
+                        help='query the memory-mapped file instead of '
+                             'loading the graph into memory')
+    args = parser.parse_args(argv)
+    graph = load(args.path)
+    if not args.mapped:
+        graph = graph.to_graph()
+    server = GraphServer(graph, args.host, args.port)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    print('Serving {} on http://{}:{}'.format(args.path, *server.address))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
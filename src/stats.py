@@ -0,0 +1,161 @@
+"""
+Statistics and memory accounting for the graph classes.
+
+Both LabeledPropertyGraph classes have a stats() method that walks their
+nodes once, feeding a GraphStats collector with each node's degrees,
+labels and properties, the relationships leaving it, and the estimated
+size of the structures holding them. report() then turns the totals into
+a dict:
+
+    - nodes, edges: counts, edges_by_type and nodes_by_label.
+    - degree: percentiles of the out, in and total degree of the nodes.
+    - node_properties, relationship_properties: for every property key,
+      how many nodes or relationships carry it and how many distinct
+      values it takes.
+    - memory: estimated bytes per structure, from sys.getsizeof of the
+      containers, objects and property values (shared strings, such as
+      node names used as keys, are only counted once, in _nodes).
+
+With sample=k only k random nodes are walked. Counts and bytes are then
+scaled up to the whole graph and are estimates; distinct values and
+degree percentiles are those of the sample.
+"""
+import random
+import sys
+
+import numpy as np
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def sample_nodes(names, sample=None, seed=0):
+    """Return the names to walk: all of them, or sample random ones."""
+    names = list(names)
+    if sample is None or sample >= len(names):
+        return names
+    return random.Random(seed).sample(names, sample)
+
+
+def sizeof(value):
+    """Return the estimated bytes of a property value and what it holds."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(item)
+                    for key, item in value.items())
+    elif hasattr(value, '__dict__'):
+        size += sum(getattr(item, 'nbytes', 0) or sys.getsizeof(item)
+                    for item in vars(value).values())
+    return size
+
+
+def _hashable(value):
+    """Return value, or its repr if it cannot be hashed."""
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class GraphStats:
+    """Totals collected while walking a graph."""
+
+    def __init__(self, nodes, walked):
+        """Initialize for a graph of nodes nodes, walked of them visited."""
+        self.nodes = nodes
+        self.walked = walked
+        self.out_degrees = []
+        self.in_degrees = []
+        self.edges_by_type = {}
+        self.nodes_by_label = {}
+        self.node_properties = {}
+        self.relationship_properties = {}
+        self.memory = {}
+        self._fixed = {}
+
+    @property
+    def scale(self):
+        """Return the factor from the walked nodes to the whole graph."""
+        return float(self.nodes) / self.walked if self.walked else 0.
+
+    def node(self, out_degree, in_degree, labels, properties):
+        """Count a walked node."""
+        self.out_degrees.append(out_degree)
+        self.in_degrees.append(in_degree)
+        for label in labels:
+            self.nodes_by_label[label] = self.nodes_by_label.get(label, 0) + 1
+        self._properties(self.node_properties, properties, 'node_properties')
+
+    def edge(self, name, properties):
+        """Count a relationship leaving a walked node."""
+        self.edges_by_type[name] = self.edges_by_type.get(name, 0) + 1
+        self._properties(self.relationship_properties, properties,
+                         'relationship_properties')
+
+    def _properties(self, keys, properties, structure):
+        """Count the keys and values of a property dict."""
+        size = sys.getsizeof(properties)
+        for key, value in properties.items():
+            counts = keys.get(key)
+            if counts is None:
+                counts = keys[key] = [0, set()]
+            counts[0] += 1
+            counts[1].add(_hashable(value))
+            size += sizeof(value)
+        self.add_memory(structure, size)
+
+    def add_memory(self, structure, size):
+        """Add the bytes of a walked part of a structure."""
+        self.memory[structure] = self.memory.get(structure, 0) + size
+
+    def add_fixed_memory(self, structure, size):
+        """Add bytes counted once for the whole graph, never scaled."""
+        self._fixed[structure] = self._fixed.get(structure, 0) + size
+
+    def _degrees(self, degrees):
+        """Return the percentiles, max and mean of a list of degrees."""
+        degrees = np.asarray(degrees if degrees else [0])
+        summary = {'p{}'.format(p): float(np.percentile(degrees, p))
+                   for p in PERCENTILES}
+        summary['max'] = int(degrees.max())
+        summary['mean'] = float(degrees.mean())
+        return summary
+
+    def report(self):
+        """Return the statistics as a dict."""
+        scale = self.scale
+
+        def scaled(counts):
+            return {key: int(round(count * scale))
+                    for key, count in counts.items()}
+
+        def properties(keys):
+            return {key: {'count': int(round(count * scale)),
+                          'distinct': len(values)}
+                    for key, (count, values) in keys.items()}
+
+        memory = scaled(self.memory)
+        for structure, size in self._fixed.items():
+            memory[structure] = memory.get(structure, 0) + size
+        memory['total'] = sum(memory.values())
+        edges_by_type = scaled(self.edges_by_type)
+        return {
+            'nodes': self.nodes,
+            'edges': sum(edges_by_type.values()),
+            'sampled': self.walked if self.walked < self.nodes else None,
+            'edges_by_type': edges_by_type,
+            'nodes_by_label': scaled(self.nodes_by_label),
+            'degree': {
+                'out': self._degrees(self.out_degrees),
+                'in': self._degrees(self.in_degrees),
+                'total': self._degrees([a + b for a, b in
+                                        zip(self.out_degrees,
+                                            self.in_degrees)])},
+            'node_properties': properties(self.node_properties),
+            'relationship_properties': properties(
+                self.relationship_properties),
+            'memory': memory,
+        }
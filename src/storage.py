@@ -0,0 +1,482 @@
+"""
+Pluggable storage backends for the labeled property graph.
+
+GraphStore is the interface a backend implements: nodes and relationships
+keyed by name, their Node and Relationship objects, and adjacency in both
+directions. StoredGraph puts the LabeledPropertyGraph API on top of any
+store, so the same calling code runs unchanged against every backend.
+
+Two backends ship here:
+
+    DictStore:
+        - Dict of dicts, like labeled_property_graph: _out[a][b] and
+          _in[b][a] share one {name: Relationship} dict per pair.
+
+    ArrayStore:
+        - Nodes get dense integer ids. Every relationship is a row in
+          NumPy arrays of source id, target id and name id, and each node
+          keeps array('q') lists of its outgoing and incoming row numbers
+          and of the ids of the nodes it is linked to either way.
+          Relationships of one name are found with a vectorized scan of
+          the name column instead of walking dicts. Rows of removed
+          relationships are kept on a free list and reused, so the scan
+          covers at most as many rows as the store ever held at once.
+
+LabeledPropertyGraph keeps its own dict of dicts rather than a DictStore:
+persistence, query, subgraph and analytics read its _graph, _incoming and
+_relationships directly, so it cannot swap its storage without all of
+them going through a store too. StoredGraph is the graph to use when the
+backend has to be chosen.
+
+harness.py runs the same mix of operations against every backend, checks
+they give the answers LabeledPropertyGraph gives and reports their speed
+and memory use.
+"""
+from abc import ABC, abstractmethod
+from array import array
+
+import numpy as np
+
+from .labeled_property_graph import Node, Relationship
+
+
+class GraphStore(ABC):
+    """Interface of a graph storage backend.
+
+    Node names are any hashable value. Missing nodes or relationships
+    raise KeyError; adding something that already exists raises KeyError
+    for nodes and ValueError for relationships. As in LabeledPropertyGraph,
+    two nodes become neighbors with their first relationship and stay
+    neighbors, with no relationship, once the last one is removed.
+    """
+
+    @abstractmethod
+    def __len__(self):
+        """Return the number of nodes."""
+
+    @abstractmethod
+    def add_node(self, name, node):
+        """Store the Node object for a new node."""
+
+    @abstractmethod
+    def remove_node(self, name):
+        """Remove a node and every relationship touching it."""
+
+    @abstractmethod
+    def get_node(self, name):
+        """Return the Node object of a node."""
+
+    @abstractmethod
+    def has_node(self, name):
+        """Return whether a node is stored."""
+
+    @abstractmethod
+    def node_names(self):
+        """Return the names of every node, in insertion order."""
+
+    @abstractmethod
+    def add_edge(self, source, target, rel, relationship):
+        """Store the Relationship object for a new relationship."""
+
+    @abstractmethod
+    def remove_edge(self, source, target, rel):
+        """Remove one relationship."""
+
+    @abstractmethod
+    def get_edge(self, source, target, rel):
+        """Return the Relationship object of a relationship."""
+
+    @abstractmethod
+    def edge_names(self, source, target):
+        """Return the names of the relationships from source to target.
+
+        Raises KeyError if the nodes were never linked.
+        """
+
+    @abstractmethod
+    def successors(self, name):
+        """Return the nodes name is linked to."""
+
+    @abstractmethod
+    def predecessors(self, name):
+        """Return the nodes linked to name."""
+
+    @abstractmethod
+    def edges_of_type(self, rel):
+        """Generate (source, target, relationship) for a relationship name."""
+
+    @abstractmethod
+    def relationship_names(self):
+        """Return the name of every relationship ever added."""
+
+
+class DictStore(GraphStore):
+    """Dict-of-dicts storage, the layout of labeled_property_graph."""
+
+    def __init__(self):
+        """Initialize empty node, adjacency and type dicts."""
+        self._nodes = {}
+        self._out = {}
+        self._in = {}
+        self._types = {}
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self._nodes)
+
+    def add_node(self, name, node):
+        """Store the Node object for a new node."""
+        if name in self._nodes:
+            raise KeyError('Node already exists in graph')
+        self._nodes[name] = node
+        self._out[name] = {}
+        self._in[name] = {}
+
+    def remove_node(self, name):
+        """Remove a node and every relationship touching it."""
+        del self._nodes[name]
+        for target, links in self._out.pop(name).items():
+            for rel in links:
+                del self._types[rel][name, target]
+            del self._in[target][name]
+        for source, links in self._in.pop(name).items():
+            for rel in links:
+                del self._types[rel][source, name]
+            del self._out[source][name]
+
+    def get_node(self, name):
+        """Return the Node object of a node."""
+        return self._nodes[name]
+
+    def has_node(self, name):
+        """Return whether a node is stored."""
+        return name in self._nodes
+
+    def node_names(self):
+        """Return the names of every node, in insertion order."""
+        return list(self._nodes)
+
+    def add_edge(self, source, target, rel, relationship):
+        """Store the Relationship object for a new relationship."""
+        links = self._out[source].get(target)
+        if links is None:
+            links = self._out[source][target] = {}
+            self._in[target][source] = links
+        if rel in links:
+            raise ValueError('{} -> {} relationship '
+                             'already exists'.format(source, target))
+        links[rel] = relationship
+        self._types.setdefault(rel, {})[source, target] = None
+
+    def remove_edge(self, source, target, rel):
+        """Remove one relationship."""
+        del self._out[source][target][rel]
+        del self._types[rel][source, target]
+
+    def get_edge(self, source, target, rel):
+        """Return the Relationship object of a relationship."""
+        return self._out[source][target][rel]
+
+    def edge_names(self, source, target):
+        """Return the names of the relationships from source to target."""
+        return list(self._out[source][target])
+
+    def successors(self, name):
+        """Return the nodes name is linked to."""
+        return list(self._out[name])
+
+    def predecessors(self, name):
+        """Return the nodes linked to name."""
+        return list(self._in[name])
+
+    def edges_of_type(self, rel):
+        """Generate (source, target, relationship) for a relationship name."""
+        for source, target in list(self._types.get(rel, ())):
+            yield source, target, self._out[source][target][rel]
+
+    def relationship_names(self):
+        """Return the name of every relationship ever added."""
+        return list(self._types)
+
+
+class ArrayStore(GraphStore):
+    """Integer id storage with relationships kept in NumPy columns."""
+
+    def __init__(self, capacity=1024):
+        """Initialize empty tables with room for capacity relationships."""
+        self._ids = {}
+        self._names = []
+        self._node_objects = []
+        self._out = []
+        self._in = []
+        self._out_nodes = []
+        self._in_nodes = []
+        self._pairs = {}
+        self._type_ids = {}
+        self._type_names = []
+        self._source = np.zeros(capacity, dtype=np.int64)
+        self._target = np.zeros(capacity, dtype=np.int64)
+        self._type = np.full(capacity, -1, dtype=np.int64)
+        self._edge_objects = []
+        self._free = []
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self._ids)
+
+    def _grow(self):
+        """Double the capacity of the relationship columns."""
+        size = len(self._source) * 2
+        for column, fill in (('_source', 0), ('_target', 0), ('_type', -1)):
+            old = getattr(self, column)
+            new = np.full(size, fill, dtype=np.int64)
+            new[:len(old)] = old
+            setattr(self, column, new)
+
+    def _pair_key(self, source, target):
+        """Return the (source id, target id) key of a pair of names."""
+        return self._ids[source], self._ids[target]
+
+    def add_node(self, name, node):
+        """Store the Node object for a new node."""
+        if name in self._ids:
+            raise KeyError('Node already exists in graph')
+        self._ids[name] = len(self._names)
+        self._names.append(name)
+        self._node_objects.append(node)
+        self._out.append(array('q'))
+        self._in.append(array('q'))
+        self._out_nodes.append(array('q'))
+        self._in_nodes.append(array('q'))
+
+    def remove_node(self, name):
+        """Remove a node and every relationship touching it."""
+        node_id = self._ids[name]
+        for row in list(self._out[node_id]) + list(self._in[node_id]):
+            self._remove_row(row)
+        for target in self._out_nodes[node_id]:
+            del self._pairs[node_id, target]
+            self._in_nodes[target].remove(node_id)
+        for source in self._in_nodes[node_id]:
+            del self._pairs[source, node_id]
+            self._out_nodes[source].remove(node_id)
+        self._out_nodes[node_id] = array('q')
+        self._in_nodes[node_id] = array('q')
+        del self._ids[name]
+        self._node_objects[node_id] = None
+
+    def get_node(self, name):
+        """Return the Node object of a node."""
+        return self._node_objects[self._ids[name]]
+
+    def has_node(self, name):
+        """Return whether a node is stored."""
+        return name in self._ids
+
+    def node_names(self):
+        """Return the names of every node, in insertion order."""
+        return list(self._ids)
+
+    def add_edge(self, source, target, rel, relationship):
+        """Store the Relationship object for a new relationship."""
+        key = self._pair_key(source, target)
+        rows = self._pairs.get(key, {})
+        if rel in rows:
+            raise ValueError('{} -> {} relationship '
+                             'already exists'.format(source, target))
+        type_id = self._type_ids.get(rel)
+        if type_id is None:
+            type_id = self._type_ids[rel] = len(self._type_names)
+            self._type_names.append(rel)
+        if self._free:
+            row = self._free.pop()
+            self._edge_objects[row] = relationship
+        else:
+            row = len(self._edge_objects)
+            if row == len(self._source):
+                self._grow()
+            self._edge_objects.append(relationship)
+        self._source[row], self._target[row] = key
+        self._type[row] = type_id
+        if key not in self._pairs:
+            self._pairs[key] = rows
+            self._out_nodes[key[0]].append(key[1])
+            self._in_nodes[key[1]].append(key[0])
+        rows[rel] = row
+        self._out[key[0]].append(row)
+        self._in[key[1]].append(row)
+
+    def _remove_row(self, row):
+        """Unlink one relationship row."""
+        source, target = int(self._source[row]), int(self._target[row])
+        del self._pairs[source, target][self._type_names[self._type[row]]]
+        self._out[source].remove(row)
+        self._in[target].remove(row)
+        self._type[row] = -1
+        self._edge_objects[row] = None
+        self._free.append(row)
+
+    def remove_edge(self, source, target, rel):
+        """Remove one relationship."""
+        self._remove_row(self._pairs[self._pair_key(source, target)][rel])
+
+    def get_edge(self, source, target, rel):
+        """Return the Relationship object of a relationship."""
+        row = self._pairs[self._pair_key(source, target)][rel]
+        return self._edge_objects[row]
+
+    def edge_names(self, source, target):
+        """Return the names of the relationships from source to target."""
+        return list(self._pairs[self._pair_key(source, target)])
+
+    def successors(self, name):
+        """Return the nodes name is linked to."""
+        return [self._names[node_id]
+                for node_id in self._out_nodes[self._ids[name]]]
+
+    def predecessors(self, name):
+        """Return the nodes linked to name."""
+        return [self._names[node_id]
+                for node_id in self._in_nodes[self._ids[name]]]
+
+    def edges_of_type(self, rel):
+        """Generate (source, target, relationship) for a relationship name."""
+        type_id = self._type_ids.get(rel)
+        if type_id is None:
+            return
+        used = len(self._edge_objects)
+        rows = np.flatnonzero(self._type[:used] == type_id)
+        for row, source, target in zip(rows.tolist(),
+                                       self._source[rows].tolist(),
+                                       self._target[rows].tolist()):
+            yield self._names[source], self._names[target], \
+                self._edge_objects[row]
+
+    def relationship_names(self):
+        """Return the name of every relationship ever added."""
+        return list(self._type_names)
+
+
+class StoredGraph:
+    """The LabeledPropertyGraph API on top of a GraphStore.
+
+    Only the core node, relationship and property methods are here, with
+    the answers LabeledPropertyGraph gives, which the harness checks.
+    Label and property indexes, change feeds, versions, stats() and
+    profile() are only on LabeledPropertyGraph.
+    """
+
+    def __init__(self, store=None):
+        """Initialize the graph over store, a new DictStore by default."""
+        self._store = DictStore() if store is None else store
+
+    def __getitem__(self, key):
+        """Return the Node object of a node."""
+        return self._store.get_node(key)
+
+    def nodes(self):
+        """Return a list of nodes in the graph."""
+        return self._store.node_names()
+
+    def unique_relationships(self):
+        """Return list of unique relationships."""
+        return self._store.relationship_names()
+
+    def add_node(self, name):
+        """Add a node and pass the name to the node.name."""
+        self._store.add_node(name, Node(name))
+
+    def add_relationship(self, name, node_a, node_b, both_ways=False):
+        """Add a relationship between two nodes."""
+        if node_a == node_b:
+            raise ValueError("Node should not have a relationship with itself.")
+        if not self._store.has_node(node_a) or \
+                not self._store.has_node(node_b):
+            raise KeyError('A node is not present in this graph')
+        self._store.add_edge(node_a, node_b, name, Relationship(name))
+        if both_ways:
+            self._store.add_edge(node_b, node_a, name, Relationship(name))
+
+    def remove_relationship(self, name, node_a, node_b):
+        """Remove a relationship between two nodes."""
+        self._store.remove_edge(node_a, node_b, name)
+
+    def remove_node(self, name):
+        """Remove a node and all of its relationships."""
+        self._store.remove_node(name)
+
+    def get_relationships(self, node_a, node_b):
+        """Return all relationships between two nodes."""
+        return self._store.edge_names(node_a, node_b)
+
+    def nodes_with_relationship(self, name):
+        """Return all nodes with a given relationship."""
+        if name not in self._store.relationship_names():
+            raise KeyError(name)
+        return list(dict.fromkeys(source for source, _, _ in
+                                  self._store.edges_of_type(name)))
+
+    def get_neighbors(self, node):
+        """Return all nodes node has relationships with."""
+        return self._store.successors(node)
+
+    def is_neighbor_to(self, node):
+        """Return node that node is a neighbor to, but not vice versa."""
+        return self._store.predecessors(node)
+
+    def get_relationship_properties(self, name, node_a, node_b):
+        """Return properties of a relationship between two nodes."""
+        return self._store.get_edge(node_a, node_b, name).properties
+
+    def get_node_properties(self, name):
+        """Return properties of a node."""
+        return self._store.get_node(name).properties
+
+    def has_neighbor(self, node_a, node_b):
+        """Return boolean whether a node has a certain neighbor."""
+        if not self._store.has_node(node_a):
+            raise KeyError('{} not in graph'.format(node_a))
+        try:
+            self._store.edge_names(node_a, node_b)
+        except KeyError:
+            return False
+        return True
+
+    def has_relationship(self, node_a, node_b, relationship, both_ways=False):
+        """Return whether node_a has a given rel to node_b or vice_versa."""
+        if both_ways:
+            return relationship in self._store.edge_names(node_a, node_b) \
+                and relationship in self._store.edge_names(node_b, node_a)
+        return relationship in self._store.edge_names(node_a, node_b)
+
+    def change_node_prop(self, node, property_, value):
+        """Change the property of a node."""
+        self._store.get_node(node).change_property(property_, value)
+
+    def change_rel_prop(self, rel, node_a, node_b, prop, val):
+        """Change the property of a relationship."""
+        self._store.get_edge(node_a, node_b, rel).change_property(prop, val)
+
+    def extend_rel_prop(self, rel, node_a, node_b, prop, *values):
+        """Append to a list, NumericSeries or EventLog rel property."""
+        self._store.get_edge(node_a, node_b, rel).properties[prop].extend(
+            *values)
+
+    def remove_node_prop(self, node, property_):
+        """Remove node property."""
+        self._store.get_node(node).remove_property(property_)
+
+    def remove_rel_prop(self, rel, node_a, node_b, prop):
+        """Remove rel property."""
+        self._store.get_edge(node_a, node_b, rel).remove_property(prop)
+
+    def add_node_props(self, node, **kwargs):
+        """Add properties to a node with values."""
+        for key, value in kwargs.items():
+            self._store.get_node(node).add_property(key, value)
+
+    def add_rel_props(self, rel, node_a, node_b, **kwargs):
+        """Add relationship props with values."""
+        relationship = self._store.get_edge(node_a, node_b, rel)
+        for key, value in kwargs.items():
+            relationship.add_property(key, value)
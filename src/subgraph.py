@@ -0,0 +1,161 @@
+"""
+k-hop neighborhoods and ego networks of the labeled property graph.
+
+k_hop() walks out from a node one frontier at a time, only ever looking at
+the neighbors of the nodes reached in the previous hop, so the cost is the
+number of edges inside the neighborhood rather than the size of the graph.
+
+ego_network() wraps the neighborhood in a SubgraphView. The view copies
+nothing: it keeps the set of member names and answers the read methods of
+LabeledPropertyGraph by filtering the parent graph's adjacency, so Node and
+Relationship objects are shared with the parent and later changes to the
+parent show through.
+"""
+
+
+def _discover(graph, node, k, direction):
+    """Return the nodes within k hops of node in the order they are reached."""
+    if node not in graph._nodes:
+        raise KeyError('{} not in graph'.format(node))
+    adjacencies = {'out': (graph._graph,),
+                   'in': (graph._incoming,),
+                   'both': (graph._graph, graph._incoming)}[direction]
+    seen = {node}
+    order = [node]
+    frontier = [node]
+    for _ in range(k):
+        reached = []
+        for name in frontier:
+            for adjacency in adjacencies:
+                for other in adjacency[name]:
+                    if other not in seen:
+                        seen.add(other)
+                        reached.append(other)
+        if not reached:
+            break
+        order.extend(reached)
+        frontier = reached
+    return order
+
+
+def k_hop(graph, node, k, direction='both'):
+    """
+    Return the set of nodes within k hops of node, node included.
+
+    direction is 'out' to follow relationships leaving each node, 'in' to
+    follow relationships arriving at it, or 'both'.
+    """
+    return set(_discover(graph, node, k, direction))
+
+
+def ego_network(graph, node, k=1, direction='both'):
+    """Return a SubgraphView of the k-hop neighborhood around node.
+
+    The nodes of the view are listed closest first, in the order the walk
+    reached them.
+    """
+    return SubgraphView(graph, _discover(graph, node, k, direction))
+
+
+class SubgraphView:
+    """Read-only view of a subset of a LabeledPropertyGraph's nodes.
+
+    A relationship is part of the view when both of its nodes are.
+    """
+
+    def __init__(self, graph, nodes):
+        """Initialize the view over graph restricted to nodes.
+
+        nodes() lists the members in the order of nodes.
+        """
+        self._parent = graph
+        self._order = list(dict.fromkeys(nodes))
+        self._members = frozenset(self._order)
+
+    def __contains__(self, node):
+        """Return whether node is part of the view."""
+        return node in self._members and node in self._parent._nodes
+
+    def __len__(self):
+        """Return the number of nodes in the view."""
+        return len(self.nodes())
+
+    def _check(self, *nodes):
+        """Raise KeyError for nodes outside the view."""
+        for node in nodes:
+            if node not in self:
+                raise KeyError(node)
+
+    def __getitem__(self, key):
+        """Return the parent graph's Node object."""
+        self._check(key)
+        return self._parent[key]
+
+    def nodes(self):
+        """Return a list of nodes in the view."""
+        return [node for node in self._order if node in self._parent._nodes]
+
+    def unique_relationships(self):
+        """Return list of unique relationships inside the view."""
+        found = []
+        seen = set()
+        for node in self.nodes():
+            for target, rels in self._parent._graph[node].items():
+                if target in self._members:
+                    for rel in rels:
+                        if rel not in seen:
+                            seen.add(rel)
+                            found.append(rel)
+        return found
+
+    def get_relationships(self, node_a, node_b):
+        """Return all relationships between two nodes."""
+        self._check(node_a, node_b)
+        return self._parent.get_relationships(node_a, node_b)
+
+    def nodes_with_relationship(self, name):
+        """Return all nodes with a given relationship inside the view."""
+        return [node for node in self._parent.nodes_with_relationship(name)
+                if node in self._members
+                and any(target in self._members
+                        for target in self._parent._relationships[name][node])]
+
+    def get_neighbors(self, node):
+        """Return all nodes node has relationships with inside the view."""
+        self._check(node)
+        return [target for target in self._parent._graph[node]
+                if target in self._members]
+
+    def is_neighbor_to(self, node):
+        """Return node that node is a neighbor to, but not vice versa."""
+        self._check(node)
+        return [source for source in self._parent._incoming[node]
+                if source in self._members]
+
+    def get_relationship_properties(self, name, node_a, node_b):
+        """Return properties of a relationship between two nodes."""
+        self._check(node_a, node_b)
+        return self._parent.get_relationship_properties(name, node_a, node_b)
+
+    def get_node_properties(self, name):
+        """Return properties of a node."""
+        self._check(name)
+        return self._parent.get_node_properties(name)
+
+    def has_neighbor(self, node_a, node_b):
+        """Return boolean whether a node has a certain neighbor."""
+        if node_a not in self:
+            raise KeyError('{} not in graph'.format(node_a))
+        return node_b in self._members and \
+            self._parent.has_neighbor(node_a, node_b)
+
+    def has_relationship(self, node_a, node_b, relationship, both_ways=False):
+        """Return whether node_a has a given rel to node_b or vice_versa."""
+        self._check(node_a, node_b)
+        return self._parent.has_relationship(node_a, node_b, relationship,
+                                             both_ways)
+
+    def nodes_with_label(self, label):
+        """Return all nodes in the view carrying a label."""
+        return [node for node in self._parent.nodes_with_label(label)
+                if node in self._members]
@@ -0,0 +1,132 @@
+"""
+Synthetic phone networks for benchmarks and tests.
+
+phone_network() mimics the graph built from the bills: a few subscriber
+lines acting as hubs, each talking to and texting a crowd of numbers
+whose popularity follows a power law, so a handful of contacts get most
+of the calls and most numbers show up once or twice. A share of the
+relationships (mesh) link two contacts directly, so the contacts have
+neighbors of their own. The network is generated with numpy, which keeps
+it quick at millions of edges:
+
+    >>> network = phone_network(edges=1000000, seed=1)
+    >>> for node in network.nodes:
+    ...     lpg.add_node(node)
+    >>> for rel, node_a, node_b in network.relationships():
+    ...     lpg.add_relationship(rel, node_a, node_b)
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+RELATIONSHIPS = ('Talk', 'Text')
+
+
+def phone_number(index):
+    """Return a phone number style node name for an integer."""
+    return '({:03d}) {:03d}-{:04d}'.format(200 + index // 10000000 % 800,
+                                           index // 10000 % 1000,
+                                           index % 10000)
+
+
+class Network(namedtuple('Network', ('nodes', 'sources', 'targets',
+                                     'types'))):
+    """
+    A generated network.
+
+    nodes lists the node names, subscribers first. sources, targets and
+    types are arrays with one row per relationship, holding indexes into
+    nodes and RELATIONSHIPS.
+    """
+
+    __slots__ = ()
+
+    def relationships(self):
+        """Generate (name, node_a, node_b) for every relationship."""
+        nodes = self.nodes
+        for source, target, rel in zip(self.sources.tolist(),
+                                       self.targets.tolist(),
+                                       self.types.tolist()):
+            yield RELATIONSHIPS[rel], nodes[source], nodes[target]
+
+
+def _power_law(contacts, exponent):
+    """Return the probability of picking each contact, by rank."""
+    weights = np.arange(1, contacts + 1, dtype='f8') ** -exponent
+    return weights / weights.sum()
+
+
+def _hub_relationships(rng, subscribers, weights, total):
+    """Return (contacts, subscribers, incoming, types) of total hub edges.
+
+    Every contact gets a number of relationships with the subscribers in
+    proportion to its weight, capped by the distinct (subscriber,
+    direction, type) slots available, then that many distinct slots.
+    """
+    slots = subscribers * 2 * len(RELATIONSHIPS)
+    total = min(total, len(weights) * slots)
+    degrees = np.minimum(np.floor(weights * total), slots).astype('i8')
+    while degrees.sum() < total:
+        open_ = np.flatnonzero(degrees < slots)
+        short = min(total - degrees.sum(), len(open_))
+        chances = weights[open_] / weights[open_].sum()
+        degrees[rng.choice(open_, short, replace=False, p=chances)] += 1
+    contacts = np.repeat(np.arange(len(weights)), degrees)
+    order = np.argsort(rng.random_sample((len(weights), slots)), axis=1)
+    chosen = order[np.arange(slots) < degrees[:, None]]
+    hubs, rest = np.divmod(chosen, 2 * len(RELATIONSHIPS))
+    incoming, types = np.divmod(rest, len(RELATIONSHIPS))
+    return contacts, hubs, incoming.astype(bool), types
+
+
+def _mesh_relationships(rng, weights, total):
+    """Return (sources, targets, types) of total edges between contacts."""
+    contacts = len(weights)
+    keys = np.empty(0, dtype='i8')
+    for _ in range(20):
+        wanted = int((total - len(keys)) * 1.2) + 16
+        sources = rng.choice(contacts, wanted, p=weights)
+        targets = rng.choice(contacts, wanted, p=weights)
+        types = rng.randint(len(RELATIONSHIPS), size=wanted)
+        fresh = ((sources * contacts + targets) * len(RELATIONSHIPS) +
+                 types)[sources != targets]
+        keys = np.union1d(keys, fresh)
+        if len(keys) >= total:
+            break
+    keys = rng.permutation(keys)[:total]
+    pairs, types = np.divmod(keys, len(RELATIONSHIPS))
+    sources, targets = np.divmod(pairs, contacts)
+    return sources, targets, types
+
+
+def phone_network(edges=10000, subscribers=3, contacts=None, exponent=1.2,
+                  mesh=0.1, seed=0):
+    """
+    Return a Network of distinct relationships.
+
+    contacts defaults to edges // 4 numbers, whose relationships are
+    spread in proportion to rank ** -exponent. mesh is the share of
+    relationships between two contacts; the others link a subscriber and
+    a contact, in either direction. A network too small to hold edges
+    distinct relationships gets as many as fit.
+    """
+    if contacts is None:
+        contacts = max(edges // 4, 2)
+    rng = np.random.RandomState(seed)
+    weights = _power_law(contacts, exponent)
+    meshed = int(edges * mesh)
+    contact, hubs, incoming, hub_types = _hub_relationships(
+        rng, subscribers, weights, edges - meshed)
+    contact = contact + subscribers
+    mesh_sources, mesh_targets, mesh_types = _mesh_relationships(
+        rng, weights, meshed)
+    sources = np.concatenate([np.where(incoming, contact, hubs),
+                              mesh_sources + subscribers])
+    targets = np.concatenate([np.where(incoming, hubs, contact),
+                              mesh_targets + subscribers])
+    types = np.concatenate([hub_types, mesh_types])
+    order = rng.permutation(len(sources))
+    names = ['Subscriber {}'.format(index) for index in range(subscribers)]
+    names += [phone_number(index) for index in range(contacts)]
+    return Network(names, sources[order], targets[order], types[order])
@@ -0,0 +1,252 @@
+"""
+Time-stamped events on the relationships of the labeled property graph.
+
+The notebook folds every call or text between two numbers into a Count and
+a Duration list on one relationship, which loses when each of them
+happened. An EventLog keeps them instead: a time-sorted array of numpy
+datetime64 timestamps (to the second) with one float value per event, such
+as the minutes of a call, plus running sums of the values. Range queries
+find their bounds by binary search, so counting or totalling the events in
+a range costs O(log n) whatever its size, and aggregate() summarizes any
+number of consecutive windows without looking at the events themselves.
+
+record() appends an event to the log kept on a relationship, adding the
+relationship first if needed, and contacts() answers questions like "who
+did this line talk to in March":
+
+    >>> record(lpg, 'Talk', 'Kurt', 'Mom', '2017-03-02T18:30', 12.)
+    >>> contacts(lpg, 'Kurt', '2017-03', '2017-04', rels=['Talk'])
+    {'Mom': (1, 12.0)}
+
+Times may be datetime objects, numpy datetime64 values or ISO 8601
+strings. Ranges are half-open, [start, end), and None leaves a side open.
+"""
+from collections import namedtuple
+import datetime
+
+import numpy as np
+
+
+EVENTS = 'Events'
+TIME_UNIT = 'datetime64[s]'
+
+#  Calendar units aggregate() accepts as a window, besides fixed timedeltas.
+CALENDAR_UNITS = ('Y', 'M', 'W', 'D', 'h', 'm', 's')
+
+Windows = namedtuple('Windows', ('starts', 'counts', 'totals'))
+
+
+def to_time(value):
+    """Return value as a numpy datetime64 with second resolution."""
+    if isinstance(value, np.datetime64):
+        return value.astype(TIME_UNIT)
+    return np.datetime64(value, 's')
+
+
+class EventLog:
+    """Time-sorted events, each a timestamp and a value."""
+
+    def __init__(self, times=None, values=None, capacity=4):
+        """Initialize the log, optionally with events in any order."""
+        self._size = 0
+        self._times = np.empty(capacity, dtype=TIME_UNIT)
+        self._values = np.empty(capacity, dtype='f8')
+        self._sums = np.zeros(capacity + 1, dtype='f8')
+        if times is not None:
+            self.extend(times, values)
+
+    def __len__(self):
+        """Return the number of events."""
+        return self._size
+
+    def __repr__(self):
+        """Show the size and time span of the log."""
+        if not self._size:
+            return '<EventLog empty>'
+        return '<EventLog {} events {} to {}>'.format(
+            self._size, self._times[0], self._times[self._size - 1])
+
+    @property
+    def times(self):
+        """Return the timestamps of the events, oldest first."""
+        return self._times[:self._size]
+
+    @property
+    def values(self):
+        """Return the values of the events, in the order of times."""
+        return self._values[:self._size]
+
+    def _grow(self, size):
+        """Make room for at least size events."""
+        capacity = len(self._times)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        times = np.empty(capacity, dtype=TIME_UNIT)
+        values = np.empty(capacity, dtype='f8')
+        sums = np.zeros(capacity + 1, dtype='f8')
+        times[:self._size] = self.times
+        values[:self._size] = self.values
+        sums[:self._size + 1] = self._sums[:self._size + 1]
+        self._times, self._values, self._sums = times, values, sums
+
+    def add(self, time, value=0.):
+        """Add an event.
+
+        Events arriving in time order are appended in O(1); an older event
+        is inserted in place, which shifts the newer ones.
+        """
+        time = to_time(time)
+        size = self._size
+        self._grow(size + 1)
+        if size and time < self._times[size - 1]:
+            index = int(np.searchsorted(self.times, time, side='right'))
+            self._times[index + 1:size + 1] = self._times[index:size]
+            self._values[index + 1:size + 1] = self._values[index:size]
+        else:
+            index = size
+        self._times[index] = time
+        self._values[index] = value
+        self._size = size + 1
+        self._sums[index + 1:size + 2] = \
+            self._sums[index] + np.cumsum(self._values[index:size + 1])
+
+    def extend(self, times, values=None):
+        """Add many events at once, in any order.
+
+        Events all newer than the log are appended in O(len(times));
+        otherwise the whole log is sorted again.
+        """
+        times = np.asarray(times, dtype=TIME_UNIT).ravel()
+        if values is None:
+            values = np.zeros(len(times))
+        values = np.asarray(values, dtype='f8').ravel()
+        if len(times) != len(values):
+            raise ValueError('Expected one value per time, got {} and {}'
+                             .format(len(times), len(values)))
+        order = np.argsort(times, kind='mergesort')
+        times, values = times[order], values[order]
+        size = self._size
+        if not size or not len(times) or times[0] >= self._times[size - 1]:
+            end = size + len(times)
+            self._grow(end)
+            self._times[size:end] = times
+            self._values[size:end] = values
+            self._sums[size + 1:end + 1] = \
+                self._sums[size] + np.cumsum(values)
+            self._size = end
+            return
+        times = np.concatenate([self.times, times])
+        values = np.concatenate([self.values, values])
+        order = np.argsort(times, kind='mergesort')
+        size = len(times)
+        self._grow(size)
+        self._times[:size] = times[order]
+        self._values[:size] = values[order]
+        self._sums[0] = 0.
+        np.cumsum(self._values[:size], out=self._sums[1:size + 1])
+        self._size = size
+
+    def _bounds(self, start=None, end=None):
+        """Return the indexes of the first event in and after [start, end)."""
+        first = 0 if start is None else \
+            int(np.searchsorted(self.times, to_time(start)))
+        last = self._size if end is None else \
+            int(np.searchsorted(self.times, to_time(end)))
+        return first, max(first, last)
+
+    def between(self, start=None, end=None):
+        """Return the (times, values) of the events in [start, end)."""
+        first, last = self._bounds(start, end)
+        return self._times[first:last], self._values[first:last]
+
+    def count(self, start=None, end=None):
+        """Return the number of events in [start, end)."""
+        first, last = self._bounds(start, end)
+        return last - first
+
+    def total(self, start=None, end=None):
+        """Return the sum of the values of the events in [start, end)."""
+        first, last = self._bounds(start, end)
+        return float(self._sums[last] - self._sums[first])
+
+    def aggregate(self, window, start=None, end=None):
+        """
+        Return the count and total of the events in consecutive windows.
+
+        window is a timedelta (datetime or numpy) for fixed width windows,
+        or one of CALENDAR_UNITS for calendar ones, e.g. 'M' for months.
+        Windows start at start, or the first event, and cover up to end,
+        or the last event. Returns Windows(starts, counts, totals) arrays.
+        """
+        if not self._size:
+            empty = np.empty(0)
+            return Windows(empty.astype(TIME_UNIT), empty.astype('i8'), empty)
+        start = self._times[0] if start is None else to_time(start)
+        end = self._times[self._size - 1] + 1 if end is None else to_time(end)
+        if window in CALENDAR_UNITS:
+            unit = 'datetime64[{}]'.format(window)
+            edges = np.arange(start.astype(unit), end.astype(unit) + 1,
+                              dtype=unit).astype(TIME_UNIT)
+            edges = np.concatenate([[start], edges[edges > start]])
+        else:
+            if isinstance(window, datetime.timedelta):
+                window = np.timedelta64(window)
+            edges = np.arange(start, end + window, window).astype(TIME_UNIT)
+        edges = edges[edges < end]
+        bounds = np.searchsorted(self.times, np.append(edges, end))
+        return Windows(edges, np.diff(bounds), np.diff(self._sums[bounds]))
+
+
+def events(graph, rel, node_a, node_b):
+    """Return the EventLog on a relationship, or None if it has none."""
+    return graph.get_relationship_properties(rel, node_a, node_b).get(EVENTS)
+
+
+def record(graph, rel, node_a, node_b, time, value=0.):
+    """Add an event to a relationship, adding the relationship if needed.
+
+    The event is added with extend_rel_prop(), which journals only the
+    new event on a JournaledGraph; calling EventLog.add() directly does
+    not journal it at all.
+    """
+    try:
+        properties = graph.get_relationship_properties(rel, node_a, node_b)
+    except KeyError:
+        graph.add_relationship(rel, node_a, node_b)
+        properties = graph.get_relationship_properties(rel, node_a, node_b)
+    times, values = np.array([to_time(time)]), [float(value)]
+    if EVENTS in properties:
+        graph.extend_rel_prop(rel, node_a, node_b, EVENTS, times, values)
+    else:
+        graph.add_rel_props(rel, node_a, node_b,
+                            **{EVENTS: EventLog(times, values)})
+
+
+def contacts(graph, node, start=None, end=None, rels=None, direction='both'):
+    """
+    Return the nodes node had events with in [start, end).
+
+    Maps each of them to the (count, total) of those events, over the
+    relationships named in rels (all by default) going out of node,
+    coming in, or 'both'.
+    """
+    found = {}
+    sides = {'out': (True,), 'in': (False,), 'both': (True, False)}[direction]
+    for outgoing in sides:
+        others = graph.get_neighbors(node) if outgoing else \
+            graph.is_neighbor_to(node)
+        for other in others:
+            pair = (node, other) if outgoing else (other, node)
+            for rel in graph.get_relationships(*pair):
+                if rels is not None and rel not in rels:
+                    continue
+                log = events(graph, rel, *pair)
+                if log is None:
+                    continue
+                count = log.count(start, end)
+                if count:
+                    seen, total = found.get(other, (0, 0.))
+                    found[other] = (seen + count, total + log.total(start, end))
+    return found
@@ -0,0 +1,178 @@
+"""
+Export of a graph as neighborhood chunks loaded on demand by the viewer.
+
+write_d3() ships the whole graph as one document, which the page has to
+download and parse before drawing anything. write_tiles() instead splits
+the graph around its hubs, the nodes with the most neighbors:
+
+    - every other node joins the neighborhood of its closest hub,
+      following relationships either way. In a connected part of the
+      graph out of reach of every hub, the busiest node becomes a hub
+      too, unless the part has fewer than min_size nodes: such small
+      parts, isolated nodes included, share one set of chunks instead,
+      under a placeholder hub named OTHERS;
+    - each neighborhood is written as chunk files of at most chunk_size
+      nodes, holding those nodes and every relationship touching them;
+    - index.json holds the overview: the hubs, the relationships between
+      them and the chunk files of every hub.
+
+So the page only loads index.json up front, whatever the size of the
+graph, and fetches a hub's chunks when the hub is clicked. The files use
+the schema of write_d3(), with hubs carrying two more keys, chunks and
+members. To use them, point docs/index.html at the index instead of
+scripting mega_phone_graph:
+
+    >>> write_tiles(lpg, 'docs/tiles', positions=layout(lpg))
+
+    <script>var phone_graph_index = 'tiles/index.json';</script>
+"""
+from collections import deque
+import json
+import os
+
+from .export import (link_dict, node_color, node_dict, node_radius,
+                     relationship_names)
+from .series import json_default
+
+
+INDEX = 'index.json'
+OTHERS = '(others)'
+MIN_SIZE = 10
+
+
+def _neighbors(graph, name):
+    """Return the nodes linked to name either way."""
+    neighbors = graph.get_neighbors(name)
+    seen = set(neighbors)
+    return neighbors + [node for node in graph.is_neighbor_to(name)
+                        if node not in seen]
+
+
+def _by_degree(graph):
+    """Return the nodes of graph, the most neighbors first."""
+    degrees = sorted((-len(_neighbors(graph, name)), name)
+                     for name in graph.nodes())
+    return [name for _, name in degrees]
+
+
+def choose_hubs(graph, count=32):
+    """Return the count nodes with the most neighbors, busiest first."""
+    return _by_degree(graph)[:count]
+
+
+def partition(graph, hubs, min_size=MIN_SIZE):
+    """
+    Return {hub: members} splitting the other nodes between the hubs.
+
+    Each node goes to the hub it is fewest hops from, in breadth-first
+    order, so members are listed closest first. The busiest node of every
+    part of the graph none of the hubs reaches is made a hub too, after
+    the given ones, if the part has at least min_size nodes. The nodes of
+    smaller parts are listed last, under None.
+    """
+    owner = {}
+    members = {}
+    for hub in hubs:
+        owner[hub] = hub
+        members.setdefault(hub, [])
+    _spread(graph, list(members), owner, members)
+    others = []
+    for name in _by_degree(graph):
+        if name not in owner:
+            owner[name] = name
+            members[name] = []
+            _spread(graph, [name], owner, members)
+            if len(members[name]) + 1 < min_size:
+                others.append(name)
+                others.extend(members.pop(name))
+    if others:
+        members[None] = others
+    return members
+
+
+def _spread(graph, names, owner, members):
+    """Give the nodes reached from names, breadth first, to their hubs."""
+    queue = deque(names)
+    while queue:
+        name = queue.popleft()
+        hub = owner[name]
+        for neighbor in _neighbors(graph, name):
+            if neighbor not in owner:
+                owner[neighbor] = hub
+                members[hub].append(neighbor)
+                queue.append(neighbor)
+
+
+def _chunk(graph, hub, names, properties, color, positions):
+    """Return the document of a chunk of hub's members."""
+    inside = set(names)
+    links = {name: [] for name in relationship_names(graph)}
+    for name in names:
+        for target in graph.get_neighbors(name):
+            for rel in graph.get_relationships(name, target):
+                links[rel].append(link_dict(graph, rel, name, target,
+                                            properties))
+        for source in graph.is_neighbor_to(name):
+            if source in inside:
+                continue
+            for rel in graph.get_relationships(source, name):
+                links[rel].append(link_dict(graph, rel, source, name,
+                                            properties))
+    return {'hub': hub,
+            'nodes': [node_dict(graph, name, color, positions)
+                      for name in names],
+            'links': links}
+
+
+def _write(path, text):
+    """Write text to path through a temporary file."""
+    partial = path + '.partial'
+    with open(partial, 'w') as handle:
+        handle.write(text)
+    os.replace(partial, path)
+
+
+def write_tiles(graph, directory, hubs=None, hub_count=32, chunk_size=5000,
+                properties=None, color=node_color, positions=None,
+                min_size=MIN_SIZE):
+    """
+    Write the index and chunk files of graph into directory.
+
+    hubs defaults to the hub_count busiest nodes; min_size is that of
+    partition(). properties, color and positions are those of write_d3().
+    Returns the index document.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    members = partition(graph, choose_hubs(graph, hub_count)
+                        if hubs is None else list(hubs), min_size)
+    hubs = list(members)
+    encoder = json.JSONEncoder(default=json_default(summaries=False))
+    index = {'nodes': [], 'links': {name: [] for name in
+                                    relationship_names(graph)}}
+    is_hub = set(hubs)
+    for number, hub in enumerate(hubs):
+        names = members[hub]
+        files = []
+        for start in range(0, len(names), chunk_size):
+            filename = 'chunk_{}_{}.json'.format(number, start // chunk_size)
+            _write(os.path.join(directory, filename), encoder.encode(_chunk(
+                graph, OTHERS if hub is None else hub,
+                names[start:start + chunk_size], properties, color,
+                positions)))
+            files.append(filename)
+        if hub is None:
+            node = {'id': OTHERS, 'color': 'grey',
+                    'radius': node_radius(len(names))}
+        else:
+            node = node_dict(graph, hub, color, positions)
+            for target in graph.get_neighbors(hub):
+                if target in is_hub:
+                    for rel in graph.get_relationships(hub, target):
+                        index['links'][rel].append(
+                            link_dict(graph, rel, hub, target, properties))
+        node['chunks'] = files
+        node['members'] = len(names)
+        index['nodes'].append(node)
+    _write(os.path.join(directory, INDEX), encoder.encode(index))
+    return index
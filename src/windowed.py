@@ -0,0 +1,213 @@
+"""
+Rolling time window over the labeled property graph.
+
+A WindowedGraph only holds the events of the last window (90 days by
+default). Every event added with add_event() bumps the Count and Total
+properties of its relationship and the degree counts of its nodes, and is
+pushed on a heap ordered by time. advance() moves the clock forward and
+pops the events that fell out of the window, taking them back off their
+relationship. A relationship whose last event expires is removed, and so
+is a node left without relationships, so a daily advance costs
+O(expired + new events) instead of rebuilding the graph from its whole
+history:
+
+    >>> graph = WindowedGraph(window=np.timedelta64(90, 'D'))
+    >>> for day, events in days:
+    ...     graph.advance(day)
+    ...     for rel, source, target, time, value in events:
+    ...         graph.add_event(rel, source, target, time, value)
+"""
+import datetime
+import heapq
+import itertools
+
+import numpy as np
+
+from .labeled_property_graph import LabeledPropertyGraph
+from .temporal import to_time
+
+
+COUNT = 'Count'
+TOTAL = 'Total'
+
+
+def _seconds(time):
+    """Return a time as integer seconds since the epoch."""
+    return int(to_time(time).astype('i8'))
+
+
+class WindowedGraph(LabeledPropertyGraph):
+    """Graph of the events in a window of time ending at now."""
+
+    def __init__(self, window=np.timedelta64(90, 'D'), now=None):
+        """
+        Initialize an empty graph keeping events for window.
+
+        window is a datetime or numpy timedelta. Events older than
+        now - window are evicted; now starts at the first event added
+        unless given.
+
+        _events is a heap of (seconds, sequence, rel, node_a, node_b,
+        value, relationship) and _degrees maps each node to its [out, in]
+        number of relationships.
+        """
+        LabeledPropertyGraph.__init__(self)
+        if isinstance(window, datetime.timedelta):
+            window = np.timedelta64(window)
+        self.window = int(window.astype('timedelta64[s]').astype('i8'))
+        self._now = None if now is None else _seconds(now)
+        self._events = []
+        self._sequence = itertools.count()
+        self._degrees = {}
+
+    @property
+    def now(self):
+        """Return the end of the window as a numpy datetime64."""
+        return None if self._now is None else np.datetime64(self._now, 's')
+
+    @property
+    def start(self):
+        """Return the oldest time still inside the window."""
+        if self._now is None:
+            return None
+        return np.datetime64(self._now - self.window, 's')
+
+    def event_count(self):
+        """Return the number of events in the window."""
+        return len(self._events)
+
+    def add_node(self, name):
+        """Add a node with no relationships."""
+        LabeledPropertyGraph.add_node(self, name)
+        self._degrees[name] = [0, 0]
+
+    def add_relationship(self, name, node_a, node_b, both_ways=False):
+        """Add a relationship and count it in the degrees of its nodes."""
+        LabeledPropertyGraph.add_relationship(self, name, node_a, node_b,
+                                              both_ways)
+        pairs = [(node_a, node_b), (node_b, node_a)] if both_ways else \
+            [(node_a, node_b)]
+        for source, target in pairs:
+            self._degrees[source][0] += 1
+            self._degrees[target][1] += 1
+
+    def remove_relationship(self, name, node_a, node_b):
+        """Remove a relationship, unlinking the nodes if it was the last."""
+        LabeledPropertyGraph.remove_relationship(self, name, node_a, node_b)
+        if node_a not in self._relationships[name]:
+            if not self._relationships[name]:
+                del self._relationships[name]
+        if not self._graph[node_a][node_b]:
+            del self._graph[node_a][node_b]
+            del self._incoming[node_b][node_a]
+        self._degrees[node_a][0] -= 1
+        self._degrees[node_b][1] -= 1
+
+    def remove_node(self, name):
+        """Remove a node and take its relationships off its neighbors."""
+        rels = set()
+        for target, links in self._graph[name].items():
+            self._degrees[target][1] -= len(links)
+            rels.update(links)
+        for source, links in self._incoming[name].items():
+            self._degrees[source][0] -= len(links)
+            rels.update(links)
+        LabeledPropertyGraph.remove_node(self, name)
+        del self._degrees[name]
+        for rel in rels:
+            if not self._relationships[rel]:
+                del self._relationships[rel]
+
+    def add_event(self, rel, node_a, node_b, time, value=0.):
+        """
+        Add an event from node_a to node_b, adding what is missing.
+
+        Returns False, and changes nothing, if the event is already older
+        than the window.
+        """
+        seconds = _seconds(time)
+        if self._now is None:
+            self._now = seconds
+        elif seconds < self._now - self.window:
+            return False
+        for node in (node_a, node_b):
+            if node not in self._nodes:
+                self.add_node(node)
+        try:
+            relationship = self._relationships[rel][node_a][node_b]
+        except KeyError:
+            self.add_relationship(rel, node_a, node_b)
+            relationship = self._relationships[rel][node_a][node_b]
+        properties = relationship.properties
+        self._bump(rel, node_a, node_b, {
+            COUNT: properties.get(COUNT, 0) + 1,
+            TOTAL: properties.get(TOTAL, 0.) + value})
+        heapq.heappush(self._events, (seconds, next(self._sequence), rel,
+                                      node_a, node_b, value, relationship))
+        return True
+
+    def _bump(self, rel, node_a, node_b, values):
+        """Set relationship properties through the graph's mutators.
+
+        Going through change_rel_prop() and add_rel_props() keeps the
+        cache versions and the change feeds up to date.
+        """
+        properties = self._relationships[rel][node_a][node_b].properties
+        new = {}
+        for key, value in values.items():
+            if key in properties:
+                self.change_rel_prop(rel, node_a, node_b, key, value)
+            else:
+                new[key] = value
+        if new:
+            self.add_rel_props(rel, node_a, node_b, **new)
+
+    def advance(self, now):
+        """Move the end of the window to now and evict expired events.
+
+        Returns the number of events evicted.
+        """
+        seconds = _seconds(now)
+        if self._now is not None and seconds < self._now:
+            raise ValueError('Cannot move the window back from {} to {}'
+                             .format(self.now, np.datetime64(seconds, 's')))
+        self._now = seconds
+        cutoff = seconds - self.window
+        evicted = 0
+        while self._events and self._events[0][0] < cutoff:
+            self._expire(*heapq.heappop(self._events)[2:])
+            evicted += 1
+        return evicted
+
+    def _expire(self, rel, node_a, node_b, value, relationship):
+        """Take an evicted event back off its relationship.
+
+        Events whose relationship was removed in the meantime are ignored.
+        """
+        try:
+            if self._relationships[rel][node_a][node_b] is not relationship:
+                return
+        except KeyError:
+            return
+        properties = relationship.properties
+        if properties[COUNT] > 1:
+            self._bump(rel, node_a, node_b, {
+                COUNT: properties[COUNT] - 1,
+                TOTAL: properties[TOTAL] - value})
+            return
+        self.remove_relationship(rel, node_a, node_b)
+        for node in (node_a, node_b):
+            if node in self._degrees and self._degrees[node] == [0, 0]:
+                self.remove_node(node)
+
+    def out_degree(self, node):
+        """Return the number of relationships leaving node."""
+        return self._degrees[node][0]
+
+    def in_degree(self, node):
+        """Return the number of relationships arriving at node."""
+        return self._degrees[node][1]
+
+    def degree(self, node):
+        """Return the number of relationships node takes part in."""
+        return sum(self._degrees[node])
@@ -0,0 +1,162 @@
+"""Test paths and centrality of a graph."""
+
+import random
+
+import pytest
+
+
+@pytest.fixture
+def chain_lpg():
+    """Kurt -> Mom -> Dad -> Grandma, plus Spam -> Kurt and Mom -> Kurt."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    names = ['Kurt', 'Mom', 'Dad', 'Grandma', 'Spam']
+    for node in names:
+        lpg.add_node(node)
+    for node_a, node_b in zip(names[:3], names[1:4]):
+        lpg.add_relationship('Text', node_a, node_b)
+    lpg.add_relationship('Talk', 'Spam', 'Kurt')
+    lpg.add_relationship('Talk', 'Mom', 'Kurt')
+    return lpg
+
+
+def _random_lpg(count, edges, seed):
+    """Return a random graph of count nodes."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    rand = random.Random(seed)
+    lpg = LabeledPropertyGraph()
+    for node in range(count):
+        lpg.add_node(str(node))
+    pairs = set()
+    while len(pairs) < edges:
+        pairs.add(tuple(rand.sample(range(count), 2)))
+    for node_a, node_b in sorted(pairs):
+        lpg.add_relationship('Text', str(node_a), str(node_b))
+    return lpg
+
+
+def _brute_betweenness(lpg, direction):
+    """Return unnormalized betweenness counted from pairwise distances."""
+    from ..src.analytics import neighbors
+    names = lpg.nodes()
+    distance, paths = {}, {}
+    for source in names:
+        distance[source], paths[source] = {source: 0}, {source: 1}
+        frontier = [source]
+        while frontier:
+            reached = []
+            for node in frontier:
+                for other in neighbors(lpg, node, direction):
+                    if other not in distance[source]:
+                        distance[source][other] = distance[source][node] + 1
+                        paths[source][other] = 0
+                        reached.append(other)
+                    if distance[source][other] == \
+                            distance[source][node] + 1:
+                        paths[source][other] += paths[source][node]
+            frontier = reached
+    scores = dict.fromkeys(names, 0.)
+    for source in names:
+        for target in distance[source]:
+            for node in names:
+                if node in (source, target) or \
+                        node not in distance[source] or \
+                        target not in distance[node]:
+                    continue
+                if distance[source][node] + distance[node][target] == \
+                        distance[source][target]:
+                    scores[node] += float(paths[source][node] *
+                                          paths[node][target]) / \
+                        paths[source][target]
+    return scores
+
+
+def test_neighbors_directions(chain_lpg):
+    """Ensure each direction follows the right relationships, once."""
+    from ..src.analytics import neighbors
+    assert neighbors(chain_lpg, 'Kurt') == ['Mom']
+    assert sorted(neighbors(chain_lpg, 'Kurt', 'in')) == ['Mom', 'Spam']
+    assert sorted(neighbors(chain_lpg, 'Kurt', 'both')) == ['Mom', 'Spam']
+    with pytest.raises(ValueError):
+        neighbors(chain_lpg, 'Kurt', 'up')
+
+
+def test_neighborhood(chain_lpg):
+    """Ensure nodes are found up to k hops, nearest first."""
+    from ..src.analytics import neighborhood
+    assert neighborhood(chain_lpg, 'Kurt', 0) == ['Kurt']
+    found = neighborhood(chain_lpg, 'Kurt', 2)
+    assert found[0] == 'Kurt'
+    assert set(found[1:3]) == {'Mom', 'Spam'}
+    assert found[3:] == ['Dad']
+    with pytest.raises(KeyError):
+        neighborhood(chain_lpg, 'Nobody')
+
+
+def test_shortest_path(chain_lpg):
+    """Ensure paths follow the direction asked for."""
+    from ..src.analytics import shortest_path
+    assert shortest_path(chain_lpg, 'Kurt', 'Grandma') == \
+        ['Kurt', 'Mom', 'Dad', 'Grandma']
+    assert shortest_path(chain_lpg, 'Kurt', 'Kurt') == ['Kurt']
+    assert shortest_path(chain_lpg, 'Grandma', 'Kurt') is None
+    assert shortest_path(chain_lpg, 'Grandma', 'Kurt', 'in') == \
+        ['Grandma', 'Dad', 'Mom', 'Kurt']
+    assert shortest_path(chain_lpg, 'Spam', 'Grandma', 'both') == \
+        ['Spam', 'Kurt', 'Mom', 'Dad', 'Grandma']
+    with pytest.raises(KeyError):
+        shortest_path(chain_lpg, 'Kurt', 'Nobody')
+
+
+def test_degree_centrality(chain_lpg):
+    """Ensure degrees are shares of the other nodes."""
+    from ..src.analytics import degree_centrality
+    scores = degree_centrality(chain_lpg)
+    assert scores['Kurt'] == scores['Mom'] == .5
+    assert scores['Grandma'] == .25
+    assert degree_centrality(chain_lpg, 'out')['Spam'] == .25
+
+
+def test_betweenness_of_a_chain(chain_lpg):
+    """Ensure the known scores of the chain, directed and not."""
+    from ..src.analytics import betweenness_centrality
+    scores = betweenness_centrality(chain_lpg, normalized=False)
+    assert scores == {'Kurt': 3., 'Mom': 4., 'Dad': 3., 'Grandma': 0.,
+                      'Spam': 0.}
+    scores = betweenness_centrality(chain_lpg, 'both', normalized=False)
+    assert scores == {'Kurt': 3., 'Mom': 4., 'Dad': 3., 'Grandma': 0.,
+                      'Spam': 0.}
+    assert betweenness_centrality(chain_lpg)['Mom'] == pytest.approx(4. / 12)
+
+
+@pytest.mark.parametrize('direction', ['out', 'in', 'both'])
+def test_betweenness_matches_brute_force(direction):
+    """Ensure Brandes' algorithm agrees with counting paths pairwise."""
+    from ..src.analytics import betweenness_centrality
+    lpg = _random_lpg(30, 60, seed=1)
+    scores = betweenness_centrality(lpg, direction, normalized=False)
+    expected = _brute_betweenness(lpg, direction)
+    if direction == 'both':
+        expected = {node: score / 2 for node, score in expected.items()}
+    assert scores == pytest.approx(expected)
+
+
+def test_sampled_betweenness():
+    """Ensure sampling every node is exact and fewer nodes estimate."""
+    from ..src.analytics import betweenness_centrality, top
+    lpg = _random_lpg(200, 600, seed=2)
+    exact = betweenness_centrality(lpg)
+    assert betweenness_centrality(lpg, sample=200) == pytest.approx(exact)
+    estimate = betweenness_centrality(lpg, sample=100, seed=3)
+    assert estimate != exact
+    assert sum(estimate.values()) == pytest.approx(sum(exact.values()),
+                                                   rel=.2)
+    leaders = {node for node, _ in top(exact, 10)}
+    assert len(leaders & {node for node, _ in top(estimate, 10)}) >= 5
+
+
+def test_top():
+    """Ensure the highest scores come first, ties by name."""
+    from ..src.analytics import top
+    assert top({'a': 1, 'b': 3, 'c': 3, 'd': 0}, 3) == \
+        [('b', 3), ('c', 3), ('a', 1)]
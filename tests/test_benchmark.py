@@ -0,0 +1,73 @@
+"""Test the graph operation benchmarks."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def report():
+    """Small benchmark report of both implementations."""
+    from ..src.benchmark import run
+    return run(sizes=(200, 400), queries=20)
+
+
+def test_run(report):
+    """Ensure every implementation and size has a result."""
+    from ..src.benchmark import OPERATIONS
+    assert [(result['implementation'], result['edges'])
+            for result in report['results']] == [
+        ('labeled', 200), ('refactor', 200),
+        ('labeled', 400), ('refactor', 400)]
+    for result in report['results']:
+        assert set(result['ops_per_sec']) == set(OPERATIONS)
+        assert all(speed > 0 for speed in result['ops_per_sec'].values())
+        assert result['memory_bytes'] > 0
+    assert json.loads(json.dumps(report)) == report
+
+
+def test_implementations_agree():
+    """Ensure both implementations see the same neighbors."""
+    from ..src.benchmark import IMPLEMENTATIONS, _build
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=300, seed=2)
+    graphs = {name: _build(implementation, network)[0]
+              for name, implementation in IMPLEMENTATIONS.items()}
+    for node in network.nodes[:10]:
+        neighbors = [sorted(IMPLEMENTATIONS[name].neighbors(graph, node))
+                     for name, graph in graphs.items()]
+        assert neighbors[0] == neighbors[1]
+
+
+def test_compare(report):
+    """Ensure slower operations and bigger graphs are flagged."""
+    from ..src.benchmark import compare
+    assert compare(report, report) == []
+    slower = json.loads(json.dumps(report))
+    result = slower['results'][0]
+    result['ops_per_sec']['neighbors'] /= 2
+    result['memory_bytes'] *= 2
+    regressions = compare(slower, report, tolerance=0.2)
+    assert [regression[:3] for regression in regressions] == [
+        ('labeled', 200, 'neighbors'), ('labeled', 200, 'memory_bytes')]
+    assert compare(slower, report, tolerance=1.1) == []
+
+
+def test_main(tmpdir, capsys):
+    """Ensure the command line saves reports and exits 1 on regressions."""
+    from ..src.benchmark import main
+    output = str(tmpdir.join('report.json'))
+    assert main(['--sizes', '100', '--implementation', 'refactor',
+                 '--queries', '5', '--no-memory', '--output', output]) == 0
+    with open(output) as handle:
+        saved = json.load(handle)
+    assert [result['implementation'] for result in saved['results']] == \
+        ['refactor']
+    assert saved['results'][0]['memory_bytes'] is None
+    for operation in saved['results'][0]['ops_per_sec']:
+        saved['results'][0]['ops_per_sec'][operation] = 1e12
+    with open(output, 'w') as handle:
+        json.dump(saved, handle)
+    assert main(['--sizes', '100', '--implementation', 'refactor',
+                 '--queries', '5', '--no-memory', '--baseline', output]) == 1
+    assert 'REGRESSION refactor' in capsys.readouterr().out
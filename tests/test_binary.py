@@ -0,0 +1,130 @@
+"""Test the binary export for the viewer."""
+
+import math
+import os
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Phone graph with talks, texts and a non-ASCII name."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', u'Zo\xeb', '(205) 263-1951']:
+        lpg.add_node(node)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Kurt', u'Zo\xeb')
+    lpg.add_relationship('Text', '(205) 263-1951', 'Kurt')
+    lpg.add_rel_props('Talk', 'Kurt', u'Zo\xeb', Count=2,
+                      Duration=[1.5, 3.0])
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=12)
+    return lpg
+
+
+def _edges(contents):
+    """Return {(name, source, target): values} of read contents."""
+    nodes, types = contents['nodes'], contents['types']
+    return {(types[kind], nodes[source], nodes[target]):
+            tuple(contents['values'][column][position]
+                  for column in contents['columns'])
+            for position, (source, target, kind) in enumerate(zip(
+                contents['sources'], contents['targets'],
+                contents['edge_types']))}
+
+
+def test_round_trip(phone_lpg, tmpdir):
+    """Ensure the names, nodes and edges read back as written."""
+    from ..src.binary import read_binary, write_binary
+    path = str(tmpdir.join('graph.bin'))
+    assert write_binary(phone_lpg, path, columns=('Count', 'Duration')) == \
+        (4, 4)
+    contents = read_binary(path)
+    assert contents['nodes'] == phone_lpg.nodes()
+    assert contents['types'] == ['Text', 'Talk']
+    assert [contents['colors'][index] for index in contents['node_colors']] \
+        == ['blue', 'green', 'green', 'grey']
+    assert contents['radius'].tolist() == [2, 2, 2, 2]
+    assert contents['x'] is None
+    edges = _edges(contents)
+    assert edges[('Talk', 'Kurt', u'Zo\xeb')] == (2, 4.5)
+    assert edges[('Text', 'Kurt', 'Mom')][0] == 12
+    assert all(math.isnan(value) for value in
+               edges[('Text', 'Mom', 'Kurt')])
+    assert set(edges) == {('Text', 'Kurt', 'Mom'), ('Text', 'Mom', 'Kurt'),
+                          ('Talk', 'Kurt', u'Zo\xeb'),
+                          ('Text', '(205) 263-1951', 'Kurt')}
+
+
+def test_positions_and_alignment(phone_lpg, tmpdir):
+    """Ensure positions are written and every section is 4-byte aligned."""
+    from ..src.binary import read_binary, write_binary
+    path = str(tmpdir.join('graph.bin'))
+    positions = {name: (index * 10., index + .5)
+                 for index, name in enumerate(phone_lpg.nodes())}
+    write_binary(phone_lpg, path, positions=positions)
+    contents = read_binary(path)
+    assert contents['x'].tolist() == [0., 10., 20., 30.]
+    assert contents['y'].tolist() == [.5, 1.5, 2.5, 3.5]
+    for key in ('node_colors', 'radius', 'x', 'y', 'sources', 'targets',
+                'edge_types'):
+        base = np.frombuffer(contents[key].base, 'u1')
+        offset = contents[key].__array_interface__['data'][0] - \
+            base.__array_interface__['data'][0]
+        assert offset % 4 == 0
+    assert os.path.getsize(path) % 4 == 0
+
+
+def test_smaller_than_json(tmpdir):
+    """Ensure the binary export is several times smaller than the JSON."""
+    from ..src.binary import write_binary
+    from ..src.export import write_d3
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=2000)
+    lpg = LabeledPropertyGraph()
+    for node in network.nodes:
+        lpg.add_node(node)
+    for rel, node_a, node_b in network.relationships():
+        lpg.add_relationship(rel, node_a, node_b)
+        lpg.add_rel_props(rel, node_a, node_b, Count=1)
+    binary, document = str(tmpdir.join('g.bin')), str(tmpdir.join('g.json'))
+    write_binary(lpg, binary)
+    write_d3(lpg, document, properties=['Count'])
+    assert os.path.getsize(document) > 4 * os.path.getsize(binary)
+
+
+def test_not_an_export(tmpdir):
+    """Ensure other files are refused."""
+    from ..src.binary import read_binary
+    path = tmpdir.join('graph.bin')
+    path.write_binary(b'\0' * 64)
+    with pytest.raises(ValueError):
+        read_binary(str(path))
+
+
+def test_too_many_indexed_values(tmpdir):
+    """Ensure more types or colors than a byte indexes are refused."""
+    from ..src.binary import MAX_INDEXED, read_binary, write_binary
+    from ..src.export import RELATIONSHIPS
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    lpg.add_node('Kurt')
+    lpg.add_node('Mom')
+    for rel in range(MAX_INDEXED - len(RELATIONSHIPS)):
+        lpg.add_relationship('Rel {}'.format(rel), 'Kurt', 'Mom')
+    path = tmpdir.join('graph.bin')
+    write_binary(lpg, str(path), columns=())
+    assert len(read_binary(str(path))['types']) == MAX_INDEXED
+    lpg.add_relationship('One too many', 'Kurt', 'Mom')
+    with pytest.raises(ValueError):
+        write_binary(lpg, str(tmpdir.join('types.bin')))
+    lpg = LabeledPropertyGraph()
+    for node in range(MAX_INDEXED + 1):
+        lpg.add_node(node)
+    with pytest.raises(ValueError):
+        write_binary(lpg, str(tmpdir.join('colors.bin')),
+                     color=lambda name: '#{:06x}'.format(name))
+    assert not tmpdir.join('types.bin').exists()
+    assert not tmpdir.join('colors.bin').exists()
@@ -0,0 +1,135 @@
+"""Test the mutation-aware query cache."""
+
+import pytest
+
+
+@pytest.fixture
+def lpg():
+    """Small graph with a couple of relationships."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', 'Grandma']:
+        lpg.add_node(node)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Dad', 'Grandma')
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=1)
+    return lpg
+
+
+@pytest.fixture
+def cache(lpg):
+    """Query cache over lpg."""
+    from ..src.cache import QueryCache
+    return QueryCache(lpg, maxsize=8)
+
+
+def test_repeated_read_hits(cache):
+    """Ensure a repeated read is served from the cache."""
+    assert cache.get_neighbors('Kurt') == ['Mom']
+    assert cache.get_neighbors('Kurt') == ['Mom']
+    assert cache.info()['hits'] == 1
+    assert cache.info()['misses'] == 1
+
+
+def test_add_relationship_invalidates_endpoints(lpg, cache):
+    """Ensure only entries of the touched nodes are recomputed."""
+    cache.get_neighbors('Kurt')
+    cache.get_neighbors('Dad')
+    cache.is_neighbor_to('Grandma')
+    lpg.add_relationship('Talk', 'Kurt', 'Grandma')
+    assert cache.get_neighbors('Kurt') == ['Mom', 'Grandma']
+    assert cache.is_neighbor_to('Grandma') == ['Dad', 'Kurt']
+    assert cache.get_neighbors('Dad') == ['Grandma']
+    assert cache.info()['hits'] == 1
+
+
+def test_remove_node_invalidates_neighbors(lpg, cache):
+    """Ensure removing a node refreshes its neighbors' entries."""
+    assert cache.get_neighbors('Mom') == ['Kurt']
+    assert cache.nodes() == ['Kurt', 'Mom', 'Dad', 'Grandma']
+    lpg.remove_node('Kurt')
+    assert cache.get_neighbors('Mom') == []
+    assert cache.nodes() == ['Mom', 'Dad', 'Grandma']
+
+
+def test_property_setters_invalidate(lpg, cache):
+    """Ensure node and relationship property changes are seen."""
+    assert cache.get_node_properties('Dad') == {}
+    assert cache.has_relationship('Kurt', 'Mom', 'Text')
+    lpg.add_node_props('Dad', color='green')
+    lpg['Mom'].add_property('color', 'green')
+    assert cache.get_node_properties('Dad') == {'color': 'green'}
+    assert cache.get_node_properties('Mom') == {'color': 'green'}
+    lpg.remove_relationship('Text', 'Kurt', 'Mom')
+    assert not cache.has_relationship('Kurt', 'Mom', 'Text')
+
+
+def test_whole_graph_entries(lpg, cache):
+    """Ensure entries without node dependencies follow every mutation."""
+    assert cache.unique_relationships() == ['Text', 'Talk']
+    lpg.add_relationship('Spam', 'Grandma', 'Dad')
+    assert cache.unique_relationships() == ['Text', 'Talk', 'Spam']
+    assert sorted(cache.nodes_with_relationship('Spam')) == ['Grandma']
+
+
+def test_lru_eviction(cache):
+    """Ensure the least recently used entry is evicted first."""
+    for node in ['Kurt', 'Mom', 'Dad', 'Grandma']:
+        cache.get_neighbors(node)
+        cache.is_neighbor_to(node)
+    cache.get_neighbors('Kurt')
+    cache.get_node_properties('Kurt')
+    assert len(cache) == 8
+    cache.get_neighbors('Kurt')
+    cache.is_neighbor_to('Kurt')
+    assert cache.info()['hits'] == 2
+
+
+def test_memoize(lpg, cache):
+    """Ensure memoized analytics are cached and invalidated."""
+    calls = []
+
+    @cache.memoize(depends=lambda node: [node])
+    def degree(node):
+        calls.append(node)
+        return len(lpg.get_neighbors(node)) + len(lpg.is_neighbor_to(node))
+
+    @cache.memoize()
+    def edge_count():
+        calls.append('edges')
+        return sum(len(rels) for targets in lpg._graph.values()
+                   for rels in targets.values())
+
+    assert (degree('Kurt'), degree('Kurt'), edge_count(), edge_count()) == \
+        (2, 2, 3, 3)
+    assert calls == ['Kurt', 'edges']
+    lpg.add_relationship('Talk', 'Grandma', 'Dad')
+    assert (degree('Kurt'), edge_count()) == (2, 4)
+    assert calls == ['Kurt', 'edges', 'edges']
+    assert degree.__name__ == 'degree'
+
+
+def test_memoize_same_names(cache):
+    """Ensure functions sharing a name keep separate entries."""
+    class Texts:
+        def count(self):
+            """Return which class counted."""
+            return 'texts'
+
+    class Talks:
+        def count(self):
+            """Return which class counted."""
+            return 'talks'
+
+    texts = cache.memoize()(Texts().count)
+    talks = cache.memoize()(Talks().count)
+    first = cache.memoize()(lambda: 1)
+    second = cache.memoize()(lambda: 2)
+    assert (texts(), talks(), first(), second()) == ('texts', 'talks', 1, 2)
+
+
+def test_clear(cache):
+    """Ensure clear drops entries and counters."""
+    cache.get_neighbors('Kurt')
+    cache.clear()
+    assert cache.info() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 8}
@@ -0,0 +1,118 @@
+"""Test the change feed of the labeled property graph."""
+
+import pytest
+
+
+@pytest.fixture
+def lpg():
+    """Graph with two nodes."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    lpg.add_node('Kurt')
+    lpg.add_node('Mom')
+    return lpg
+
+
+@pytest.fixture
+def feed(lpg):
+    """Change feed attached to lpg after its nodes were added."""
+    from ..src.changes import ChangeFeed
+    return ChangeFeed(lpg, maxlen=5)
+
+
+def _kinds(changes):
+    """Return the (kind, node, other, name, key, value) of changes."""
+    return [change[1:] for change in changes]
+
+
+def test_node_changes(lpg, feed):
+    """Ensure node, label and property changes are reported in order."""
+    lpg.add_node('Dad')
+    lpg['Dad'].add_label('Subscriber')
+    lpg.add_node_props('Dad', color='blue')
+    lpg.change_node_prop('Dad', 'color', 'green')
+    lpg.remove_node_prop('Dad', 'color')
+    assert _kinds(feed.since(0)) == [
+        ('add_node', 'Dad', None, None, None, None),
+        ('add_node_label', 'Dad', None, None, 'Subscriber', None),
+        ('set_node_property', 'Dad', None, None, 'color', 'blue'),
+        ('set_node_property', 'Dad', None, None, 'color', 'green'),
+        ('remove_node_property', 'Dad', None, None, 'color', None)]
+    assert [change.sequence for change in feed.since(0)] == [1, 2, 3, 4, 5]
+
+
+def test_relationship_changes(lpg, feed):
+    """Ensure relationship and relationship property changes are reported."""
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=1)
+    lpg.change_rel_prop('Text', 'Kurt', 'Mom', 'Count', 2)
+    lpg.remove_rel_prop('Text', 'Kurt', 'Mom', 'Count')
+    lpg.remove_relationship('Text', 'Mom', 'Kurt')
+    assert _kinds(feed.since(1)) == [
+        ('add_relationship', 'Mom', 'Kurt', 'Text', None, None),
+        ('set_relationship_property', 'Kurt', 'Mom', 'Text', 'Count', 1),
+        ('set_relationship_property', 'Kurt', 'Mom', 'Text', 'Count', 2),
+        ('remove_relationship_property', 'Kurt', 'Mom', 'Text', 'Count',
+         None),
+        ('remove_relationship', 'Mom', 'Kurt', 'Text', None, None)]
+
+
+def test_remove_node_reports_relationships(lpg, feed):
+    """Ensure removing a node reports its relationships going first."""
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_node_props('Mom', color='blue')
+    seen = feed.sequence
+    lpg.remove_node('Mom')
+    assert _kinds(feed.since(seen)) == [
+        ('remove_relationship', 'Mom', 'Kurt', 'Text', None, None),
+        ('remove_relationship', 'Kurt', 'Mom', 'Text', None, None),
+        ('remove_node', 'Mom', None, None, None, None)]
+
+
+def test_remove_node_reported_after_removal(lpg, feed):
+    """Ensure subscribers see the node gone when told of its removal."""
+    lpg.add_relationship('Text', 'Kurt', 'Mom')
+    seen = []
+    feed.subscribe(lambda change: seen.append(
+        (change[1], 'Mom' in lpg.nodes(), lpg.get_neighbors('Kurt'))))
+    lpg.remove_node('Mom')
+    assert seen == [('remove_relationship', False, []),
+                    ('remove_node', False, [])]
+    with pytest.raises(KeyError):
+        lpg.remove_node('Mom')
+    assert len(seen) == 2
+
+
+def test_catch_up(lpg, feed):
+    """Ensure consumers catch up from their last sequence number."""
+    lpg.add_node('Dad')
+    seen = feed.sequence
+    assert feed.since(seen) == []
+    lpg.add_node('Grandma')
+    assert [change.node for change in feed.since(seen)] == ['Grandma']
+    for node in ['A', 'B', 'C', 'D']:
+        lpg.add_node(node)
+    assert len(feed) == 5
+    assert feed.oldest == 2
+    assert [change.node for change in feed.since(1)] == \
+        ['Grandma', 'A', 'B', 'C', 'D']
+    with pytest.raises(ValueError):
+        feed.since(0)
+
+
+def test_subscribe(lpg, feed):
+    """Ensure subscribers see every change until they unsubscribe."""
+    seen = []
+    callback = feed.subscribe(seen.append)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    feed.unsubscribe(callback)
+    lpg.add_node('Dad')
+    assert [change.kind for change in seen] == ['add_relationship']
+
+
+def test_close(lpg, feed):
+    """Ensure a closed feed no longer hears about changes."""
+    feed.close()
+    lpg.add_node('Dad')
+    assert feed.sequence == 0
+    assert lpg._feeds == []
@@ -0,0 +1,134 @@
+"""Test the coarsened levels of detail of the graph."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Two subscribers, a contact and numbers from two area codes."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951', '(205) 555-0100',
+                 '(206) 555-0199', '(206) 555-0142']:
+        lpg.add_node(node)
+    lpg['Kurt'].add_label('Subscriber')
+    lpg.add_node_props('Dad', color='green')
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    lpg.add_relationship('Talk', 'Kurt', 'Dad')
+    lpg.add_relationship('Talk', 'Kurt', '(205) 263-1951')
+    lpg.add_relationship('Talk', '(205) 555-0100', 'Kurt')
+    lpg.add_relationship('Text', 'Kurt', '(206) 555-0199')
+    lpg.add_relationship('Talk', 'Mom', '(206) 555-0142')
+    lpg.add_relationship('Talk', 'Dad', '(206) 555-0142')
+    lpg.add_rel_props('Talk', 'Kurt', '(205) 263-1951', Count=2,
+                      Duration=[1.5, 3.0])
+    lpg.add_rel_props('Talk', '(205) 555-0100', 'Kurt', Count=1,
+                      Duration=[4.0])
+    lpg.add_rel_props('Talk', 'Kurt', 'Dad', Count=5, Duration=[1.0])
+    return lpg
+
+
+def test_leaf_groups(phone_lpg):
+    """Ensure numbers with a single neighbor are grouped by it."""
+    from ..src.coarsen import leaf_groups
+    assert leaf_groups(phone_lpg) == {'(205) 263-1951': 'Kurt numbers',
+                                      '(205) 555-0100': 'Kurt numbers',
+                                      '(206) 555-0199': 'Kurt numbers'}
+
+
+def test_collapse_merges_properties(phone_lpg):
+    """Ensure relationships into a group are merged and their totals kept."""
+    from ..src.coarsen import collapse, leaf_groups
+    coarse = collapse(phone_lpg, leaf_groups(phone_lpg))
+    assert sorted(coarse.nodes()) == ['(206) 555-0142', 'Dad', 'Kurt',
+                                      'Kurt numbers', 'Mom']
+    assert coarse['Kurt numbers'].labels == ['Group']
+    assert coarse.get_node_properties('Kurt numbers') == {'Members': 3}
+    assert coarse['Kurt'].labels == ['Subscriber']
+    assert coarse.get_node_properties('Dad') == {'color': 'green'}
+    assert coarse.get_relationship_properties(
+        'Talk', 'Kurt', 'Kurt numbers') == {'Count': 2, 'Duration': 4.5}
+    assert coarse.get_relationship_properties(
+        'Talk', 'Kurt numbers', 'Kurt') == {'Count': 1, 'Duration': 4.0}
+    assert coarse.get_relationships('Kurt', 'Kurt numbers') == \
+        ['Talk', 'Text']
+    assert coarse.get_relationship_properties(
+        'Talk', 'Kurt', 'Dad') == {'Count': 5, 'Duration': 1.0}
+
+
+def test_collapse_merges_events(phone_lpg):
+    """Ensure event logs are merged into a log of their own."""
+    from ..src.coarsen import collapse, leaf_groups
+    from ..src.temporal import record
+    record(phone_lpg, 'Talk', 'Kurt', '(205) 263-1951', '2017-03-02', 3.)
+    record(phone_lpg, 'Talk', 'Kurt', '(205) 555-0100', '2017-03-01', 4.)
+    phone_lpg.add_rel_props('Talk', 'Kurt', '(205) 263-1951',
+                            Notes={'who': 'plumber'})
+    source = phone_lpg.get_relationship_properties('Talk', 'Kurt',
+                                                   '(205) 263-1951')
+    coarse = collapse(phone_lpg, leaf_groups(phone_lpg))
+    merged = coarse.get_relationship_properties('Talk', 'Kurt',
+                                                'Kurt numbers')
+    assert [str(time) for time in merged['Events'].times] == [
+        '2017-03-01T00:00:00', '2017-03-02T00:00:00']
+    assert merged['Events'].total() == 7.
+    assert len(source['Events']) == 1
+    assert merged['Notes'] == source['Notes']
+    assert merged['Notes'] is not source['Notes']
+
+
+def test_group_names_kept_apart(phone_lpg):
+    """Ensure groups are not named like a node of the graph."""
+    from ..src.coarsen import collapse, leaf_groups
+    phone_lpg.add_node('Kurt numbers')
+    phone_lpg.add_relationship('Talk', 'Mom', 'Kurt numbers')
+    groups = leaf_groups(phone_lpg)
+    assert set(groups.values()) == {'Kurt numbers 2'}
+    coarse = collapse(phone_lpg, groups)
+    assert coarse['Kurt numbers'].labels == []
+    assert coarse.get_node_properties('Kurt numbers 2') == {'Members': 3}
+    with pytest.raises(ValueError):
+        collapse(phone_lpg, {'(205) 263-1951': 'Mom'})
+
+
+def test_levels(phone_lpg):
+    """Ensure each level is coarser, and groups of groups add up members."""
+    from ..src.coarsen import LEVELS, levels
+    graphs = levels(phone_lpg)
+    assert list(graphs) == list(LEVELS)
+    assert graphs['full'] is phone_lpg
+    area = graphs['area']
+    assert sorted(area.nodes()) == ['(206) numbers', 'Dad', 'Kurt',
+                                    'Kurt numbers', 'Mom']
+    assert area.get_node_properties('Kurt numbers') == {'Members': 3}
+    assert area.get_node_properties('(206) numbers') == {'Members': 1}
+    assert sorted(area.is_neighbor_to('(206) numbers')) == ['Dad', 'Mom']
+
+
+def test_two_leaves_left_alone():
+    """Ensure two numbers only linked to each other are not grouped."""
+    from ..src.coarsen import leaf_groups
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    lpg.add_node('(205) 263-1951')
+    lpg.add_node('(205) 555-0100')
+    lpg.add_relationship('Text', '(205) 263-1951', '(205) 555-0100',
+                         both_ways=True)
+    assert leaf_groups(lpg) == {}
+
+
+def test_write_levels(phone_lpg, tmpdir):
+    """Ensure every level is exported, laid out if asked."""
+    from ..src.coarsen import write_levels
+    paths = write_levels(phone_lpg, str(tmpdir.join('graph_{}.json')),
+                         properties=['Count'], js_variable='graph_{}',
+                         positions=True)
+    assert list(paths) == ['area', 'leaves', 'full']
+    with open(paths['area']) as handle:
+        text = handle.read()
+    assert text.startswith('graph_area = ')
+    nodes = json.loads(text[len('graph_area = '):])['nodes']
+    assert len(nodes) == 5
+    assert all('x' in node and 'y' in node for node in nodes)
@@ -0,0 +1,136 @@
+"""Test the streaming export to the viewer's JSON."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Phone graph with talks and texts."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.series import NumericSeries
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951']:
+        lpg.add_node(node)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    lpg.add_relationship('Talk', 'Kurt', 'Dad')
+    lpg.add_relationship('Text', '(205) 263-1951', 'Kurt')
+    lpg.add_rel_props('Talk', 'Kurt', 'Mom', Count=2, Duration=[1.5, 3.0])
+    lpg.add_rel_props('Talk', 'Kurt', 'Dad', Count=1,
+                      Duration=NumericSeries([4.0]))
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=12)
+    return lpg
+
+
+def _read(path, js_variable=None):
+    """Return the document written to path."""
+    with open(path) as handle:
+        text = handle.read()
+    if js_variable:
+        prefix = '{} = '.format(js_variable)
+        assert text.startswith(prefix)
+        text = text[len(prefix):]
+    return json.loads(text)
+
+
+def test_schema(phone_lpg, tmpdir):
+    """Ensure the document has the nodes and links the viewer reads."""
+    from ..src.export import write_d3
+    path = str(tmpdir.join('graph.json'))
+    assert write_d3(phone_lpg, path) == (4, 5)
+    document = _read(path)
+    assert document['nodes'] == [
+        {'id': 'Kurt', 'color': 'blue', 'radius': 2},
+        {'id': 'Mom', 'color': 'green', 'radius': 2},
+        {'id': 'Dad', 'color': 'green', 'radius': 2},
+        {'id': '(205) 263-1951', 'color': 'grey', 'radius': 2}]
+    assert list(document['links']) == ['Text', 'Talk']
+    assert sorted((link['source'], link['target'])
+                  for link in document['links']['Text']) == [
+        ('(205) 263-1951', 'Kurt'), ('Kurt', 'Mom'), ('Mom', 'Kurt')]
+    talk = {link['target']: link for link in document['links']['Talk']}
+    assert talk['Mom'] == {'name': 'Talk', 'source': 'Kurt', 'target': 'Mom',
+                           'value': 20, 'properties': {
+                               'Count': 2, 'Duration': [1.5, 3.0]}}
+    assert talk['Dad']['properties']['Duration'] == [4.0]
+
+
+def test_projection(phone_lpg, tmpdir):
+    """Ensure properties are projected and summarized."""
+    from ..src.export import summarize, write_d3
+    path = str(tmpdir.join('graph.js'))
+    write_d3(phone_lpg, path, properties={'Duration': summarize},
+             js_variable='mega_phone_graph')
+    talk = {link['target']: link['properties'] for link in
+            _read(path, 'mega_phone_graph')['links']['Talk']}
+    assert talk['Mom'] == {'Duration': {'count': 2, 'sum': 4.5, 'min': 1.5,
+                                        'max': 3.0, 'mean': 2.25}}
+    assert talk['Dad']['Duration']['count'] == 1
+    write_d3(phone_lpg, path, properties=['Count'])
+    links = _read(path)['links']
+    assert all(set(link['properties']) <= {'Count'}
+               for link in links['Text'] + links['Talk'])
+
+
+def test_radius_and_other_types(tmpdir):
+    """Ensure hubs get bigger radii and every relationship type is written."""
+    from ..src.export import write_d3
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    lpg.add_node('Kurt')
+    for index in range(8):
+        lpg.add_node(str(index))
+        lpg.add_relationship('Email', 'Kurt', str(index))
+    path = str(tmpdir.join('graph.json'))
+    write_d3(lpg, path)
+    document = _read(path)
+    assert document['nodes'][0]['radius'] == 6
+    assert document['links']['Text'] == document['links']['Talk'] == []
+    assert len(document['links']['Email']) == 8
+
+
+def test_mapped_graph(phone_lpg, tmpdir):
+    """Ensure a saved graph exports the same document."""
+    from ..src.export import write_d3
+    from ..src.persistence import load, save
+    save(phone_lpg, str(tmpdir.join('graph.lpg')))
+    original, mapped = str(tmpdir.join('a.json')), str(tmpdir.join('b.json'))
+    write_d3(phone_lpg, original, properties=['Count'])
+    write_d3(load(str(tmpdir.join('graph.lpg'))), mapped,
+             properties=['Count'])
+    original, mapped = _read(original), _read(mapped)
+
+    def key(item):
+        return json.dumps(item, sort_keys=True)
+    assert sorted(original['nodes'], key=key) == \
+        sorted(mapped['nodes'], key=key)
+    for name in ('Text', 'Talk'):
+        assert sorted(original['links'][name], key=key) == \
+            sorted(mapped['links'][name], key=key)
+
+
+def test_summarize_empty():
+    """Ensure an empty list summarizes to a zero count."""
+    from ..src.export import summarize
+    assert summarize([])['count'] == 0
+
+
+def test_events(phone_lpg, tmpdir):
+    """Ensure event logs are written and a failed export leaves no file."""
+    import os
+    from ..src.export import write_d3
+    from ..src.temporal import record
+    record(phone_lpg, 'Talk', 'Kurt', 'Dad', '2017-04-10T09:30', 4.)
+    path = str(tmpdir.join('graph.json'))
+    write_d3(phone_lpg, path)
+    talk = {link['target']: link for link in _read(path)['links']['Talk']}
+    assert talk['Dad']['properties']['Events'] == [
+        ['2017-04-10T09:30:00', 4.]]
+    phone_lpg.add_rel_props('Text', 'Kurt', 'Mom', When=object())
+    with pytest.raises(TypeError):
+        write_d3(phone_lpg, path)
+    assert talk == {link['target']: link
+                    for link in _read(path)['links']['Talk']}
+    assert os.listdir(str(tmpdir)) == ['graph.json']
@@ -0,0 +1,153 @@
+"""Test batched ingestion of parsed bill records."""
+
+import pytest
+
+
+@pytest.fixture
+def bill():
+    """One line's bill dict, shaped like the output of parse_bill."""
+    return {
+        'Talk': {'Date and time': ['03/01/2017 10:15 AM',
+                                   '03/02/2017 11:00 PM',
+                                   '03/03/2017 09:00 AM'],
+                 'Number': ['2052631951', '2052631951', '3345249020'],
+                 'Description': ['Incoming', 'Incoming', 'Outgoing'],
+                 'Min': ['3', '5', '1']},
+        'Text': {'Date and time': ['03/01/2017 10:15 AM'] * 3,
+                 'Number': ['2052631951', '2052631951', '8005550199'],
+                 'Direction': ['Outgoing', 'Outgoing', 'Incoming']},
+        'Data': {'Date and time': ['03/01/2017 10:15 AM'], 'MB': ['1.5']}}
+
+
+@pytest.fixture
+def lpg():
+    """Empty labeled property graph."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    return LabeledPropertyGraph()
+
+
+def test_one_write_per_edge(lpg, bill):
+    """Ensure records are grouped into one upsert per distinct edge."""
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg)
+    ingestor.add('Kurt', bill)
+    assert lpg.nodes() == []
+    assert ingestor.flush() == 4
+    assert (ingestor.records, ingestor.writes) == (6, 4)
+    assert sorted(lpg.nodes()) == ['2052631951', '3345249020', '8005550199',
+                                   'Kurt']
+    talk = lpg.get_relationship_properties('Talk', '2052631951', 'Kurt')
+    assert talk['Count'] == 2
+    assert talk['Duration'] == [3., 5.]
+    assert lpg.get_relationship_properties('Text', 'Kurt', '2052631951') == \
+        {'Count': 2}
+    assert lpg.get_relationships('8005550199', 'Kurt') == ['Text']
+    assert ingestor.flush() == 0
+
+
+def test_upsert_existing(lpg, bill):
+    """Ensure later batches add to the relationships already there."""
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg)
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    talk = lpg.get_relationship_properties('Talk', '2052631951', 'Kurt')
+    assert talk['Count'] == 4
+    assert talk['Duration'].sum == 16.
+
+
+def test_upsert_appends_changes(lpg, bill):
+    """Ensure later batches append to series rather than set them again."""
+    from ..src.changes import ChangeFeed
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg, time_format='%m/%d/%Y %I:%M %p')
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    calls = []
+    original = lpg.extend_rel_prop
+    lpg.extend_rel_prop = lambda *args: calls.append(args) or original(*args)
+    feed = ChangeFeed(lpg)
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    assert sorted(call[3] for call in calls
+                  if call[1:3] == ('2052631951', 'Kurt')) == \
+        ['Duration', 'Events']
+    durations = [call[4] for call in calls if call[3] == 'Duration']
+    assert sorted(durations) == [[1.], [3., 5.]]
+    assert {change.key for change in feed.since(0)} == \
+        {'Count', 'Duration', 'Events'}
+
+
+def test_batch_size(lpg, bill):
+    """Ensure a full batch is written without waiting for flush."""
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg, batch_size=4)
+    ingestor.add_records('Kurt', 'Text', ['Mom', 'Mom'], ['Outgoing'] * 2)
+    assert lpg.nodes() == []
+    ingestor.add_records('Dad', 'Text', ['Mom', 'Mom'], ['Incoming'] * 2)
+    assert sorted(lpg.nodes()) == ['Dad', 'Kurt', 'Mom']
+    assert lpg.get_relationship_properties('Text', 'Mom', 'Dad') == \
+        {'Count': 2}
+    with pytest.raises(ValueError):
+        ingestor.add_records('Kurt', 'Text', ['Mom'], [])
+
+
+def test_normalize(lpg, bill):
+    """Ensure numbers are renamed or skipped through normalize."""
+    from ..src.ingest import Ingestor
+    contacts = {'2052631951': 'Mom', '3345249020': 'Kurt'}
+    ingestor = Ingestor(lpg, normalize=lambda number: contacts.get(number))
+    ingestor.add('Dad', bill)
+    ingestor.flush()
+    assert sorted(lpg.nodes()) == ['Dad', 'Kurt', 'Mom']
+    assert lpg.get_relationship_properties('Talk', 'Dad', 'Kurt')['Count'] \
+        == 1
+    assert ingestor.records == 5
+
+
+def test_events(lpg, bill):
+    """Ensure records keep their times when a time format is given."""
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg, time_format='%m/%d/%Y %I:%M %p')
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    events = lpg.get_relationship_properties(
+        'Talk', '2052631951', 'Kurt')['Events']
+    assert list(events.times.astype(str)) == ['2017-03-01T10:15:00',
+                                              '2017-03-02T23:00:00']
+    assert events.total() == 8.
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    assert events.count('2017-03-02', '2017-03-03') == 2
+
+
+def test_missing_duration_added(lpg):
+    """Ensure a relationship with a Count but no Duration gets one."""
+    from ..src.ingest import Ingestor
+    lpg.add_node('A')
+    lpg.add_node('B')
+    lpg.add_relationship('Talk', 'B', 'A')
+    lpg.add_rel_props('Talk', 'B', 'A', Count=3)
+    ingestor = Ingestor(lpg)
+    ingestor.add_records('A', 'Talk', ['B'], ['Incoming'], [2.])
+    ingestor.flush()
+    talk = lpg.get_relationship_properties('Talk', 'B', 'A')
+    assert talk['Count'] == 4
+    assert talk['Duration'] == [2.]
+
+
+def test_missing_events_added(lpg, bill):
+    """Ensure a batch with times after one without adds the Events."""
+    from ..src.ingest import Ingestor
+    ingestor = Ingestor(lpg)
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    ingestor = Ingestor(lpg, time_format='%m/%d/%Y %I:%M %p')
+    ingestor.add('Kurt', bill)
+    ingestor.flush()
+    talk = lpg.get_relationship_properties('Talk', '2052631951', 'Kurt')
+    assert talk['Count'] == 4
+    assert talk['Events'].total() == 8.
+    assert talk['Duration'].sum == 16.
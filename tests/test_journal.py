@@ -0,0 +1,264 @@
+"""Test the append-only journal behind JournaledGraph."""
+
+import os
+
+import pytest
+
+
+@pytest.fixture
+def path(tmpdir):
+    """Path of the snapshot the journaled graph lives at."""
+    return str(tmpdir.join('phone.lpg'))
+
+
+def build(graph):
+    """Run a small ingest against graph."""
+    for node in ['Kurt', 'Mom', 'Dad']:
+        graph.add_node(node)
+    graph.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    graph.add_rel_props('Text', 'Kurt', 'Mom', Count=1)
+    graph.change_rel_prop('Text', 'Kurt', 'Mom', 'Count', 2)
+    graph.add_relationship('Talk', 'Dad', 'Kurt')
+    graph.add_node_props('Kurt', color='blue')
+
+
+def test_reopen_replays_journal(path):
+    """Ensure mutations survive closing and reopening the graph."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+    graph = JournaledGraph(path)
+    assert sorted(graph.nodes()) == ['Dad', 'Kurt', 'Mom']
+    assert graph.get_relationship_properties('Text', 'Kurt', 'Mom') == \
+        {'Count': 2}
+    assert graph.has_relationship('Kurt', 'Mom', 'Text', both_ways=True)
+    assert graph.get_node_properties('Kurt') == {'color': 'blue'}
+    assert graph.journal_records == 8
+
+
+def test_removals_are_journaled(path):
+    """Ensure removals are replayed as well."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+        graph.remove_rel_prop('Text', 'Kurt', 'Mom', 'Count')
+        graph.remove_relationship('Text', 'Mom', 'Kurt')
+        graph.remove_node('Dad')
+    graph = JournaledGraph(path)
+    assert sorted(graph.nodes()) == ['Kurt', 'Mom']
+    assert graph.get_relationship_properties('Text', 'Kurt', 'Mom') == {}
+    assert not graph.has_relationship('Mom', 'Kurt', 'Text')
+
+
+def test_failed_calls_not_journaled(path):
+    """Ensure only successful mutations are recorded."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+        with pytest.raises(KeyError):
+            graph.add_node('Kurt')
+    assert JournaledGraph(path).journal_records == 1
+
+
+def test_series_are_journaled(path):
+    """Ensure NumericSeries values are replayed as series."""
+    from ..src.journal import JournaledGraph
+    from ..src.series import NumericSeries
+    with JournaledGraph(path) as graph:
+        build(graph)
+        graph.add_rel_props('Talk', 'Dad', 'Kurt',
+                            Duration=NumericSeries([1.5, 3.], 'd'))
+    duration = JournaledGraph(path).get_relationship_properties(
+        'Talk', 'Dad', 'Kurt')['Duration']
+    assert isinstance(duration, NumericSeries)
+    assert (duration.typecode, duration.tolist()) == ('d', [1.5, 3.])
+
+
+def test_ingested_events_are_journaled(path):
+    """Ensure series and event logs grown by an Ingestor are replayed."""
+    from ..src.ingest import Ingestor
+    from ..src.journal import JournaledGraph
+    from ..src.temporal import EventLog
+    with JournaledGraph(path) as graph:
+        ingestor = Ingestor(graph, time_format='%Y-%m-%dT%H:%M')
+        for time, minutes in (('2017-01-02T09:00', 3.),
+                              ('2017-01-03T20:00', 12.)):
+            ingestor.add_records('Kurt', 'Talk', ['Mom'], ['Outgoing'],
+                                 [minutes], [time])
+            ingestor.flush()
+    properties = JournaledGraph(path).get_relationship_properties(
+        'Talk', 'Kurt', 'Mom')
+    assert properties['Count'] == 2
+    assert properties['Duration'] == [3., 12.]
+    assert isinstance(properties['Events'], EventLog)
+    assert properties['Events'].total() == 15.
+    assert [str(time) for time in properties['Events'].times] == [
+        '2017-01-02T09:00:00', '2017-01-03T20:00:00']
+
+
+def test_appends_journal_only_new_values(path):
+    """Ensure growing a log journals the new events, not the whole log."""
+    from ..src.journal import JournaledGraph
+    from ..src.temporal import record
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+        graph.add_node('Mom')
+        for day in range(1, 29):
+            record(graph, 'Talk', 'Kurt', 'Mom',
+                   '2017-02-{:02d}T09:00'.format(day), 1.)
+        record(graph, 'Talk', 'Kurt', 'Mom', '2017-01-31T09:00', 0.5)
+        graph.add_rel_props('Talk', 'Kurt', 'Mom', Duration=[1.])
+        graph.extend_rel_prop('Talk', 'Kurt', 'Mom', 'Duration', [2., 3.])
+    with open(path + '.journal', 'rb') as handle:
+        lines = handle.readlines()
+    assert len(set(len(line) for line in lines[5:33])) == 1
+    properties = JournaledGraph(path).get_relationship_properties(
+        'Talk', 'Kurt', 'Mom')
+    assert len(properties['Events']) == 29
+    assert str(properties['Events'].times[0]) == '2017-01-31T09:00:00'
+    assert properties['Events'].total() == 28.5
+    assert properties['Duration'] == [1., 2., 3.]
+
+
+def test_failed_calls_change_nothing(path):
+    """Ensure calls failing halfway leave the journal replayable."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+        with pytest.raises(KeyError):
+            graph.add_rel_props('Text', 'Kurt', 'Mom', Seen=True, Count=3)
+        with pytest.raises(ValueError):
+            graph.add_relationship('Text', 'Mom', 'Kurt', both_ways=True)
+        with pytest.raises(KeyError):
+            graph.add_node_props('Kurt', age=8, color='red')
+        assert graph.get_relationship_properties('Text', 'Kurt', 'Mom') == \
+            {'Count': 2}
+        assert graph.get_node_properties('Kurt') == {'color': 'blue'}
+        graph.add_relationship('Text', 'Dad', 'Mom', both_ways=True)
+        graph.add_rel_props('Text', 'Dad', 'Mom', Count=1)
+    graph = JournaledGraph(path)
+    assert graph.get_relationship_properties('Text', 'Dad', 'Mom') == \
+        {'Count': 1}
+    assert graph.journal_records == 10
+
+
+def test_node_methods_are_journaled(path):
+    """Ensure labels and properties set through a Node are replayed."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+        graph['Kurt'].add_label('Subscriber')
+        graph['Mom'].add_label('Subscriber')
+        graph['Mom'].remove_label('Subscriber')
+        graph['Dad'].add_property('age', 60)
+        graph['Kurt'].change_property('color', 'red')
+    graph = JournaledGraph(path)
+    assert graph.nodes_with_label('Subscriber') == ['Kurt']
+    assert graph['Mom'].labels == []
+    assert graph.get_node_properties('Dad') == {'age': 60}
+    assert graph.get_node_properties('Kurt') == {'color': 'red'}
+    assert graph.journal_records == 13
+
+
+def test_bad_record_is_reported(path):
+    """Ensure a record that cannot be applied names its line."""
+    from ..src.journal import JournaledGraph, _encode_record
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+    with open(path + '.journal', 'ab') as handle:
+        handle.write(_encode_record(['change_node_prop', ['Kurt', 'age', 9],
+                                     {}]))
+    with pytest.raises(ValueError) as error:
+        JournaledGraph(path)
+    assert 'line 3 of' in str(error.value)
+    assert 'change_node_prop' in str(error.value)
+
+
+def test_unjournalable_values_change_nothing(path):
+    """Ensure a value the journal cannot write leaves the graph as it was."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+        with pytest.raises(TypeError):
+            graph.add_rel_props('Talk', 'Dad', 'Kurt', Seen={'Kurt', 'Dad'})
+        assert graph.get_relationship_properties('Talk', 'Dad', 'Kurt') == {}
+    assert JournaledGraph(path).journal_records == 8
+
+
+def test_records_are_batched(path):
+    """Ensure records reach the disk one batch at a time."""
+    from ..src.journal import JournaledGraph
+    graph = JournaledGraph(path, batch_size=3)
+    size = os.path.getsize(graph.journal_path)
+    graph.add_node('Kurt')
+    graph.add_node('Mom')
+    assert os.path.getsize(graph.journal_path) == size
+    graph.add_node('Dad')
+    assert os.path.getsize(graph.journal_path) > size
+    assert graph.journal_records == 3
+
+
+def test_torn_tail_is_dropped(path):
+    """Ensure a half written record is ignored and cut off on open."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+        graph.add_node('Mom')
+    with open(path + '.journal', 'ab') as handle:
+        handle.write(b'0000 ["add_node", ["Da')
+    size = os.path.getsize(path + '.journal')
+    graph = JournaledGraph(path)
+    assert sorted(graph.nodes()) == ['Kurt', 'Mom']
+    assert os.path.getsize(path + '.journal') < size
+
+
+def test_corrupt_record_stops_replay(path):
+    """Ensure a record failing its checksum ends the replay."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+    with open(path + '.journal', 'ab') as handle:
+        handle.write(b'00000000 ["add_node", ["Mom"], {}]\n')
+    assert JournaledGraph(path).nodes() == ['Kurt']
+
+
+def test_compact(path):
+    """Ensure compaction folds the journal into the snapshot."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path) as graph:
+        build(graph)
+        graph.compact()
+        assert graph.journal_records == 0
+        assert graph.generation == 1
+        graph.add_node('Grandma')
+    graph = JournaledGraph(path)
+    assert graph.generation == 1
+    assert graph.journal_records == 1
+    assert sorted(graph.nodes()) == ['Dad', 'Grandma', 'Kurt', 'Mom']
+    assert graph.get_relationship_properties('Text', 'Kurt', 'Mom') == \
+        {'Count': 2}
+
+
+def test_periodic_compaction(path):
+    """Ensure the journal is compacted once it grows past compact_every."""
+    from ..src.journal import JournaledGraph
+    with JournaledGraph(path, batch_size=1, compact_every=5) as graph:
+        for node in range(12):
+            graph.add_node(node)
+        assert graph.generation == 2
+        assert graph.journal_records == 2
+    assert sorted(JournaledGraph(path).nodes()) == list(range(12))
+
+
+def test_stale_journal_ignored(path):
+    """Ensure a journal already folded into the snapshot is not replayed."""
+    from ..src.journal import JournaledGraph, _encode_record
+    with JournaledGraph(path) as graph:
+        graph.add_node('Kurt')
+        graph.compact()
+    with open(path + '.journal', 'wb') as handle:
+        handle.write(_encode_record(['generation', 0]))
+        handle.write(_encode_record(['add_node', ['Kurt'], {}]))
+    graph = JournaledGraph(path)
+    assert graph.nodes() == ['Kurt']
+    assert graph.journal_records == 0
@@ -119,6 +119,14 @@ def test_removing_nodes_with_many_connections(loaded_lpg):
         assert 'Wendy' not in loaded_lpg._relationships[rel]
 
 
+def test_removed_node_not_in_nodes(loaded_lpg):
+    """Ensure a removed node is no longer listed or retrievable."""
+    loaded_lpg.remove_node('Unicorn')
+    assert 'Unicorn' not in loaded_lpg.nodes()
+    with pytest.raises(KeyError):
+        loaded_lpg['Unicorn']
+
+
 def test_get_neighbors(loaded_lpg):
     """Test get_neighbors method."""
     loaded_lpg.add_node('Wendy')
@@ -284,6 +292,17 @@ def test_adding_existent_rel_both_ways(lpg):
         lpg.add_relationship('buddies', 'Charlie', 'Unicorn', both_ways=True)
 
 
+def test_adding_existent_reverse_rel_adds_nothing(lpg):
+    """Ensure a both ways add failing on the reverse edge adds neither."""
+    lpg.add_node('Charlie')
+    lpg.add_node('Unicorn')
+    lpg.add_relationship('buddies', 'Unicorn', 'Charlie')
+    with pytest.raises(ValueError):
+        lpg.add_relationship('buddies', 'Charlie', 'Unicorn', both_ways=True)
+    assert not lpg.has_neighbor('Charlie', 'Unicorn')
+    assert lpg.nodes_with_relationship('buddies') == ['Unicorn']
+
+
 def test_adding_both_ways_success_graph(lpg):
     """Ensure successful both ways relationship add."""
     lpg.add_node('Charlie')
@@ -329,6 +348,13 @@ def test_removing_rel(loaded_lpg):
     assert loaded_lpg._graph['Charlie']['Unicorn'] == ['buddies']
 
 
+def test_removing_last_rel_of_name(loaded_lpg):
+    """Ensure a node without a relationship left is not listed with it."""
+    loaded_lpg.remove_relationship('cousins', 'Charlie', 'Unicorn')
+    assert 'Charlie' not in loaded_lpg.nodes_with_relationship('cousins')
+    assert loaded_lpg.get_neighbors('Charlie') == ['Unicorn']
+
+
 # def test_removing_rel_single(loaded_lpg):
 #     """Ensure relationships can be removed."""
 #     loaded_lpg.remove_relationship('cousins', 'Charlie', 'Unicorn')
@@ -366,6 +392,20 @@ def test_error_when_adding_rel_prop_duplicates(loaded_lpg):
         loaded_lpg.add_rel_props('buddies', 'Charlie', 'Unicorn', since=1985)
 
 
+def test_failed_props_add_nothing(loaded_lpg):
+    """Ensure adding several properties is all or nothing."""
+    loaded_lpg.add_rel_props('buddies', 'Charlie', 'Unicorn', since=1985)
+    with pytest.raises(KeyError):
+        loaded_lpg.add_rel_props('buddies', 'Charlie', 'Unicorn', met='camp',
+                                 since=1986)
+    assert loaded_lpg.get_relationship_properties(
+        'buddies', 'Charlie', 'Unicorn') == {'since': 1985}
+    loaded_lpg.add_node_props('Charlie', horns=0)
+    with pytest.raises(KeyError):
+        loaded_lpg.add_node_props('Charlie', wings=2, horns=1)
+    assert loaded_lpg.get_node_properties('Charlie') == {'horns': 0}
+
+
 def test_change_rel_prop_DNE(loaded_lpg):
     """Test that we get error if we try to change a property that DNE."""
     loaded_lpg.add_rel_props('buddies', 'Charlie', 'Unicorn', since=1985)
@@ -437,3 +477,25 @@ def test_has_relationship_true(loaded_lpg):
 def test_has_relationship_false(loaded_lpg):
     """ensure returns false."""
     assert not loaded_lpg.has_relationship('Charlie', 'Unicorn', 'siblings')
+
+
+def test_node_ids(loaded_lpg):
+    """Ensure nodes get dense ids that map back to their names."""
+    assert [loaded_lpg.node_id(name) for name in loaded_lpg.nodes()] == \
+        [0, 1, 2]
+    assert loaded_lpg.node_name(1) == 'Unicorn'
+    loaded_lpg.remove_node('Unicorn')
+    with pytest.raises(KeyError):
+        loaded_lpg.node_id('Unicorn')
+    with pytest.raises(KeyError):
+        loaded_lpg.node_name(1)
+
+
+def test_relationship_keys_are_interned(loaded_lpg):
+    """Ensure relationships reuse the node's own name object."""
+    loaded_lpg.add_relationship('cousins', ''.join('Pegasus'),
+                                ''.join('Charlie'))
+    charlie, pegasus = loaded_lpg['Charlie'].name, loaded_lpg['Pegasus'].name
+    assert list(loaded_lpg._graph['Pegasus'])[0] is charlie
+    assert list(loaded_lpg._incoming['Charlie'])[-1] is pegasus
+    assert list(loaded_lpg._relationships['cousins']['Pegasus'])[0] is charlie
@@ -0,0 +1,92 @@
+"""Test the precomputed force layout."""
+
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+
+def _two_cliques():
+    """Return the edges of two cliques of ten joined by one edge."""
+    sources, targets = [], []
+    for start in (0, 10):
+        for a, b in itertools.combinations(range(start, start + 10), 2):
+            sources.append(a)
+            targets.append(b)
+    sources.append(0)
+    targets.append(10)
+    return np.array(sources), np.array(targets)
+
+
+def test_repulsion_matches_pairwise():
+    """Ensure the grid repulsion approximates the exact sum over pairs."""
+    from ..src.layout import repulsion
+    positions = np.random.RandomState(1).random_sample((300, 2))
+    delta = positions[:, None, :] - positions[None, :, :]
+    square = (delta ** 2).sum(axis=-1)
+    np.fill_diagonal(square, np.inf)
+    exact = (0.05 ** 2 * delta / square[..., None]).sum(axis=1)
+    approximate = repulsion(positions, 0.05, grid=64)
+    assert np.corrcoef(exact.ravel(), approximate.ravel())[0, 1] > 0.98
+
+
+def test_clusters_separate():
+    """Ensure connected nodes end up closer than unconnected ones."""
+    from ..src.layout import force_layout
+    sources, targets = _two_cliques()
+    positions = force_layout(20, sources, targets, seed=3)
+    first, second = positions[:10], positions[10:]
+    apart = np.hypot(*(first.mean(axis=0) - second.mean(axis=0)))
+    assert apart > 3 * max(first.std(axis=0).max(), second.std(axis=0).max())
+    assert np.array_equal(positions,
+                          force_layout(20, sources, targets, seed=3))
+
+
+def test_fit():
+    """Ensure positions are scaled into the box."""
+    from ..src.layout import fit
+    positions = fit(np.array([[0., 0.], [2., 1.], [1., 3.]]), 960, 500)
+    assert positions.min(axis=0).tolist() >= [20, 20]
+    assert positions[:, 0].max() <= 940 and positions[:, 1].max() <= 480
+    assert positions[:, 1].max() - positions[:, 1].min() == \
+        pytest.approx(460)
+
+
+def test_edge_index():
+    """Ensure every pair of neighbors gives one edge."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.layout import edge_index
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad']:
+        lpg.add_node(node)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    lpg.add_relationship('Talk', 'Dad', 'Kurt')
+    names, sources, targets = edge_index(lpg)
+    assert sorted(tuple(sorted((names[a], names[b])))
+                  for a, b in zip(sources, targets)) == \
+        [('Dad', 'Kurt'), ('Kurt', 'Mom')]
+
+
+def test_exported_positions(tmpdir):
+    """Ensure the layout is written as x and y on the nodes."""
+    from ..src.export import write_d3
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.layout import layout
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=400)
+    lpg = LabeledPropertyGraph()
+    for node in network.nodes:
+        lpg.add_node(node)
+    for rel, node_a, node_b in network.relationships():
+        lpg.add_relationship(rel, node_a, node_b)
+    positions = layout(lpg, iterations=20)
+    path = str(tmpdir.join('graph.json'))
+    write_d3(lpg, path, positions=positions)
+    with open(path) as handle:
+        nodes = json.load(handle)['nodes']
+    assert len(nodes) == len(network.nodes)
+    assert all(20 <= node['x'] <= 940 and 20 <= node['y'] <= 480
+               for node in nodes)
+    assert nodes[0]['x'] == round(positions[nodes[0]['id']][0], 1)
@@ -0,0 +1,79 @@
+"""Test the cleaning of parsed bills and contacts."""
+
+import pytest
+
+
+VCARD = '\r\n'.join([
+    'BEGIN:VCARD', 'VERSION:3.0', 'N:Maurer;Kurt;;;', 'FN:Kurt Maurer',
+    'TEL;type=CELL;type=VOICE;type=pref:+1 (334) 524-9020',
+    'TEL;type=HOME:2052631951', 'END:VCARD',
+    'BEGIN:VCARD', 'VERSION:3.0', 'FN:Mom',
+    'item1.TEL;type=CELL:205-555-', ' 0101', 'END:VCARD',
+    'BEGIN:VCARD', 'VERSION:3.0', 'N:;;;;', 'TEL;type=CELL:2055550102',
+    'END:VCARD', ''])
+
+
+@pytest.fixture
+def line_bill():
+    """One line's records as returned by parse_bill()."""
+    return {
+        'Talk': {'Date and time': ['01/02/17 9:00 AM', '01/02/17 10:00 AM',
+                                   '01/03/17 8:00 PM'],
+                 'Number': ['12052631951', 'Voicemail', '205.555.0101'],
+                 'Description': ['Incoming', 'Outgoing', 'Outgoing'],
+                 'Min': ['3', '1', '12']},
+        'Text': {'Date and time': ['01/02/17 9:05 AM', '01/02/17 9:06 AM'],
+                 'Number': ['2052631951', '2055550101'],
+                 'Destination': ['Huntsville, AL', '-'],
+                 'Direction': ['Outgoing', 'Incoming']},
+        'Data': {'Date and time': ['01/02/17'], 'MB': ['12.5']}}
+
+
+def test_format_phone():
+    """Ensure 10 digits, or 11 with a leading 1, are formatted."""
+    from ..src.normalize import format_phone, normalize_number
+    assert format_phone('2052631951') == '(205) 263-1951'
+    assert format_phone('12052631951') == '(205) 263-1951'
+    assert normalize_number('12052631951') == '(205) 263-1951'
+    assert normalize_number('205.555.0101') == '205.555.0101'
+    assert normalize_number('Voicemail') == 'Voicemail'
+
+
+def test_normalize_bill(line_bill):
+    """Ensure only phone numbers, and texts to places, are kept."""
+    from ..src.normalize import normalize_bill
+    cleaned = normalize_bill(line_bill)
+    assert sorted(cleaned) == ['Talk', 'Text']
+    assert cleaned['Talk']['Number'] == ['(205) 263-1951', '205.555.0101']
+    assert cleaned['Talk']['Min'] == [3., 12.]
+    assert cleaned['Talk']['Description'] == ['Incoming', 'Outgoing']
+    assert cleaned['Text'] == {'Date and time': ['01/02/17 9:05 AM'],
+                               'Number': ['(205) 263-1951'],
+                               'Destination': ['Huntsville, AL'],
+                               'Direction': ['Outgoing']}
+    assert line_bill['Talk']['Number'][0] == '12052631951'
+
+
+def test_join_contacts(line_bill):
+    """Ensure known numbers are replaced by names, others kept."""
+    from ..src.normalize import join_contacts, normalize_bill
+    joined = join_contacts(normalize_bill(line_bill),
+                           {'(205) 263-1951': 'Grandma'})
+    assert joined['Talk']['Number'] == ['Grandma', '205.555.0101']
+    assert joined['Text']['Number'] == ['Grandma']
+    assert joined['Talk']['Min'] == [3., 12.]
+
+
+def test_parse_vcard():
+    """Ensure cell numbers are read with the names of their cards."""
+    from ..src.normalize import parse_vcard
+    assert parse_vcard(VCARD) == {'(334) 524-9020': 'Kurt Maurer',
+                                  '(205) 555-0101': 'Mom'}
+
+
+def test_read_vcard(tmpdir):
+    """Ensure vCard files are read."""
+    from ..src.normalize import read_vcard
+    path = tmpdir.join('Contacts.vcf')
+    path.write_binary(VCARD.encode('utf-8'))
+    assert read_vcard(str(path))['(205) 555-0101'] == 'Mom'
@@ -0,0 +1,230 @@
+"""Test saving and memory-mapped loading of the labeled property graph."""
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Small phone graph with properties and labels on nodes and edges."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', '(205) 263-1951', '(334) 524-9020']:
+        lpg.add_node(node)
+    lpg['Kurt'].add_label('Subscriber')
+    lpg.add_node_props('Kurt', color='blue', lines=1)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    lpg.add_relationship('Text', '(205) 263-1951', 'Kurt')
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=12)
+    lpg.add_rel_props('Talk', 'Kurt', 'Mom', Count=2, Duration=[1.5, 3.0])
+    lpg.add_rel_props('Text', '(205) 263-1951', 'Kurt', Count=1,
+                      Note={'spam': True})
+    lpg._relationships['Text']['Kurt']['Mom'].add_label('Family')
+    return lpg
+
+
+@pytest.fixture
+def saved(phone_lpg, tmpdir):
+    """Path of phone_lpg saved to disk."""
+    from ..src.persistence import save
+    path = str(tmpdir.join('phone.lpg'))
+    save(phone_lpg, path)
+    return path
+
+
+def test_load_nodes(phone_lpg, saved):
+    """Ensure every node survives a round trip."""
+    from ..src.persistence import load
+    graph = load(saved)
+    assert sorted(graph.nodes()) == sorted(phone_lpg.nodes())
+    assert len(graph) == 4
+
+
+def test_load_neighbors(phone_lpg, saved):
+    """Ensure adjacency is the same after loading."""
+    from ..src.persistence import load
+    graph = load(saved)
+    for node in phone_lpg.nodes():
+        assert sorted(graph.get_neighbors(node)) == \
+            sorted(phone_lpg.get_neighbors(node))
+        assert sorted(graph.is_neighbor_to(node)) == \
+            sorted(phone_lpg.is_neighbor_to(node))
+
+
+def test_load_relationships(saved):
+    """Ensure relationship names come back per pair."""
+    from ..src.persistence import load
+    graph = load(saved)
+    assert sorted(graph.get_relationships('Kurt', 'Mom')) == ['Talk', 'Text']
+    assert graph.has_relationship('Kurt', 'Mom', 'Text', both_ways=True)
+    assert not graph.has_relationship('Mom', 'Kurt', 'Talk')
+    assert sorted(graph.nodes_with_relationship('Text')) == \
+        ['(205) 263-1951', 'Kurt', 'Mom']
+
+
+def test_load_properties(saved):
+    """Ensure int, list and json property columns round trip."""
+    from ..src.persistence import load
+    graph = load(saved)
+    assert graph.get_relationship_properties('Talk', 'Kurt', 'Mom') == \
+        {'Count': 2, 'Duration': [1.5, 3.0]}
+    assert graph.get_relationship_properties(
+        'Text', '(205) 263-1951', 'Kurt') == {'Count': 1,
+                                              'Note': {'spam': True}}
+    assert graph.get_node_properties('Kurt') == {'color': 'blue', 'lines': 1}
+    assert graph.get_node_properties('Mom') == {}
+
+
+def test_load_getitem_labels(saved):
+    """Ensure node labels are restored on the lazily built node."""
+    from ..src.persistence import load
+    graph = load(saved)
+    assert graph['Kurt'].labels == ['Subscriber']
+    assert graph['Kurt']['color'] == 'blue'
+
+
+def test_load_missing_node(saved):
+    """Ensure unknown nodes raise KeyError like the graph does."""
+    from ..src.persistence import load
+    graph = load(saved)
+    with pytest.raises(KeyError):
+        graph.get_neighbors('Nobody')
+    with pytest.raises(KeyError):
+        graph.has_neighbor('Nobody', 'Kurt')
+    assert not graph.has_neighbor('Kurt', 'Nobody')
+
+
+def test_to_graph(phone_lpg, saved):
+    """Ensure a materialized graph matches the original."""
+    from ..src.persistence import load
+    graph = load(saved).to_graph()
+    assert sorted(graph.nodes()) == sorted(phone_lpg.nodes())
+    assert graph._graph == phone_lpg._graph
+    assert graph['Kurt'].labels == ['Subscriber']
+    assert graph._relationships['Text']['Kurt']['Mom'].labels == ['Family']
+    assert graph.get_relationship_properties('Talk', 'Kurt', 'Mom') == \
+        phone_lpg.get_relationship_properties('Talk', 'Kurt', 'Mom')
+
+
+def test_save_empty(tmpdir):
+    """Ensure an empty graph can be saved and loaded."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.persistence import save, load
+    path = str(tmpdir.join('empty.lpg'))
+    save(LabeledPropertyGraph(), path)
+    assert load(path).nodes() == []
+
+
+def test_load_bad_file(tmpdir):
+    """Ensure we refuse files that are not saved graphs."""
+    from ..src.persistence import load
+    path = tmpdir.join('bogus.lpg')
+    path.write_binary(b'not a graph at all')
+    with pytest.raises(ValueError):
+        load(str(path))
+
+
+def test_save_unserializable_name(tmpdir):
+    """Ensure names that cannot round trip are rejected."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.persistence import save
+    lpg = LabeledPropertyGraph()
+    lpg.add_node(('a', 'tuple'))
+    with pytest.raises(ValueError):
+        save(lpg, str(tmpdir.join('tuple.lpg')))
+
+
+def test_save_unserializable_values(phone_lpg, tmpdir):
+    """Ensure property values json would change are rejected."""
+    from ..src.persistence import save
+    path = str(tmpdir.join('values.lpg'))
+    phone_lpg.add_rel_props('Text', 'Kurt', 'Mom', Span=('Mon', 'Fri'))
+    with pytest.raises(ValueError):
+        save(phone_lpg, path)
+    phone_lpg.change_rel_prop('Text', 'Kurt', 'Mom', 'Span',
+                              {'days': [{1: 'Mon'}]})
+    with pytest.raises(ValueError):
+        save(phone_lpg, path)
+    phone_lpg.change_rel_prop('Text', 'Kurt', 'Mom', 'Span',
+                              {'days': [{'1': 'Mon'}]})
+    save(phone_lpg, path)
+
+
+def test_failed_save_keeps_file(phone_lpg, tmpdir, monkeypatch):
+    """Ensure a save failing partway leaves the previous file whole."""
+    from ..src import persistence
+    path = str(tmpdir.join('graph.lpg'))
+    persistence.save(phone_lpg, path)
+
+    class Broken:
+        size = persistence._HEADER.size
+
+        def pack(self, *values):
+            raise OSError('disk full')
+    monkeypatch.setattr(persistence, '_HEADER', Broken())
+    phone_lpg.add_node('Grandpa')
+    with pytest.raises(OSError):
+        persistence.save(phone_lpg, path)
+    monkeypatch.undo()
+    assert 'Grandpa' not in persistence.load(path).nodes()
+    assert tmpdir.listdir() == [tmpdir.join('graph.lpg')]
+
+
+def test_series_round_trip(phone_lpg, tmpdir):
+    """Ensure NumericSeries properties are stored as packed columns."""
+    from ..src.persistence import load, save
+    from ..src.series import NumericSeries
+    phone_lpg.add_rel_props('Text', 'Mom', 'Kurt',
+                            Minutes=NumericSeries([2.5, 0.5]))
+    path = str(tmpdir.join('series.lpg'))
+    save(phone_lpg, path)
+    duration = load(path).get_relationship_properties(
+        'Text', 'Mom', 'Kurt')['Minutes']
+    assert isinstance(duration, NumericSeries)
+    assert duration == [2.5, 0.5]
+    assert duration.typecode == 'f'
+    assert (duration.count, duration.sum, duration.max) == (2, 3., 2.5)
+
+
+def test_series_in_mixed_column(phone_lpg, tmpdir):
+    """Ensure a series sharing a column with lists is saved as a list."""
+    from ..src.persistence import load, save
+    from ..src.series import NumericSeries
+    phone_lpg.add_rel_props('Text', 'Mom', 'Kurt',
+                            Duration=NumericSeries([2.5]))
+    path = str(tmpdir.join('mixed.lpg'))
+    save(phone_lpg, path)
+    assert load(path).get_relationship_properties(
+        'Text', 'Mom', 'Kurt')['Duration'] == [2.5]
+
+
+def test_events_round_trip(phone_lpg, tmpdir):
+    """Ensure EventLog properties are stored as packed columns."""
+    from ..src.persistence import load, save
+    from ..src.temporal import EventLog
+    phone_lpg.add_rel_props('Text', 'Mom', 'Kurt', Events=EventLog(
+        ['2017-03-02T18:30', '2017-01-05T09:00'], [12., 3.]))
+    phone_lpg.add_rel_props('Talk', 'Kurt', 'Mom', Events=EventLog())
+    path = str(tmpdir.join('events.lpg'))
+    save(phone_lpg, path)
+    graph = load(path)
+    log = graph.get_relationship_properties('Text', 'Mom', 'Kurt')['Events']
+    assert isinstance(log, EventLog)
+    assert [str(time) for time in log.times] == ['2017-01-05T09:00:00',
+                                                 '2017-03-02T18:30:00']
+    assert log.values.tolist() == [3., 12.]
+    assert log.total('2017-02', None) == 12.
+    assert not len(graph.get_relationship_properties(
+        'Talk', 'Kurt', 'Mom')['Events'])
+
+
+def test_events_in_mixed_column(phone_lpg, tmpdir):
+    """Ensure an event log sharing a column is saved as [time, value]."""
+    from ..src.persistence import load, save
+    from ..src.temporal import EventLog
+    phone_lpg.add_rel_props('Text', 'Mom', 'Kurt', Duration=EventLog(
+        ['2017-01-05T09:00'], [3.]))
+    path = str(tmpdir.join('mixed.lpg'))
+    save(phone_lpg, path)
+    assert load(path).get_relationship_properties(
+        'Text', 'Mom', 'Kurt')['Duration'] == [['2017-01-05T09:00:00', 3.]]
@@ -0,0 +1,165 @@
+"""Test the cached pipeline from bills to the viewer's JSON."""
+
+import json
+
+import pytest
+
+
+def fake_parse(path):
+    """Return the records of a bill written as JSON instead of a PDF."""
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _bill(numbers, minutes):
+    """Return the records of one line calling and texting numbers."""
+    return {'Talk': {'Number': numbers,
+                     'Description': ['Outgoing'] * len(numbers),
+                     'Min': [str(minute) for minute in minutes]},
+            'Text': {'Number': numbers,
+                     'Destination': ['Huntsville, AL'] * len(numbers),
+                     'Direction': ['Incoming'] * len(numbers)}}
+
+
+@pytest.fixture
+def bills(tmpdir):
+    """Two accounts of bills and a contacts file."""
+    kurt, family = tmpdir.mkdir('Kurt'), tmpdir.mkdir('Mom_and_Dad')
+    kurt.join('jan17-feb17.pdf').write(json.dumps(
+        [_bill(['2052631951', '3345249021'], [3, 4])]))
+    kurt.join('feb17-mar17.pdf').write(json.dumps(
+        [_bill(['2052631951'], [5])]))
+    family.join('jan17-feb17.pdf').write(json.dumps(
+        [_bill(['3345249020'], [1]), _bill(['2052631951'], [2])]))
+    tmpdir.join('Contacts.vcf').write(
+        'BEGIN:VCARD\nN:;Grandma;;;\nTEL;type=CELL:2052631951\n'
+        'END:VCARD\n')
+    return tmpdir
+
+
+def _run(tmpdir, **kwargs):
+    """Run the pipeline on the bills; return it and the graph exported."""
+    from ..src.pipeline import Pipeline, build
+    stage = build([(str(tmpdir.join('Kurt')), ['Kurt']),
+                   (str(tmpdir.join('Mom_and_Dad')), ['Dad', 'Mom'])],
+                  [str(tmpdir.join('Contacts.vcf'))],
+                  overrides={'(334) 524-9020': 'Kurt'}, parse=fake_parse,
+                  **kwargs)
+    pipeline = Pipeline(str(tmpdir.join('cache')))
+    with open(pipeline.run(stage)) as handle:
+        return pipeline, stage, handle.read()
+
+
+def _links(document):
+    """Return {(name, source, target): Count} of an exported document."""
+    return {(link['name'], link['source'], link['target']):
+            link['properties']['Count']
+            for links in json.loads(document)['links'].values()
+            for link in links}
+
+
+def test_first_run(bills):
+    """Ensure every stage runs and the graph is the notebook's."""
+    pipeline, _, document = _run(bills)
+    assert pipeline.cached == []
+    assert len(pipeline.ran) == 3 * 3 + 3
+    assert _links(document) == {
+        ('Talk', 'Kurt', 'Grandma'): 2, ('Text', 'Grandma', 'Kurt'): 2,
+        ('Talk', 'Kurt', '(334) 524-9021'): 1,
+        ('Text', '(334) 524-9021', 'Kurt'): 1,
+        ('Talk', 'Dad', 'Kurt'): 1, ('Text', 'Kurt', 'Dad'): 1,
+        ('Talk', 'Mom', 'Grandma'): 1, ('Text', 'Grandma', 'Mom'): 1}
+    durations = {(link['source'], link['target']):
+                 link['properties']['Duration']
+                 for link in json.loads(document)['links']['Talk']}
+    assert sorted(durations[('Kurt', 'Grandma')]) == [3., 5.]
+
+
+def test_nothing_changed(bills):
+    """Ensure a second run reuses the export without reading the rest."""
+    _, _, first = _run(bills)
+    pipeline, _, second = _run(bills)
+    assert pipeline.ran == []
+    assert pipeline.cached == ['export']
+    assert second == first
+
+
+def test_changed_bill(bills):
+    """Ensure only the stages downstream of a changed bill run."""
+    _, _, first = _run(bills)
+    bills.join('Kurt', 'feb17-mar17.pdf').write(json.dumps(
+        [_bill(['2052631951', '2052631951'], [5, 6])]))
+    pipeline, _, second = _run(bills)
+    assert pipeline.ran == ['parse Kurt/feb17-mar17.pdf',
+                            'normalize Kurt/feb17-mar17.pdf',
+                            'join Kurt/feb17-mar17.pdf', 'graph', 'export']
+    assert sorted(pipeline.cached) == [
+        'contacts', 'join Kurt/jan17-feb17.pdf',
+        'join Mom_and_Dad/jan17-feb17.pdf']
+    assert _links(second)[('Talk', 'Kurt', 'Grandma')] == 3
+    assert _links(first)[('Talk', 'Kurt', 'Grandma')] == 2
+
+
+def test_changed_contacts(bills):
+    """Ensure new contacts rerun the joins but no parse."""
+    _run(bills)
+    bills.join('Contacts.vcf').write(
+        'BEGIN:VCARD\nN:;Nana;;;\nTEL;type=CELL:2052631951\nEND:VCARD\n')
+    pipeline, _, document = _run(bills)
+    assert not [name for name in pipeline.ran
+                if name.startswith(('parse', 'normalize'))]
+    assert pipeline.ran[0] == 'contacts'
+    assert len(pipeline.ran) == 1 + 3 + 2
+    assert ('Talk', 'Kurt', 'Nana') in _links(document)
+
+
+def test_changed_parameters(bills):
+    """Ensure export options rerun only the export."""
+    _run(bills)
+    pipeline, _, document = _run(bills, js_variable='mega_phone_graph')
+    assert pipeline.ran == ['export']
+    assert pipeline.cached == ['graph']
+    assert document.startswith('mega_phone_graph = ')
+
+
+def test_prune(bills):
+    """Ensure pruning keeps every output the export depends on."""
+    _run(bills)
+    bills.join('Kurt', 'feb17-mar17.pdf').write(json.dumps(
+        [_bill(['2052631951'], [7])]))
+    pipeline, stage, _ = _run(bills)
+    removed = pipeline.prune(stage)
+    assert len(removed) == 5
+    assert all('feb17-mar17' in name or name.startswith(('graph', 'export'))
+               for name in removed)
+    assert len(bills.join('cache').listdir()) == 3 * 3 + 3
+    pipeline, _, _ = _run(bills)
+    assert pipeline.ran == []
+
+
+def test_prune_keeps_other_files(bills):
+    """Ensure pruning only deletes files named like cached outputs."""
+    pipeline, stage, _ = _run(bills)
+    cache = bills.join('cache')
+    cache.join('notes.txt').write('mine')
+    cache.mkdir('graph-0123456789abcdef01234567.lpg')
+    cache.join('graph-0123456789abcdef01234567.json.partial').write('')
+    assert pipeline.prune(stage) == [
+        'graph-0123456789abcdef01234567.json.partial']
+    assert cache.join('notes.txt').read() == 'mine'
+    assert cache.join('graph-0123456789abcdef01234567.lpg').isdir()
+
+
+def test_main(bills, capsys, monkeypatch):
+    """Ensure the command writes the output and reports the stages."""
+    from ..src import pipeline
+    monkeypatch.setattr(pipeline, 'parse_pdf', fake_parse)
+    output = bills.join('graph.json')
+    assert pipeline.main([
+        '--account', str(bills.join('Kurt')), 'Kurt',
+        '--cache', str(bills.join('cache')), '--output', str(output),
+        '--properties', 'Count']) == 0
+    assert 'stages ran' in capsys.readouterr().out
+    assert json.loads(output.read())['links']['Text']
+    with pytest.raises(SystemExit):
+        pipeline.main(['--account', str(bills.join('Kurt'))])
@@ -0,0 +1,85 @@
+"""Test the opt-in call counters of the graph classes."""
+
+import pytest
+
+
+@pytest.fixture
+def lpg():
+    """Graph with two nodes."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    lpg.add_node('Kurt')
+    lpg.add_node('Mom')
+    return lpg
+
+
+def test_counts_calls(lpg):
+    """Ensure calls made while enabled are counted and timed."""
+    profiler = lpg.profile()
+    lpg.add_relationship('Text', 'Kurt', 'Mom')
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=1)
+    for _ in range(3):
+        lpg.get_relationship_properties('Text', 'Kurt', 'Mom')
+    counters = profiler.counters()
+    assert counters['get_relationship_properties'][0] == 3
+    assert counters['add_relationship'][0] == 1
+    assert counters['add_rel_props'][0] == 1
+    assert all(seconds >= 0 for _, seconds in counters.values())
+    assert 'get_neighbors' not in counters
+
+
+def test_disable_restores_methods(lpg):
+    """Ensure disabling removes the wrappers and keeps the counters."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    profiler = lpg.profile(['add_node'])
+    assert 'add_node' in vars(lpg)
+    lpg.add_node('Dad')
+    profiler.disable()
+    assert 'add_node' not in vars(lpg)
+    assert lpg.add_node.__func__ is LabeledPropertyGraph.add_node
+    lpg.add_node('Grandma')
+    assert list(profiler.counters()) == ['add_node']
+    assert profiler.counters()['add_node'][0] == 1
+    profiler.reset()
+    assert profiler.counters() == {}
+
+
+def test_failed_calls_counted(lpg):
+    """Ensure calls raising an exception are still counted."""
+    from ..src.profiling import Profiler
+    with Profiler(lpg, ['add_node']) as profiler:
+        with pytest.raises(KeyError):
+            lpg.add_node('Kurt')
+    assert profiler.counters()['add_node'][0] == 1
+    assert not profiler.enabled
+
+
+def test_report(lpg):
+    """Ensure the report lists the methods, most time spent first."""
+    profiler = lpg.profile()
+    lpg.add_relationship('Text', 'Kurt', 'Mom')
+    lpg.nodes()
+    profiler.disable()
+    lines = profiler.report().splitlines()
+    assert lines[0].split() == ['method', 'calls', 'seconds', 'us/call']
+    assert sorted(line.split()[0] for line in lines[1:]) == \
+        ['add_relationship', 'nodes']
+    seconds = [float(line.split()[2]) for line in lines[1:]]
+    assert seconds == sorted(seconds, reverse=True)
+
+
+def test_refactored_graph():
+    """Ensure the refactored graph can be profiled too."""
+    from ..src.lpg_refactor import LabeledPropertyGraph
+    from ..src.profiling import public_methods
+    lpg = LabeledPropertyGraph()
+    assert 'nodes' not in public_methods(lpg)
+    profiler = lpg.profile()
+    lpg.add_node('Kurt')
+    lpg.add_node('Mom')
+    lpg.add_relationship('Kurt', 'Mom', 'Text')
+    assert lpg.neighbors('Kurt') == ['Mom']
+    profiler.disable()
+    assert {name: calls for name, (calls, _) in
+            profiler.counters().items()} == {
+        'add_node': 2, 'add_relationship': 1, 'neighbors': 1}
@@ -0,0 +1,174 @@
+"""Test pattern queries against the labeled property graph."""
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Three subscribers texting and calling a handful of numbers."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951', '(334) 524-9020']:
+        lpg.add_node(node)
+    for node in ['Kurt', 'Mom', 'Dad']:
+        lpg[node].add_label('Subscriber')
+    lpg.add_node_props('Kurt', color='blue')
+    lpg.add_node_props('Mom', color='green')
+    lpg.add_node_props('Dad', color='green')
+    for rel, node_a, node_b, count in [('Text', 'Kurt', 'Mom', 40),
+                                       ('Text', 'Mom', 'Kurt', 35),
+                                       ('Text', 'Kurt', '(205) 263-1951', 3),
+                                       ('Text', 'Dad', 'Mom', 12),
+                                       ('Talk', 'Dad', 'Kurt', 5),
+                                       ('Talk', '(334) 524-9020', 'Dad', 1)]:
+        lpg.add_relationship(rel, node_a, node_b)
+        lpg.add_rel_props(rel, node_a, node_b, Count=count)
+    return lpg
+
+
+def results(graph, pattern):
+    """Return the matches of pattern as sorted tuples of names."""
+    from ..src.query import match
+    return sorted(tuple(sorted((key, value) for key, value in found.items()
+                               if isinstance(value, str)))
+                  for found in match(graph, pattern))
+
+
+def test_parse_pattern():
+    """Ensure every part of a pattern is parsed."""
+    from ..src.query import parse
+    pattern = parse("(a:Subscriber)-[t:Text|Talk {Count > 10}]->(b {x = 'y z'})")
+    assert pattern.nodes[0].var == 'a'
+    assert pattern.nodes[0].labels == ('Subscriber',)
+    assert pattern.rels[0].types == ('Text', 'Talk')
+    assert pattern.rels[0].conditions == (('Count', '>', 10),)
+    assert pattern.rels[0].direction == 'out'
+    assert pattern.nodes[1].conditions == (('x', '=', 'y z'),)
+
+
+def test_parse_bare_relationships():
+    """Ensure --, --> and <-- are accepted."""
+    from ..src.query import parse
+    pattern = parse('(a)-->(b)<--(c)--(d)')
+    assert [rel.direction for rel in pattern.rels] == ['out', 'in', 'both']
+
+
+def test_parse_errors():
+    """Ensure malformed patterns raise ValueError."""
+    from ..src.query import parse
+    for bad in ['a-->b', '(a)<-[:Text]->(b)', '(a)-[:Text {Count >}]->(b)',
+                '(a)==(b)']:
+        with pytest.raises(ValueError):
+            parse(bad)
+
+
+def test_match_relationship_condition(phone_lpg):
+    """Ensure relationship conditions filter edges."""
+    assert results(phone_lpg, '(a:Subscriber)-[:Text {Count > 10}]->(b)') == [
+        (('a', 'Dad'), ('b', 'Mom')),
+        (('a', 'Kurt'), ('b', 'Mom')),
+        (('a', 'Mom'), ('b', 'Kurt'))]
+
+
+def test_match_incoming(phone_lpg):
+    """Ensure <- walks edges backwards."""
+    assert results(phone_lpg, '(a)<-[:Talk]-(b)') == [
+        (('a', 'Dad'), ('b', '(334) 524-9020')),
+        (('a', 'Kurt'), ('b', 'Dad'))]
+
+
+def test_match_either_direction(phone_lpg):
+    """Ensure -- matches edges both ways."""
+    assert results(phone_lpg, "(a {color = 'blue'})-[:Talk]-(b)") == [
+        (('a', 'Kurt'), ('b', 'Dad'))]
+
+
+def test_match_chain(phone_lpg):
+    """Ensure multi hop patterns are joined."""
+    assert results(phone_lpg, '(a)-[:Talk]->(b:Subscriber)-[:Talk]->(c)') == [
+        (('a', '(334) 524-9020'), ('b', 'Dad'), ('c', 'Kurt'))]
+
+
+def test_match_repeated_variable(phone_lpg):
+    """Ensure a variable used twice must bind the same node."""
+    assert results(phone_lpg, '(a)-[:Text]->(b)-[:Text]->(a)') == [
+        (('a', 'Kurt'), ('b', 'Mom')), (('a', 'Mom'), ('b', 'Kurt'))]
+
+
+def test_match_binds_relationship(phone_lpg):
+    """Ensure relationship variables bind Relationship objects."""
+    from ..src.query import match
+    found = list(match(phone_lpg, "(a {color = 'blue'})-[t:Text]->(b:Subscriber)"))
+    assert len(found) == 1
+    assert found[0]['t'].properties == {'Count': 40}
+
+
+def test_match_is_lazy(phone_lpg):
+    """Ensure match returns a generator."""
+    from ..src.query import match
+    generator = match(phone_lpg, '(a)-->(b)')
+    assert next(generator)
+    assert not isinstance(generator, list)
+
+
+def test_match_missing_property_fails(phone_lpg):
+    """Ensure nodes without the property never match."""
+    assert results(phone_lpg, '(a {color != "green"})') == [(('a', 'Kurt'),)]
+
+
+def test_plan_prefers_label_index(phone_lpg):
+    """Ensure the planner starts from the labeled end of the pattern."""
+    from ..src.query import explain
+    phone_lpg['(334) 524-9020'].add_label('Spam')
+    assert explain(phone_lpg, '(a)-->(b)-->(c:Spam)').start == 2
+
+
+def test_plan_uses_property_index(phone_lpg):
+    """Ensure equality conditions on indexed properties narrow the start."""
+    from ..src.query import explain
+    phone_lpg.create_index('color')
+    plan = explain(phone_lpg, "(a:Subscriber)-->(b {color = 'blue'})")
+    assert plan.start == 1
+    assert results(phone_lpg, "(a:Subscriber)-->(b {color = 'blue'})") == [
+        (('a', 'Dad'), ('b', 'Kurt')), (('a', 'Mom'), ('b', 'Kurt'))]
+
+
+def test_plan_uses_degree(phone_lpg):
+    """Ensure equally sized candidate sets are told apart by degree."""
+    from ..src.query import explain
+    phone_lpg['(205) 263-1951'].add_label('Leaf')
+    phone_lpg['Kurt'].add_label('Hub')
+    assert explain(phone_lpg, '(a:Hub)--(b:Leaf)').start == 1
+
+
+def test_index_follows_mutations(phone_lpg):
+    """Ensure label and property indexes track node changes."""
+    phone_lpg.create_index('color')
+    phone_lpg.change_node_prop('Dad', 'color', 'blue')
+    assert sorted(phone_lpg.nodes_with_property('color', 'blue')) == \
+        ['Dad', 'Kurt']
+    phone_lpg.remove_node('Kurt')
+    assert phone_lpg.nodes_with_property('color', 'blue') == ['Dad']
+    assert sorted(phone_lpg.nodes_with_label('Subscriber')) == ['Dad', 'Mom']
+    phone_lpg['Mom'].remove_label('Subscriber')
+    assert phone_lpg.nodes_with_label('Subscriber') == ['Dad']
+    phone_lpg.drop_index('color')
+    assert phone_lpg.nodes_with_property('color', 'green') == ['Mom']
+
+
+def test_unhashable_indexed_value(phone_lpg):
+    """Ensure an unhashable value of an indexed property changes nothing."""
+    phone_lpg.create_index('color')
+    with pytest.raises(TypeError):
+        phone_lpg.change_node_prop('Dad', 'color', ['red'])
+    assert phone_lpg['Dad']['color'] == 'green'
+    assert sorted(phone_lpg.nodes_with_property('color', 'green')) == \
+        ['Dad', 'Mom']
+    phone_lpg.add_node('Aunt')
+    with pytest.raises(TypeError):
+        phone_lpg.add_node_props('Aunt', age=60, color=['red'])
+    assert phone_lpg.get_node_properties('Aunt') == {}
+    phone_lpg.add_node_props('Mom', tags=['family'])
+    with pytest.raises(TypeError):
+        phone_lpg.create_index('tags')
+    assert phone_lpg.nodes_with_property('tags', ['family']) == ['Mom']
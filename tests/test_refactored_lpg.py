@@ -144,6 +144,37 @@ def test_adjacency(loaded_lpg):
                loaded_lpg.adjacent('Pegasus', 'Wendy')])
 
 
+def test_predecessors(loaded_lpg):
+    """Test returns nodes with relationships to a node."""
+    loaded_lpg.add_relationship('Pegasus', 'Unicorn', 'rival')
+    assert loaded_lpg.predecessors('Unicorn') == ['Charlie', 'Pegasus']
+    assert loaded_lpg.predecessors('Pegasus') == []
+
+
+def test_neighbors_missing_node(loaded_lpg):
+    """Test unknown nodes have no neighbors."""
+    assert loaded_lpg.neighbors('Wendy') == []
+    assert loaded_lpg.predecessors('Wendy') == []
+
+
+def test_removing_pair_updates_adjacency(loaded_lpg):
+    """Ensure deleting a pair removes it from both adjacencies."""
+    del loaded_lpg['Charlie', 'Unicorn']
+    assert loaded_lpg.neighbors('Charlie') == []
+    assert loaded_lpg.predecessors('Unicorn') == []
+    assert loaded_lpg.neighbors('Unicorn') == ['Charlie']
+
+
+def test_removing_node_updates_adjacency(loaded_lpg):
+    """Ensure deleting a node clears it from its neighbors' adjacency."""
+    loaded_lpg.add_relationship('Pegasus', 'Unicorn', 'rival')
+    del loaded_lpg['Unicorn']
+    assert loaded_lpg.neighbors('Charlie') == []
+    assert loaded_lpg.neighbors('Pegasus') == []
+    assert loaded_lpg.predecessors('Charlie') == []
+    assert loaded_lpg._relationships == {}
+
+
 def test_add_node_properties(loaded_lpg):
     """Test that we can add node properties."""
     loaded_lpg['Charlie']['kidneys'] = 1
@@ -321,6 +352,75 @@ def test_getting_all_rels_in_graph(loaded_lpg):
     assert loaded_lpg.relationships == ['buddies', 'cousins']
 
 
+def test_relationship_count(loaded_lpg):
+    """Ensure relationships are counted per name."""
+    assert loaded_lpg.relationship_count('buddies') == 2
+    assert loaded_lpg.relationship_count('cousins') == 1
+    assert loaded_lpg.relationship_count('rivals') == 0
+
+
+def test_edges_of_type(loaded_lpg):
+    """Ensure we can iterate over the relationships with a name."""
+    edges = loaded_lpg.edges_of_type('buddies')
+    assert not isinstance(edges, list)
+    assert [(a, b, rel.name) for a, b, rel in edges] == \
+        [('Charlie', 'Unicorn', 'buddies'), ('Unicorn', 'Charlie', 'buddies')]
+    assert list(loaded_lpg.edges_of_type('rivals')) == []
+
+
+def test_type_index_follows_removals(loaded_lpg):
+    """Ensure every way of removing relationships updates the index."""
+    del loaded_lpg['Charlie', 'Unicorn']['cousins']
+    assert loaded_lpg.relationships == ['buddies']
+    del loaded_lpg['Charlie', 'Unicorn']
+    assert loaded_lpg.relationship_count('buddies') == 1
+    assert loaded_lpg.nodes_with_relationship('buddies') in \
+        (['Charlie', 'Unicorn'], ['Unicorn', 'Charlie'])
+    del loaded_lpg['Charlie']
+    assert loaded_lpg.relationships == []
+    assert loaded_lpg.unique_relationships() == set()
+    assert loaded_lpg.nodes_with_relationship('buddies') == []
+
+
+def test_type_index_follows_pair_dict(loaded_lpg):
+    """Ensure relationships set through the pair dict are indexed."""
+    from ..src.lpg_refactor import Relationship
+    loaded_lpg['Charlie', 'Unicorn']['rivals'] = Relationship('rivals')
+    assert loaded_lpg.relationship_count('rivals') == 1
+    loaded_lpg['Charlie', 'Unicorn'].pop('rivals')
+    assert loaded_lpg.relationship_count('rivals') == 0
+    loaded_lpg['Charlie', 'Unicorn'].clear()
+    assert loaded_lpg.relationships == ['buddies']
+
+
+def test_type_index_follows_every_mutator(loaded_lpg):
+    """Ensure update, setdefault, popitem and |= keep the index current."""
+    from ..src.lpg_refactor import Relationship
+    links = loaded_lpg['Charlie', 'Unicorn']
+    links.update({'Talk': Relationship('Talk')}, Text=Relationship('Text'))
+    links.setdefault('rivals', Relationship('rivals'))
+    links |= {'exes': Relationship('exes')}
+    for name in ('Talk', 'Text', 'rivals', 'exes'):
+        assert loaded_lpg.relationship_count(name) == 1
+    assert links.setdefault('rivals').name == 'rivals'
+    assert links.popitem()[0] == 'exes'
+    assert loaded_lpg.relationship_count('exes') == 0
+    del loaded_lpg['Charlie']
+    assert loaded_lpg.relationships == []
+    assert loaded_lpg.nodes == ['Unicorn', 'Pegasus']
+
+
+def test_removing_missing_keeps_graph(loaded_lpg):
+    """Ensure deleting something missing changes nothing."""
+    with pytest.raises(KeyError) as error:
+        del loaded_lpg['Nobody']
+    assert error.value.args[0] == 'Node Nobody not in graph'
+    with pytest.raises(KeyError):
+        del loaded_lpg['Unicorn', 'Pegasus']
+    assert loaded_lpg.nodes == ['Charlie', 'Unicorn', 'Pegasus']
+    assert loaded_lpg.relationship_count('buddies') == 2
+
+
 def test_removing_rel_single(loaded_lpg):
     """Ensure relationships can be removed."""
     del loaded_lpg['Charlie', 'Unicorn']['cousins']
@@ -423,3 +523,22 @@ def test_has_relationship_true(loaded_lpg):
 def test_has_relationship_false(loaded_lpg):
     """ensure returns false."""
     assert not loaded_lpg.has_relationship('Charlie', 'Unicorn', 'siblings')
+
+
+def test_node_ids(loaded_lpg):
+    """Ensure nodes get dense ids that map back to their names."""
+    ids = [loaded_lpg.node_id(name) for name in loaded_lpg.nodes]
+    assert ids == list(range(len(ids)))
+    assert loaded_lpg.node_name(ids[0]) == loaded_lpg.nodes[0]
+    del loaded_lpg['Charlie']
+    with pytest.raises(KeyError):
+        loaded_lpg.node_name(ids[0])
+
+
+def test_pairs_are_packed_ints(loaded_lpg):
+    """Ensure relationships are keyed by one int per pair of nodes."""
+    key = loaded_lpg.node_id('Charlie') << 32 | loaded_lpg.node_id('Unicorn')
+    assert loaded_lpg._relationships[key] is loaded_lpg['Charlie', 'Unicorn']
+    assert all(isinstance(key, int) for key in loaded_lpg._relationships)
+    with pytest.raises(KeyError):
+        loaded_lpg['Charlie', 'Nobody']
@@ -0,0 +1,92 @@
+"""Test compact numeric series and their running aggregates."""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def durations():
+    """Series of call durations."""
+    from ..src.series import NumericSeries
+    return NumericSeries([12., 3.5, 0.25])
+
+
+def test_aggregates(durations):
+    """Ensure aggregates follow every append."""
+    assert (durations.count, durations.sum) == (3, 15.75)
+    assert (durations.min, durations.max) == (0.25, 12.)
+    assert durations.mean == 5.25
+    durations.append(20)
+    durations.extend([0.])
+    assert durations.summary() == {'count': 5, 'sum': 35.75, 'min': 0.,
+                                   'max': 20., 'mean': 7.15}
+
+
+def test_empty():
+    """Ensure an empty series has no min, max or mean."""
+    from ..src.series import NumericSeries
+    assert NumericSeries().summary() == {'count': 0, 'sum': 0., 'min': None,
+                                         'max': None, 'mean': None}
+
+
+def test_list_like(durations):
+    """Ensure the series reads like the list it replaces."""
+    assert len(durations) == 3
+    assert list(durations) == [12., 3.5, 0.25]
+    assert durations[1] == 3.5
+    assert durations[1:] == [3.5, 0.25]
+    assert durations == [12., 3.5, 0.25]
+    assert durations != [12.]
+    with pytest.raises(TypeError):
+        durations.append('long')
+    with pytest.raises(TypeError):
+        durations.extend([1., 'long'])
+    assert durations.count == 3
+
+
+def test_float32_storage(durations):
+    """Ensure values take 4 bytes unless asked for full precision."""
+    from ..src.series import NumericSeries
+    assert durations.typecode == 'f'
+    assert durations._values.itemsize == 4
+    precise = NumericSeries([0.1], typecode='d')
+    assert precise[0] == 0.1
+    assert NumericSeries([0.1])[0] != 0.1
+
+
+def test_sum_of_stored_values():
+    """Ensure the sum adds the float32 values, as a reload would."""
+    from ..src.series import NumericSeries
+    series = NumericSeries([0.1, 0.2])
+    series.append(0.3)
+    assert series.sum == sum(series.tolist())
+    assert series.sum == NumericSeries(series.tolist()).sum
+    assert series.mean == sum(series.tolist()) / 3
+
+
+def test_json_default(durations):
+    """Ensure json.dump writes summaries or raw values."""
+    from ..src.series import json_default
+    properties = {'Count': 3, 'Duration': durations}
+    summary = json.loads(json.dumps(properties, default=json_default()))
+    assert summary['Duration']['sum'] == 15.75
+    raw = json.loads(json.dumps(properties,
+                                default=json_default(summaries=False)))
+    assert raw['Duration'] == [12., 3.5, 0.25]
+    with pytest.raises(TypeError):
+        json.dumps({'when': object()}, default=json_default())
+
+
+def test_json_default_events():
+    """Ensure json.dump writes event logs as summaries or raw events."""
+    from ..src.series import json_default
+    from ..src.temporal import EventLog
+    log = EventLog(['2017-04-12T14:00', '2017-04-10T09:30'], [2., 3.])
+    summary = json.loads(json.dumps(log, default=json_default()))
+    assert summary == {'count': 2, 'total': 5., 'first': '2017-04-10T09:30:00',
+                       'last': '2017-04-12T14:00:00'}
+    assert json.loads(json.dumps(EventLog(), default=json_default())) == {
+        'count': 0, 'total': 0., 'first': None, 'last': None}
+    raw = json.loads(json.dumps(log, default=json_default(summaries=False)))
+    assert raw == [['2017-04-10T09:30:00', 3.], ['2017-04-12T14:00:00', 2.]]
@@ -0,0 +1,224 @@
+"""Test the asyncio query server on localhost."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pytest
+
+
+@pytest.fixture
+def saved_graph(tmpdir):
+    """Kurt's phone graph saved and loaded back from a file."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.persistence import load, save
+    lpg = LabeledPropertyGraph()
+    names = ['Kurt', 'Mom', 'Dad', 'Grandma', '(205) 263-1951']
+    for node in names:
+        lpg.add_node(node)
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Mom', 'Dad')
+    lpg.add_relationship('Text', 'Dad', 'Grandma')
+    lpg.add_relationship('Talk', '(205) 263-1951', 'Kurt')
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=12)
+    path = str(tmpdir.join('graph.lpg'))
+    save(lpg, path)
+    return load(path).to_graph()
+
+
+def _get(url):
+    """Return the status, headers and JSON body of a GET of url."""
+    try:
+        response = urlopen(url, timeout=10)
+    except HTTPError as error:
+        response = error
+    with response:
+        return response.status, response.headers, json.loads(
+            response.read().decode('utf-8'))
+
+
+def _serve(graph, paths, fetch=_get, **kwargs):
+    """Return the responses to paths, requested all at once.
+
+    fetch is called with the URL of each path in a thread of its own.
+    """
+    from ..src.server import GraphServer
+    loop = asyncio.new_event_loop()
+    server = GraphServer(graph, **kwargs)
+    clients = ThreadPoolExecutor(len(paths))
+
+    async def requests():
+        """Start the server, request every path and close it."""
+        await server.start()
+        try:
+            return await asyncio.gather(*[
+                loop.run_in_executor(clients, fetch, 'http://{}:{}{}'.format(
+                    server.address[0], server.address[1], path))
+                for path in paths])
+        finally:
+            await server.close()
+    try:
+        return loop.run_until_complete(requests())
+    finally:
+        loop.close()
+        clients.shutdown()
+
+
+def test_queries(saved_graph):
+    """Ensure every route answers, concurrently."""
+    neighbors, path, centrality, ego = _serve(saved_graph, [
+        '/neighbors?node=Kurt&direction=both',
+        '/path?source={}&target=Grandma'.format(quote('(205) 263-1951')),
+        '/centrality?measure=betweenness&top=2',
+        '/ego?node=Dad&k=1'])
+    assert neighbors[0] == 200
+    assert neighbors[2]['node'] == 'Kurt'
+    assert sorted(neighbors[2]['neighbors']) == ['(205) 263-1951', 'Mom']
+    assert path[2]['path'] == ['(205) 263-1951', 'Kurt', 'Mom', 'Dad',
+                               'Grandma']
+    assert [node for node, _ in centrality[2]['top']] == ['Mom', 'Dad']
+    nodes = [node['id'] for node in ego[2]['nodes']]
+    assert nodes[0] == 'Dad' and sorted(nodes) == ['Dad', 'Grandma', 'Mom']
+    assert [(link['source'], link['target'])
+            for link in ego[2]['links']['Talk']] == [('Mom', 'Dad')]
+    assert [(link['source'], link['target'])
+            for link in ego[2]['links']['Text']] == [('Dad', 'Grandma')]
+
+
+def test_large_results_are_chunked(saved_graph):
+    """Ensure lists are streamed in chunks and other results sent whole."""
+    neighbors, ego, path = _serve(saved_graph, [
+        '/neighbors?node=Kurt&direction=in', '/ego?node=Kurt&k=3',
+        '/path?source=Kurt&target=Dad'], chunk_size=16)
+    assert neighbors[1]['Transfer-Encoding'] == 'chunked'
+    assert sorted(neighbors[2]['neighbors']) == ['(205) 263-1951', 'Mom']
+    assert ego[1]['Transfer-Encoding'] == 'chunked'
+    assert len(ego[2]['nodes']) == 5
+    assert ego[2]['links']['Text'][0]['properties'] == {'Count': 12}
+    assert path[1]['Content-Length'] is not None
+    assert path[2]['path'] == ['Kurt', 'Mom', 'Dad']
+
+
+def test_errors(saved_graph):
+    """Ensure bad requests get a JSON error and the right status."""
+    responses = _serve(saved_graph, [
+        '/neighbors', '/neighbors?node=Nobody', '/path?source=Kurt',
+        '/ego?node=Kurt&k=two', '/centrality?measure=fame', '/spam',
+        '/path?source=Grandma&target=Kurt', '/centrality?top=-1',
+        '/ego?node=Kurt&k=-1'])
+    assert [status for status, _, _ in responses[:6]] == \
+        [400, 404, 400, 400, 400, 404]
+    assert responses[0][2] == {'error': 'missing parameter node'}
+    assert responses[1][2] == {'error': 'unknown node Nobody'}
+    assert responses[7][0::2] == (400, {'error': 'top must not be negative'})
+    assert responses[8][0::2] == (400, {'error': 'k must not be negative'})
+    assert responses[6][0] == 200 and responses[6][2]['path'] is None
+
+
+def test_events(saved_graph):
+    """Ensure relationships with event logs are streamed whole."""
+    from ..src.temporal import record
+    record(saved_graph, 'Talk', 'Mom', 'Dad', '2017-04-10T09:30', 4.)
+    ego, = _serve(saved_graph, ['/ego?node=Dad&k=1'], chunk_size=16)
+    assert ego[0] == 200
+    assert ego[2]['links']['Talk'][0]['properties']['Events'] == [
+        ['2017-04-10T09:30:00', 4.]]
+
+
+def test_slow_queries_do_not_block(saved_graph, monkeypatch):
+    """Ensure quick requests are answered while a slow one computes."""
+    import threading
+    from ..src import analytics
+    from ..src.server import GraphServer
+    started, release = threading.Event(), threading.Event()
+    original = analytics.betweenness_centrality
+
+    def slow(*args):
+        """Wait for release before computing."""
+        started.set()
+        release.wait(10)
+        return original(*args)
+
+    def quick(url):
+        """Return a request of url made while slow waits."""
+        started.wait(10)
+        try:
+            return _get(url), release.is_set()
+        finally:
+            release.set()
+
+    monkeypatch.setattr(analytics, 'betweenness_centrality', slow)
+    loop = asyncio.new_event_loop()
+    server = GraphServer(saved_graph)
+    clients = ThreadPoolExecutor(2)
+
+    async def requests():
+        """Request the slow centrality, then the quick neighbors."""
+        await server.start()
+        url = 'http://{}:{}'.format(*server.address)
+        try:
+            return await asyncio.gather(
+                loop.run_in_executor(
+                    clients, _get, url + '/centrality?measure=betweenness'),
+                loop.run_in_executor(clients, quick,
+                                     url + '/neighbors?node=Mom'))
+        finally:
+            await server.close()
+    try:
+        slow_response, (quick_response, waited) = \
+            loop.run_until_complete(requests())
+    finally:
+        loop.close()
+        clients.shutdown()
+    assert not waited
+    assert sorted(quick_response[2]['neighbors']) == ['Dad', 'Kurt']
+    assert slow_response[0] == 200
+
+
+def test_centrality_computed_once(saved_graph, monkeypatch):
+    """Ensure concurrent requests for the same scores share one run."""
+    import threading
+    import time
+    from ..src import analytics
+    calls = []
+    original = analytics.betweenness_centrality
+
+    def slow(*args):
+        """Count the call and take a while."""
+        calls.append(threading.get_ident())
+        time.sleep(.2)
+        return original(*args)
+
+    monkeypatch.setattr(analytics, 'betweenness_centrality', slow)
+    responses = _serve(saved_graph, ['/centrality?measure=betweenness'] * 4)
+    assert [status for status, _, _ in responses] == [200] * 4
+    assert len(calls) == 1
+    assert len(set(json.dumps(body) for _, _, body in responses)) == 1
+
+
+def test_failed_stream_is_truncated(saved_graph, monkeypatch):
+    """Ensure an error after the headers leaves an incomplete body."""
+    from http.client import IncompleteRead
+    from ..src import analytics
+
+    def failing(graph, node, direction):
+        """Generate a few neighbors, then fail."""
+        for index in range(20):
+            yield 'Neighbor {}'.format(index)
+        raise RuntimeError('lost the graph')
+
+    def read(url):
+        """Return the status and how reading the body ended."""
+        with urlopen(url, timeout=10) as response:
+            try:
+                response.read()
+            except IncompleteRead:
+                return response.status, 'incomplete'
+            return response.status, 'complete'
+
+    monkeypatch.setattr(analytics, 'neighbors', failing)
+    assert _serve(saved_graph, ['/neighbors?node=Kurt'], fetch=read,
+                  chunk_size=16) == [(200, 'incomplete')]
@@ -0,0 +1,106 @@
+"""Test graph statistics and memory accounting."""
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Phone graph with labels and properties on nodes and edges."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951']:
+        lpg.add_node(node)
+    lpg['Kurt'].add_label('Subscriber')
+    lpg['Mom'].add_label('Subscriber')
+    lpg.add_node_props('Kurt', color='blue')
+    lpg.add_node_props('Mom', color='blue')
+    lpg.add_node_props('Dad', color='green')
+    lpg.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    lpg.add_relationship('Text', '(205) 263-1951', 'Kurt')
+    lpg.add_rel_props('Talk', 'Kurt', 'Mom', Count=2, Duration=[1.5, 3.0])
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=12)
+    return lpg
+
+
+@pytest.fixture
+def refactored_lpg():
+    """The same phone graph in the refactored implementation."""
+    from ..src.lpg_refactor import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951']:
+        lpg.add_node(node)
+    lpg['Kurt'].add_label('Subscriber')
+    lpg['Mom'].add_label('Subscriber')
+    lpg['Kurt']['color'] = 'blue'
+    lpg['Mom']['color'] = 'blue'
+    lpg['Dad']['color'] = 'green'
+    lpg.add_relationship('Kurt', 'Mom', 'Text', both_ways=True)
+    lpg.add_relationship('Kurt', 'Mom', 'Talk')
+    lpg.add_relationship('(205) 263-1951', 'Kurt', 'Text')
+    lpg['Kurt', 'Mom']['Talk']['Count'] = 2
+    lpg['Kurt', 'Mom']['Talk']['Duration'] = [1.5, 3.0]
+    lpg['Kurt', 'Mom']['Text']['Count'] = 12
+    return lpg
+
+
+@pytest.mark.parametrize('fixture', ['phone_lpg', 'refactored_lpg'])
+def test_counts(fixture, request):
+    """Ensure both graph classes count nodes, edges and labels alike."""
+    stats = request.getfixturevalue(fixture).stats()
+    assert stats['nodes'] == 4
+    assert stats['edges'] == 4
+    assert stats['sampled'] is None
+    assert stats['edges_by_type'] == {'Text': 3, 'Talk': 1}
+    assert stats['nodes_by_label'] == {'Subscriber': 2}
+    assert stats['node_properties'] == {'color': {'count': 3, 'distinct': 2}}
+    assert stats['relationship_properties'] == {
+        'Count': {'count': 2, 'distinct': 2},
+        'Duration': {'count': 1, 'distinct': 1}}
+
+
+@pytest.mark.parametrize('fixture', ['phone_lpg', 'refactored_lpg'])
+def test_degrees(fixture, request):
+    """Ensure degree percentiles count every relationship."""
+    degree = request.getfixturevalue(fixture).stats()['degree']
+    assert degree['out']['max'] == 2
+    assert degree['in']['max'] == 2
+    assert degree['total'] == pytest.approx(
+        {'p50': 2., 'p90': 3.7, 'p99': 3.97, 'max': 4, 'mean': 2.})
+
+
+@pytest.mark.parametrize('fixture', ['phone_lpg', 'refactored_lpg'])
+def test_memory(fixture, request):
+    """Ensure every structure gets an estimate adding up to the total."""
+    memory = request.getfixturevalue(fixture).stats()['memory']
+    assert memory['total'] == sum(size for structure, size in memory.items()
+                                  if structure != 'total')
+    assert all(size > 0 for size in memory.values())
+    assert {'_nodes', '_relationships', 'node_properties',
+            'relationship_properties'} <= set(memory)
+
+
+def test_memory_grows_with_properties(phone_lpg):
+    """Ensure property values are part of the estimate."""
+    before = phone_lpg.stats()['memory']['relationship_properties']
+    phone_lpg.get_relationship_properties('Talk', 'Kurt', 'Mom')[
+        'Duration'].extend([1.] * 1000)
+    after = phone_lpg.stats()['memory']['relationship_properties']
+    assert after - before >= 24 * 1000
+
+
+def test_sample(phone_lpg):
+    """Ensure sampling walks fewer nodes and scales counts up."""
+    stats = phone_lpg.stats(sample=2, seed=1)
+    assert stats['sampled'] == 2
+    assert stats['nodes'] == 4
+    assert stats['edges'] % 2 == 0
+    assert phone_lpg.stats(sample=10)['sampled'] is None
+
+
+def test_empty_graph():
+    """Ensure an empty graph reports zeroes."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    stats = LabeledPropertyGraph().stats()
+    assert (stats['nodes'], stats['edges']) == (0, 0)
+    assert stats['degree']['total']['max'] == 0
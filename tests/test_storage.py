@@ -0,0 +1,166 @@
+"""Test the storage backends and the harness that compares them."""
+
+import pytest
+
+
+@pytest.fixture(params=['dict', 'array'])
+def graph(request):
+    """StoredGraph over each backend, loaded with a few relationships."""
+    from ..src.storage import ArrayStore, DictStore, StoredGraph
+    store = {'dict': DictStore, 'array': lambda: ArrayStore(capacity=2)}
+    graph = StoredGraph(store[request.param]())
+    for node in ['Kurt', 'Mom', 'Dad', 'Grandma']:
+        graph.add_node(node)
+    graph.add_relationship('Text', 'Kurt', 'Mom', both_ways=True)
+    graph.add_relationship('Talk', 'Kurt', 'Mom')
+    graph.add_relationship('Talk', 'Dad', 'Kurt')
+    return graph
+
+
+def test_nodes(graph):
+    """Ensure nodes come back in insertion order."""
+    assert graph.nodes() == ['Kurt', 'Mom', 'Dad', 'Grandma']
+    with pytest.raises(KeyError):
+        graph.add_node('Kurt')
+
+
+def test_relationships(graph):
+    """Ensure relationships are stored per pair and per name."""
+    assert graph.get_relationships('Kurt', 'Mom') == ['Text', 'Talk']
+    assert graph.unique_relationships() == ['Text', 'Talk']
+    assert graph.nodes_with_relationship('Talk') == ['Kurt', 'Dad']
+    with pytest.raises(KeyError):
+        graph.nodes_with_relationship('Data')
+    assert graph.has_relationship('Kurt', 'Mom', 'Text', both_ways=True)
+    assert not graph.has_relationship('Mom', 'Kurt', 'Talk')
+    with pytest.raises(ValueError):
+        graph.add_relationship('Text', 'Kurt', 'Mom')
+    with pytest.raises(ValueError):
+        graph.add_relationship('Text', 'Kurt', 'Kurt')
+    with pytest.raises(KeyError):
+        graph.add_relationship('Text', 'Kurt', 'Nobody')
+
+
+def test_adjacency(graph):
+    """Ensure neighbors are tracked in both directions."""
+    assert graph.get_neighbors('Kurt') == ['Mom']
+    assert graph.is_neighbor_to('Kurt') == ['Mom', 'Dad']
+    assert graph.has_neighbor('Dad', 'Kurt')
+    assert not graph.has_neighbor('Kurt', 'Dad')
+    with pytest.raises(KeyError):
+        graph.has_neighbor('Nobody', 'Kurt')
+
+
+def test_properties(graph):
+    """Ensure node and relationship properties go through the store."""
+    graph.add_rel_props('Talk', 'Kurt', 'Mom', Count=1)
+    graph.change_rel_prop('Talk', 'Kurt', 'Mom', 'Count', 2)
+    graph.add_node_props('Kurt', color='blue')
+    assert graph.get_relationship_properties('Talk', 'Kurt', 'Mom') == \
+        {'Count': 2}
+    assert graph['Kurt']['color'] == 'blue'
+    graph.remove_rel_prop('Talk', 'Kurt', 'Mom', 'Count')
+    graph.change_node_prop('Kurt', 'color', 'green')
+    graph.remove_node_prop('Kurt', 'color')
+    assert graph.get_relationship_properties('Talk', 'Kurt', 'Mom') == {}
+    assert graph.get_node_properties('Kurt') == {}
+
+
+def test_remove_relationship(graph):
+    """Ensure removing the last relationship keeps the pair linked."""
+    graph.remove_relationship('Text', 'Kurt', 'Mom')
+    assert graph.get_relationships('Kurt', 'Mom') == ['Talk']
+    graph.remove_relationship('Talk', 'Kurt', 'Mom')
+    assert graph.get_neighbors('Kurt') == ['Mom']
+    assert graph.is_neighbor_to('Mom') == ['Kurt']
+    assert graph.get_relationships('Kurt', 'Mom') == []
+    assert graph.nodes_with_relationship('Talk') == ['Dad']
+    assert graph.unique_relationships() == ['Text', 'Talk']
+    with pytest.raises(KeyError):
+        graph.remove_relationship('Talk', 'Kurt', 'Mom')
+    with pytest.raises(KeyError):
+        graph.get_relationships('Kurt', 'Dad')
+
+
+def test_remove_node(graph):
+    """Ensure removing a node drops its relationships everywhere."""
+    graph.remove_node('Kurt')
+    assert graph.nodes() == ['Mom', 'Dad', 'Grandma']
+    assert graph.get_neighbors('Dad') == []
+    assert graph.get_neighbors('Mom') == []
+    assert graph.unique_relationships() == ['Text', 'Talk']
+    assert graph.nodes_with_relationship('Text') == []
+    with pytest.raises(KeyError):
+        graph['Kurt']
+
+
+def test_array_rows_are_reused():
+    """Ensure removed rows are reused instead of scanned forever."""
+    from ..src.storage import ArrayStore, StoredGraph
+    store = ArrayStore(capacity=2)
+    graph = StoredGraph(store)
+    for node in ['Kurt', 'Mom', 'Dad']:
+        graph.add_node(node)
+    for _ in range(100):
+        graph.add_relationship('Talk', 'Kurt', 'Mom')
+        graph.add_relationship('Text', 'Dad', 'Kurt')
+        graph.remove_relationship('Talk', 'Kurt', 'Mom')
+        graph.remove_relationship('Text', 'Dad', 'Kurt')
+    graph.add_relationship('Talk', 'Kurt', 'Mom')
+    graph.add_relationship('Talk', 'Kurt', 'Dad')
+    graph.remove_node('Dad')
+    graph.add_relationship('Text', 'Mom', 'Kurt')
+    assert len(store._edge_objects) == 2
+    assert graph.nodes_with_relationship('Talk') == ['Kurt']
+    assert graph.nodes_with_relationship('Text') == ['Mom']
+    assert graph.get_relationships('Kurt', 'Mom') == ['Talk']
+
+
+def test_store_interface():
+    """Ensure a backend has to implement every method."""
+    from ..src.storage import DictStore, GraphStore
+
+    class PartialStore(GraphStore):
+        successors = DictStore.successors
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_harness_backends_agree():
+    """Ensure every backend gives the same answers to the same mix."""
+    from ..src.harness import run
+    report = run(nodes=50, ops=2000, seed=3)
+    assert report['matches']
+    assert report['operations'] == 2050
+    for numbers in report['backends'].values():
+        assert numbers['ops_per_sec'] > 0
+        assert numbers['peak_memory_bytes'] > 0
+
+
+def test_harness_reports_mismatches():
+    """Ensure a backend giving different answers is caught."""
+    from ..src.harness import run, format_report
+    from ..src.storage import DictStore
+
+    class ForgetfulStore(DictStore):
+        def predecessors(self, name):
+            return []
+
+    report = run({'dict': DictStore, 'forgetful': ForgetfulStore},
+                 nodes=20, ops=500)
+    assert not report['matches']
+    assert all(mismatch[0] == 'forgetful' and
+               mismatch[2][0] == 'is_neighbor_to'
+               for mismatch in report['mismatches'])
+    assert 'DISAGREE' in format_report(report)
+    assert not run({'forgetful': ForgetfulStore}, nodes=20,
+                   ops=500)['matches']
+
+
+def test_harness_main(capsys):
+    """Ensure the command line prints a table for the chosen backends."""
+    from ..src.harness import main
+    assert main(['--nodes', '10', '--ops', '100', '--backend', 'array']) == 0
+    out = capsys.readouterr().out
+    assert 'array' in out and 'ops/sec' in out
@@ -0,0 +1,107 @@
+"""Test k-hop neighborhoods and subgraph views."""
+
+import pytest
+
+
+@pytest.fixture
+def chain_lpg():
+    """Kurt -> Mom -> Dad -> Grandma -> Cousin, plus Spam -> Kurt."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    names = ['Kurt', 'Mom', 'Dad', 'Grandma', 'Cousin', 'Spam']
+    for node in names:
+        lpg.add_node(node)
+    for node_a, node_b in zip(names[:4], names[1:5]):
+        lpg.add_relationship('Text', node_a, node_b)
+    lpg.add_relationship('Talk', 'Spam', 'Kurt')
+    lpg.add_relationship('Talk', 'Mom', 'Kurt')
+    lpg.add_rel_props('Text', 'Kurt', 'Mom', Count=3)
+    lpg['Mom'].add_label('Subscriber')
+    return lpg
+
+
+def test_k_hop_both_ways(chain_lpg):
+    """Ensure hops follow relationships in either direction."""
+    from ..src.subgraph import k_hop
+    assert k_hop(chain_lpg, 'Kurt', 0) == {'Kurt'}
+    assert k_hop(chain_lpg, 'Kurt', 1) == {'Kurt', 'Mom', 'Spam'}
+    assert k_hop(chain_lpg, 'Kurt', 2) == {'Kurt', 'Mom', 'Spam', 'Dad'}
+
+
+def test_k_hop_directed(chain_lpg):
+    """Ensure direction limits which relationships are followed."""
+    from ..src.subgraph import k_hop
+    assert k_hop(chain_lpg, 'Dad', 3, direction='out') == \
+        {'Dad', 'Grandma', 'Cousin'}
+    assert k_hop(chain_lpg, 'Dad', 3, direction='in') == \
+        {'Dad', 'Mom', 'Kurt', 'Spam'}
+
+
+def test_k_hop_missing_node(chain_lpg):
+    """Ensure unknown nodes raise KeyError."""
+    from ..src.subgraph import k_hop
+    with pytest.raises(KeyError):
+        k_hop(chain_lpg, 'Nobody', 2)
+
+
+def test_ego_network_read_api(chain_lpg):
+    """Ensure the view answers reads restricted to its nodes."""
+    from ..src.subgraph import ego_network
+    ego = ego_network(chain_lpg, 'Kurt', 1)
+    assert sorted(ego.nodes()) == ['Kurt', 'Mom', 'Spam']
+    assert len(ego) == 3
+    assert ego.get_neighbors('Mom') == ['Kurt']
+    assert sorted(ego.is_neighbor_to('Kurt')) == ['Mom', 'Spam']
+    assert sorted(ego.unique_relationships()) == ['Talk', 'Text']
+    assert ego.nodes_with_relationship('Text') == ['Kurt']
+    assert ego.get_relationships('Kurt', 'Mom') == ['Text']
+    assert ego.has_relationship('Kurt', 'Mom', 'Text')
+    assert ego.has_neighbor('Kurt', 'Mom')
+    assert not ego.has_neighbor('Mom', 'Dad')
+    assert ego.nodes_with_label('Subscriber') == ['Mom']
+
+
+def test_ego_network_order(chain_lpg):
+    """Ensure nodes are listed in the order the walk reached them."""
+    from ..src.subgraph import SubgraphView, ego_network
+    assert ego_network(chain_lpg, 'Kurt', 2).nodes() == \
+        ['Kurt', 'Mom', 'Spam', 'Dad']
+    assert ego_network(chain_lpg, 'Dad', 3, direction='in').nodes() == \
+        ['Dad', 'Mom', 'Kurt', 'Spam']
+    view = SubgraphView(chain_lpg, ['Dad', 'Kurt', 'Mom', 'Kurt'])
+    assert view.nodes() == ['Dad', 'Kurt', 'Mom']
+    assert view.unique_relationships() == ['Text', 'Talk']
+
+
+def test_ego_network_outside_nodes(chain_lpg):
+    """Ensure nodes outside the view behave as if missing."""
+    from ..src.subgraph import ego_network
+    ego = ego_network(chain_lpg, 'Kurt', 1)
+    assert 'Dad' not in ego
+    with pytest.raises(KeyError):
+        ego['Dad']
+    with pytest.raises(KeyError):
+        ego.get_neighbors('Dad')
+    with pytest.raises(KeyError):
+        ego.has_neighbor('Dad', 'Mom')
+
+
+def test_ego_network_shares_objects(chain_lpg):
+    """Ensure the view hands out the parent's objects, not copies."""
+    from ..src.subgraph import ego_network
+    ego = ego_network(chain_lpg, 'Kurt', 2)
+    assert ego['Mom'] is chain_lpg['Mom']
+    assert ego.get_relationship_properties('Text', 'Kurt', 'Mom') is \
+        chain_lpg.get_relationship_properties('Text', 'Kurt', 'Mom')
+    ego.get_node_properties('Dad')['seen'] = True
+    assert chain_lpg.get_node_properties('Dad') == {'seen': True}
+
+
+def test_ego_network_is_live(chain_lpg):
+    """Ensure parent mutations show through the view."""
+    from ..src.subgraph import ego_network
+    ego = ego_network(chain_lpg, 'Kurt', 1)
+    chain_lpg.add_relationship('Text', 'Spam', 'Mom')
+    assert sorted(ego.get_neighbors('Spam')) == ['Kurt', 'Mom']
+    chain_lpg.remove_node('Spam')
+    assert sorted(ego.nodes()) == ['Kurt', 'Mom']
@@ -0,0 +1,64 @@
+"""Test the synthetic phone network generator."""
+
+import numpy as np
+
+
+def test_distinct_relationships():
+    """Ensure the network has exactly the edges asked for, all distinct."""
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=5000, seed=3)
+    assert len(network.sources) == 5000
+    keys = set(zip(network.sources.tolist(), network.targets.tolist(),
+                   network.types.tolist()))
+    assert len(keys) == 5000
+    assert not np.any(network.sources == network.targets)
+    assert len(network.nodes) == 3 + 1250
+
+
+def test_power_law():
+    """Ensure a few contacts get most of the relationships."""
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=20000, seed=1)
+    degrees = np.bincount(np.concatenate([network.sources, network.targets]),
+                          minlength=len(network.nodes))[3:]
+    assert degrees.max() > 20 * np.median(degrees)
+    assert np.median(degrees) <= 3
+
+
+def test_seed():
+    """Ensure a seed always generates the same network."""
+    from ..src.synthetic import phone_network
+    first = phone_network(edges=500, seed=7)
+    second = phone_network(edges=500, seed=7)
+    assert first.nodes == second.nodes
+    assert np.array_equal(first.sources, second.sources)
+    assert list(first.relationships()) == list(second.relationships())
+
+
+def test_relationships_fill_graph():
+    """Ensure the relationships load into a graph."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=300, subscribers=2, mesh=0)
+    lpg = LabeledPropertyGraph()
+    for node in network.nodes:
+        lpg.add_node(node)
+    for rel, node_a, node_b in network.relationships():
+        lpg.add_relationship(rel, node_a, node_b)
+    assert lpg.stats()['edges'] == 300
+    assert all('Subscriber' in node_a or 'Subscriber' in node_b
+               for _, node_a, node_b in network.relationships())
+
+
+def test_small_network():
+    """Ensure a network too small for the edges gets as many as fit."""
+    from ..src.synthetic import phone_network
+    network = phone_network(edges=100, subscribers=1, contacts=2, mesh=0)
+    assert len(network.sources) == 2 * 4
+
+
+def test_phone_number():
+    """Ensure node names look like phone numbers."""
+    from ..src.synthetic import phone_number
+    assert phone_number(0) == '(200) 000-0000'
+    assert phone_number(12345678) == '(201) 234-5678'
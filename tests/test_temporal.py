@@ -0,0 +1,116 @@
+"""Test time-stamped relationship events and their range queries."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def log():
+    """Event log of five calls, added out of order."""
+    from ..src.temporal import EventLog
+    log = EventLog()
+    log.add('2017-03-02T18:30', 12.)
+    log.add('2017-01-15T09:00', 5.)
+    log.add('2017-03-20T08:00', 1.)
+    log.add(datetime.datetime(2017, 2, 1, 12), 30.)
+    log.add(np.datetime64('2017-03-02T18:30'), 2.)
+    return log
+
+
+@pytest.fixture
+def phone_lpg():
+    """Graph with a few calls and texts recorded as events."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.temporal import record
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', '(205) 263-1951']:
+        lpg.add_node(node)
+    record(lpg, 'Talk', 'Kurt', 'Mom', '2017-03-02T18:30', 12.)
+    record(lpg, 'Talk', 'Kurt', 'Mom', '2017-02-11T10:00', 7.)
+    record(lpg, 'Talk', 'Dad', 'Kurt', '2017-03-30T22:15', 3.)
+    record(lpg, 'Text', 'Kurt', 'Dad', '2017-03-04T08:00')
+    record(lpg, 'Talk', 'Kurt', '(205) 263-1951', '2017-04-01T00:00', 1.)
+    return lpg
+
+
+def test_events_sorted(log):
+    """Ensure events are kept in time order whatever the insertion order."""
+    assert len(log) == 5
+    assert list(log.times.astype(str)) == [
+        '2017-01-15T09:00:00', '2017-02-01T12:00:00', '2017-03-02T18:30:00',
+        '2017-03-02T18:30:00', '2017-03-20T08:00:00']
+    assert list(log.values) == [5., 30., 12., 2., 1.]
+
+
+def test_range_queries(log):
+    """Ensure ranges are half-open and open ended when None."""
+    assert log.count('2017-03', '2017-04') == 3
+    assert log.total('2017-03', '2017-04') == 15.
+    assert log.count('2017-03-02T18:30', '2017-03-20T08:00') == 2
+    assert log.count(end='2017-02-01T12:00') == 1
+    assert log.total() == 50.
+    assert log.count('2017-04', '2017-03') == 0
+    times, values = log.between('2017-02', '2017-03')
+    assert list(values) == [30.]
+
+
+def test_extend(log):
+    """Ensure bulk added events are merged into the log."""
+    log.extend(['2017-01-01', '2017-12-31'], [100., 200.])
+    assert len(log) == 7
+    assert log.total() == 350.
+    assert log.total('2017-01-02', '2017-12-01') == 50.
+    with pytest.raises(ValueError):
+        log.extend(['2017-01-01'], [1., 2.])
+    log.extend(['2018-02-01', '2018-01-01'], [2., 1.])
+    assert list(log.values[-3:]) == [200., 1., 2.]
+    assert log.total('2017-12-31') == 203.
+
+
+def test_aggregate_calendar(log):
+    """Ensure calendar windows count and total their events."""
+    windows = log.aggregate('M')
+    assert list(windows.starts.astype(str)) == [
+        '2017-01-15T09:00:00', '2017-02-01T00:00:00', '2017-03-01T00:00:00']
+    assert list(windows.counts) == [1, 1, 3]
+    assert list(windows.totals) == [5., 30., 15.]
+
+
+def test_aggregate_fixed(log):
+    """Ensure fixed width windows tile the range given."""
+    windows = log.aggregate(datetime.timedelta(days=30),
+                            '2017-01-01', '2017-03-02')
+    assert list(windows.starts.astype(str)) == [
+        '2017-01-01T00:00:00', '2017-01-31T00:00:00']
+    assert list(windows.counts) == [1, 1]
+    assert list(windows.totals) == [5., 30.]
+
+
+def test_aggregate_empty():
+    """Ensure an empty log has no windows."""
+    from ..src.temporal import EventLog
+    assert len(EventLog().aggregate('D').starts) == 0
+
+
+def test_record(phone_lpg):
+    """Ensure record adds relationships and appends to their log."""
+    from ..src.temporal import events
+    log = events(phone_lpg, 'Talk', 'Kurt', 'Mom')
+    assert len(log) == 2
+    assert log.total() == 19.
+    assert phone_lpg.get_relationships('Dad', 'Kurt') == ['Talk']
+    phone_lpg.add_relationship('Text', 'Mom', 'Dad')
+    assert events(phone_lpg, 'Text', 'Mom', 'Dad') is None
+
+
+def test_contacts_in_month(phone_lpg):
+    """Ensure contacts finds who a line talked to in March."""
+    from ..src.temporal import contacts
+    assert contacts(phone_lpg, 'Kurt', '2017-03', '2017-04') == \
+        {'Mom': (1, 12.), 'Dad': (2, 3.)}
+    assert contacts(phone_lpg, 'Kurt', '2017-03', '2017-04',
+                    rels=['Talk'], direction='out') == {'Mom': (1, 12.)}
+    assert contacts(phone_lpg, 'Kurt', direction='in') == {'Dad': (1, 3.)}
+    assert contacts(phone_lpg, 'Mom', '2017-04') == {}
@@ -0,0 +1,111 @@
+"""Test the neighborhood chunk export."""
+
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def phone_lpg():
+    """Two hubs sharing a contact, their numbers and an unreachable pair."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    lpg = LabeledPropertyGraph()
+    for node in ['Kurt', 'Mom', 'Dad', 'Lonely', '(205) 263-1951']:
+        lpg.add_node(node)
+    numbers = ['(206) 555-{:04d}'.format(index) for index in range(5)]
+    for number in numbers:
+        lpg.add_node(number)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom', both_ways=True)
+    lpg.add_relationship('Text', 'Kurt', 'Dad')
+    lpg.add_relationship('Text', 'Mom', 'Dad')
+    for number in numbers[:3]:
+        lpg.add_relationship('Talk', 'Kurt', number)
+    for number in numbers[3:]:
+        lpg.add_relationship('Text', number, 'Mom')
+    lpg.add_relationship('Text', 'Lonely', '(205) 263-1951')
+    lpg.add_rel_props('Talk', 'Kurt', 'Mom', Count=3, Duration=[1.0, 2.0])
+    return lpg
+
+
+def test_partition(phone_lpg):
+    """Ensure every node joins its closest hub, small parts the others."""
+    from ..src.tiles import choose_hubs, partition
+    assert choose_hubs(phone_lpg, 2) == ['Kurt', 'Mom']
+    members = partition(phone_lpg, ['Kurt', 'Mom'])
+    assert list(members) == ['Kurt', 'Mom', None]
+    assert members['Kurt'] == ['Dad', '(206) 555-0000', '(206) 555-0001',
+                               '(206) 555-0002']
+    assert members['Mom'] == ['(206) 555-0003', '(206) 555-0004']
+    assert members[None] == ['(205) 263-1951', 'Lonely']
+    members = partition(phone_lpg, ['Kurt', 'Mom'], min_size=2)
+    assert list(members) == ['Kurt', 'Mom', '(205) 263-1951']
+    assert members['(205) 263-1951'] == ['Lonely']
+
+
+def test_isolated_nodes_share_chunks(tmpdir):
+    """Ensure isolated nodes fill a few chunks rather than hubs each."""
+    from ..src.labeled_property_graph import LabeledPropertyGraph
+    from ..src.tiles import OTHERS, write_tiles
+    lpg = LabeledPropertyGraph()
+    numbers = ['(206) 555-{:04d}'.format(index) for index in range(23)]
+    for node in ['Kurt', 'Mom'] + numbers:
+        lpg.add_node(node)
+    lpg.add_relationship('Talk', 'Kurt', 'Mom')
+    index = write_tiles(lpg, str(tmpdir), hubs=['Kurt'], chunk_size=10)
+    assert [node['id'] for node in index['nodes']] == ['Kurt', OTHERS]
+    others = index['nodes'][1]
+    assert others['members'] == 23
+    assert others['chunks'] == ['chunk_1_0.json', 'chunk_1_1.json',
+                                'chunk_1_2.json']
+    with open(str(tmpdir.join(others['chunks'][0]))) as handle:
+        assert json.load(handle)['hub'] == OTHERS
+
+
+def test_write_tiles(phone_lpg, tmpdir):
+    """Ensure the index and chunks together hold the whole graph once."""
+    from ..src.tiles import INDEX, OTHERS, write_tiles
+    directory = str(tmpdir.join('tiles'))
+    index = write_tiles(phone_lpg, directory, hub_count=2, chunk_size=3,
+                        properties=['Count'])
+    with open(os.path.join(directory, INDEX)) as handle:
+        assert json.load(handle) == index
+    hubs = {node['id']: node for node in index['nodes']}
+    assert hubs['Kurt']['chunks'] == ['chunk_0_0.json', 'chunk_0_1.json']
+    assert hubs['Kurt']['members'] == 4
+    assert sorted((link['source'], link['target'])
+                  for link in index['links']['Talk']) == \
+        [('Kurt', 'Mom'), ('Mom', 'Kurt')]
+    assert {link['source']: link['properties']
+            for link in index['links']['Talk']} == \
+        {'Kurt': {'Count': 3}, 'Mom': {}}
+    assert hubs[OTHERS]['members'] == 2
+    nodes, links = set(hubs) - {OTHERS}, set()
+    for hub in index['nodes']:
+        for filename in hub['chunks']:
+            with open(os.path.join(directory, filename)) as handle:
+                chunk = json.load(handle)
+            assert chunk['hub'] == hub['id']
+            assert len(chunk['nodes']) <= 3
+            nodes.update(node['id'] for node in chunk['nodes'])
+            for name, rels in chunk['links'].items():
+                links.update((name, link['source'], link['target'])
+                             for link in rels)
+    links.update((name, link['source'], link['target'])
+                 for name, rels in index['links'].items() for link in rels)
+    assert nodes == set(phone_lpg.nodes())
+    assert len(links) == sum(
+        len(phone_lpg.get_relationships(source, target))
+        for source in phone_lpg.nodes()
+        for target in phone_lpg.get_neighbors(source))
+
+
+def test_positions(phone_lpg, tmpdir):
+    """Ensure positions are written on hubs and chunk nodes."""
+    from ..src.tiles import write_tiles
+    positions = {name: (1., 2.) for name in phone_lpg.nodes()}
+    index = write_tiles(phone_lpg, str(tmpdir), hubs=['Kurt'],
+                        positions=positions)
+    assert index['nodes'][0]['x'] == 1.
+    with open(str(tmpdir.join(index['nodes'][0]['chunks'][0]))) as handle:
+        assert all(node['y'] == 2. for node in json.load(handle)['nodes'])
@@ -0,0 +1,92 @@
+"""Test the rolling time window over the labeled property graph."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def windowed():
+    """Three day window holding a few calls and texts."""
+    from ..src.windowed import WindowedGraph
+    graph = WindowedGraph(window=datetime.timedelta(days=3))
+    graph.add_event('Talk', 'Kurt', 'Mom', '2017-03-01T10:00', 5.)
+    graph.add_event('Talk', 'Kurt', 'Mom', '2017-03-02T10:00', 2.)
+    graph.add_event('Text', 'Dad', 'Kurt', '2017-03-03T10:00')
+    return graph
+
+
+def test_add_event(windowed):
+    """Ensure events add nodes, relationships and aggregates."""
+    assert windowed.nodes() == ['Kurt', 'Mom', 'Dad']
+    assert windowed.get_relationship_properties('Talk', 'Kurt', 'Mom') == \
+        {'Count': 2, 'Total': 7.}
+    assert windowed.out_degree('Kurt') == 1
+    assert windowed.in_degree('Kurt') == 1
+    assert windowed.degree('Mom') == 1
+    assert windowed.event_count() == 3
+    assert windowed.now == np.datetime64('2017-03-01T10:00')
+
+
+def test_advance_decrements(windowed):
+    """Ensure expired events come off their relationship."""
+    assert windowed.advance('2017-03-04T12:00') == 1
+    assert windowed.start == np.datetime64('2017-03-01T12:00')
+    assert windowed.get_relationship_properties('Talk', 'Kurt', 'Mom') == \
+        {'Count': 1, 'Total': 2.}
+    assert windowed.advance('2017-03-04T12:00') == 0
+
+
+def test_advance_drops_empty(windowed):
+    """Ensure relationships and nodes without events are dropped."""
+    windowed.advance('2017-03-05T12:00')
+    assert windowed.nodes() == ['Kurt', 'Dad']
+    assert windowed.unique_relationships() == ['Text']
+    assert windowed.get_neighbors('Kurt') == []
+    assert windowed.nodes_with_relationship('Text') == ['Dad']
+    assert windowed.degree('Kurt') == 1
+    windowed.advance('2017-03-07')
+    assert windowed.nodes() == []
+    assert windowed.unique_relationships() == []
+    assert windowed.event_count() == 0
+
+
+def test_old_events_ignored(windowed):
+    """Ensure events older than the window are not added."""
+    windowed.advance('2017-03-10')
+    assert not windowed.add_event('Talk', 'Kurt', 'Mom', '2017-03-01', 1.)
+    assert windowed.add_event('Talk', 'Kurt', 'Mom', '2017-03-09', 1.)
+    assert windowed.nodes() == ['Kurt', 'Mom']
+    with pytest.raises(ValueError):
+        windowed.advance('2017-03-09')
+
+
+def test_removed_relationship_events_skipped(windowed):
+    """Ensure events of a relationship removed by hand expire quietly."""
+    windowed.remove_node('Mom')
+    assert windowed.degree('Kurt') == 1
+    assert windowed.unique_relationships() == ['Text']
+    windowed.add_event('Talk', 'Kurt', 'Dad', '2017-03-03T11:00')
+    windowed.remove_relationship('Text', 'Dad', 'Kurt')
+    assert windowed.get_neighbors('Dad') == []
+    assert windowed.advance('2017-03-06T10:30') == 3
+    assert windowed.nodes() == ['Kurt', 'Dad']
+    assert windowed.degree('Kurt') == 1
+
+
+def test_changes_are_seen(windowed):
+    """Ensure events and evictions reach change feeds and cache versions."""
+    from ..src.changes import ChangeFeed
+    feed = ChangeFeed(windowed)
+    version = windowed._node_versions['Mom']
+    windowed.add_event('Talk', 'Kurt', 'Mom', '2017-03-03T11:00', 1.)
+    windowed.add_event('Talk', 'Mom', 'Dad', '2017-03-03T12:00', 4.)
+    windowed.advance('2017-03-04T12:00')
+    assert windowed._node_versions['Mom'] > version
+    assert [(change.node, change.other, change.key, change.value)
+            for change in feed.since(0)
+            if change.kind == 'set_relationship_property'] == [
+        ('Kurt', 'Mom', 'Count', 3), ('Kurt', 'Mom', 'Total', 8.),
+        ('Mom', 'Dad', 'Count', 1), ('Mom', 'Dad', 'Total', 4.),
+        ('Kurt', 'Mom', 'Count', 2), ('Kurt', 'Mom', 'Total', 3.)]